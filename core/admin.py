@@ -1,11 +1,14 @@
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.admin.widgets import FilteredSelectMultiple
 from django.utils.html import format_html
+from .matcher import get_region_index
+from .refdata import get_wilayah
+from .versioning import bump_data_version
 from .models import (
     KabupatenKota, Kecamatan, KelurahanDesa, 
     DapilRI, DapilProvinsi, DapilKabKota, Partai,
-    TPSDPTPemilu, TPSDPTPilkada
+    TPSDPTPemilu, TPSDPTPilkada, kode_range
 )
 
 # --- FORMS & WIDGETS ---
@@ -32,6 +35,8 @@ class DapilRIForm(forms.ModelForm):
         kab_pilihan = self.cleaned_data.get('kabupaten_pilihan')
         if kab_pilihan:
             kab_pilihan.update(dapil_ri=instance)
+        # queryset.update() tidak memicu signal
+        bump_data_version(KabupatenKota)
         return instance
 
 class DapilProvinsiForm(forms.ModelForm):
@@ -56,6 +61,7 @@ class DapilProvinsiForm(forms.ModelForm):
         kab_pilihan = self.cleaned_data.get('kabupaten_pilihan')
         if kab_pilihan:
             kab_pilihan.update(dapil_provinsi=instance)
+        bump_data_version(KabupatenKota)
         return instance
 
 class PartaiForm(forms.ModelForm):
@@ -79,7 +85,7 @@ class KecamatanForm(forms.ModelForm):
 
     class Meta:
         model = Kecamatan
-        fields = ['kabupaten_kota', 'dapil_kab_kota', 'nama']
+        fields = ['kabupaten_kota', 'dapil_kab_kota', 'kode', 'nama']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -165,24 +171,60 @@ class PartaiAdmin(admin.ModelAdmin):
 
 # --- WILAYAH & DAPIL ---
 
+class FuzzyWilayahSearchMixin:
+    """
+    Pencarian changelist & autocomplete wilayah lewat indeks nama in-memory (core.matcher)
+    alih-alih LIKE '%...%' di kolom nama. Angka dianggap kode wilayah (range scan indeks kode).
+    """
+    wilayah_level = None
+    search_limit = 200
+    # Filter changelist yang membatasi pencarian ke satu induk, mis. kabupaten_kota__id__exact
+    parent_lookup = None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        kode = term.replace('.', '')
+        if kode.isdigit():
+            return queryset.filter(kode_range(kode)), False
+        parent_id = request.GET.get(self.parent_lookup) if self.parent_lookup else None
+        parent_id = int(parent_id) if parent_id and parent_id.isdigit() else None
+        index = get_region_index(self.wilayah_level)
+        # Satu id lebih dari batas untuk mendeteksi hasil yang terpotong
+        ids = index.search(term, parent_id, limit=self.search_limit + 1)
+        if self.wilayah_level == 'kecamatan' and len(ids) <= self.search_limit:
+            # Nama kabupaten juga dicari (sebelumnya lewat search_fields kabupaten_kota__nama)
+            wilayah = get_wilayah()
+            for kab_id in get_region_index('kabupaten').search(term, limit=5, fuzzy=False):
+                if parent_id is None or kab_id == parent_id:
+                    ids += [i for i in wilayah.kabupaten[kab_id].kecamatan_ids if i not in ids]
+        if len(ids) > self.search_limit and not request.path.endswith('/autocomplete/'):
+            messages.info(request, f"Menampilkan {self.search_limit} hasil teratas untuk '{term}'; persempit kata pencarian.")
+        return queryset.filter(pk__in=ids[:self.search_limit]), False
+
+
 @admin.register(KabupatenKota)
-class KabupatenAdmin(admin.ModelAdmin):
-    list_display = ('nama', 'dapil_ri', 'dapil_provinsi')
+class KabupatenAdmin(FuzzyWilayahSearchMixin, admin.ModelAdmin):
+    wilayah_level = 'kabupaten'
+    list_display = ('nama', 'kode', 'dapil_ri', 'dapil_provinsi')
     list_filter = ('dapil_ri', 'dapil_provinsi')
-    search_fields = ('nama',)
+    search_fields = ('nama', '^kode')
     autocomplete_fields = ('dapil_ri', 'dapil_provinsi')
 
 @admin.register(Kecamatan)
-class KecamatanAdmin(admin.ModelAdmin):
+class KecamatanAdmin(FuzzyWilayahSearchMixin, admin.ModelAdmin):
+    wilayah_level = 'kecamatan'
+    parent_lookup = 'kabupaten_kota__id__exact'
     form = KecamatanForm
-    list_display = ('nama', 'kabupaten_kota', 'get_dapil_kab_nama')
+    list_display = ('nama', 'kode', 'kabupaten_kota', 'get_dapil_kab_nama')
     list_filter = ('kabupaten_kota', 'dapil_kab_kota')
-    search_fields = ('nama', 'kabupaten_kota__nama')
+    search_fields = ('nama', 'kabupaten_kota__nama', '^kode')
     autocomplete_fields = ('kabupaten_kota', 'dapil_kab_kota')
     
     # Satu Tab Polos: Sesuai keinginan Bos
     fields = (
-        'kabupaten_kota', 'dapil_kab_kota', 'nama',
+        'kabupaten_kota', 'dapil_kab_kota', 'kode', 'nama',
         'tps_pemilu', 'dpt_pemilu', 
         'tps_pilkada', 'dpt_pilkada'
     )
@@ -196,10 +238,12 @@ class KecamatanAdmin(admin.ModelAdmin):
         return obj.dapil_kab_kota.nama if obj.dapil_kab_kota else "-"
 
 @admin.register(KelurahanDesa)
-class DesaAdmin(admin.ModelAdmin):
-    list_display = ('nama', 'kecamatan', 'get_kabupaten')
+class DesaAdmin(FuzzyWilayahSearchMixin, admin.ModelAdmin):
+    wilayah_level = 'desa'
+    parent_lookup = 'kecamatan__id__exact'
+    list_display = ('nama', 'kode', 'kecamatan', 'get_kabupaten')
     list_filter = ('kecamatan__kabupaten_kota', 'kecamatan')
-    search_fields = ('nama',)
+    search_fields = ('nama', '^kode')
     autocomplete_fields = ('kecamatan', 'dapil_kab_kota')
 
     def get_queryset(self, request):
@@ -5,3 +5,7 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Data Master'
+
+    def ready(self):
+        # Daftarkan signal versi data & invalidasi cache data referensi
+        from . import versioning, refdata  # noqa: F401
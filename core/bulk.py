@@ -0,0 +1,25 @@
+from django.db import connection
+
+from .versioning import bump_data_version
+
+# ==============================================================================
+# HELPER PENULISAN MASSAL (BULK UPSERT)
+# ==============================================================================
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=500):
+    """
+    INSERT ... ON CONFLICT/DUPLICATE KEY UPDATE dalam satu statement per batch.
+    Pengganti loop update_or_create() yang memakan 2 query per baris.
+
+    MySQL tidak menerima target kolom konflik (memakai semua unique key),
+    jadi unique_fields hanya dikirim untuk backend yang mendukungnya.
+    """
+    if not objs:
+        return []
+    opts = {'update_conflicts': True, 'update_fields': update_fields, 'batch_size': batch_size}
+    if connection.features.supports_update_conflicts_with_target:
+        opts['unique_fields'] = unique_fields
+    result = model.objects.bulk_create(objs, **opts)
+    # bulk_create tidak memicu signal
+    bump_data_version(model, objs=objs)
+    return result
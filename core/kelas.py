@@ -0,0 +1,95 @@
+"""
+Batas kelas choropleth (murni NumPy, tanpa Django).
+
+Setiap fungsi batas_*() menerima nilai (NaN diabaikan) dan jumlah kelas k, lalu mengembalikan
+k + 1 tepi naik [min, ..., max]; kelas()/klasifikasikan() memetakan nilai ke indeks 0..k-1.
+  - kuantil  : jumlah wilayah per kelas kira-kira sama,
+  - interval : lebar kelas sama (max - min) / k,
+  - jenks    : natural breaks Fisher-Jenks (jumlah kuadrat simpangan dalam kelas minimum),
+               program dinamis yang setiap langkahnya satu operasi matriks (n x n). Data besar
+               disampel dulu ke JENKS_MAKS titik kuantil agar biayanya tetap (hasil mendekati).
+"""
+import numpy as np
+
+JENKS_MAKS = 1000
+
+
+def _bersih(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.sort(x[np.isfinite(x)])
+
+
+def _tepi(x, dalam):
+    """Tepi lengkap [min, dalam..., max], dipaksa tidak turun."""
+    return np.maximum.accumulate(np.concatenate([[x[0]], dalam, [x[-1]]]))
+
+
+def batas_kuantil(x, k):
+    x = _bersih(x)
+    if not len(x):
+        return np.zeros(0)
+    return _tepi(x, np.quantile(x, np.arange(1, k) / k))
+
+
+def batas_interval(x, k):
+    x = _bersih(x)
+    if not len(x):
+        return np.zeros(0)
+    return _tepi(x, x[0] + (x[-1] - x[0]) * np.arange(1, k) / k)
+
+
+def batas_jenks(x, k):
+    x = _bersih(x)
+    if not len(x):
+        return np.zeros(0)
+    if len(x) > JENKS_MAKS:
+        x = np.quantile(x, np.linspace(0, 1, JENKS_MAKS))
+    n = len(x)
+    k = max(1, min(k, n))
+
+    # ssd[j, i] = jumlah kuadrat simpangan x[j..i] (j <= i), inf untuk j > i
+    s1 = np.concatenate([[0.0], np.cumsum(x)])
+    s2 = np.concatenate([[0.0], np.cumsum(x ** 2)])
+    j, i = np.arange(n)[:, None], np.arange(n)[None, :]
+    panjang = i - j + 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ssd = (s2[i + 1] - s2[j]) - (s1[i + 1] - s1[j]) ** 2 / panjang
+    ssd = np.where(panjang > 0, np.maximum(ssd, 0.0), np.inf)
+
+    # biaya[m][i] = SSD minimum x[0..i] dibagi m + 1 kelas; awal[m][i] = indeks awal kelas terakhir
+    biaya = ssd[0].copy()
+    awal = []
+    for _ in range(1, k):
+        # Kelas terakhir x[j..i] dengan j >= 1, sisanya x[0..j-1] sudah optimal
+        calon = biaya[:-1, None] + ssd[1:]
+        pilih = calon.argmin(axis=0)
+        biaya = np.concatenate([[np.inf], calon[pilih, np.arange(n)][1:]])
+        awal.append(pilih + 1)
+
+    # Telusur balik dari ujung data
+    dalam, ujung = [], n - 1
+    for pilih in reversed(awal):
+        j = int(pilih[ujung])
+        dalam.append(x[j - 1])
+        ujung = j - 1
+    return _tepi(x, np.array(dalam[::-1]))
+
+
+BATAS = {'kuantil': batas_kuantil, 'interval': batas_interval, 'jenks': batas_jenks}
+
+
+def klasifikasikan(x, tepi):
+    """Indeks kelas (N,) 0..k-1 tiap nilai (nilai = tepi dalam masuk kelas bawah), -1 untuk NaN."""
+    x = np.asarray(x, dtype=np.float64)
+    if len(tepi) < 2:
+        return np.full(len(x), -1, dtype=np.int64)
+    kelas = np.searchsorted(tepi[1:-1], x, side='left')
+    return np.where(np.isfinite(x), kelas, -1)
+
+
+def palet(warna, k, terang='#f7f7f7'):
+    """k warna hex dari `terang` ke `warna` (interpolasi RGB linier)."""
+    rgb = lambda h: np.array([int(h.lstrip('#')[p:p + 2], 16) for p in (0, 2, 4)], dtype=np.float64)
+    a, b = rgb(terang), rgb(warna)
+    t = np.linspace(0.15, 1.0, k) if k > 1 else np.ones(1)
+    return ['#%02x%02x%02x' % tuple(int(round(v)) for v in a + (b - a) * s) for s in t]
@@ -0,0 +1,129 @@
+"""
+Pengelompokan (clustering) profil suara wilayah: k-means murni NumPy, tanpa Django.
+
+Alurnya:
+  1. standarisasi(): tiap kolom fitur di-z-score, lalu tiap blok fitur (mis. share paslon,
+     share partai, partisipasi) dibagi akar jumlah kolomnya supaya 18 kolom partai tidak
+     menenggelamkan 2 kolom partisipasi. Nilai kosong (NaN) menjadi 0 = rata-rata kolom.
+  2. kmeans(): inisialisasi k-means++ dan iterasi Lloyd; jarak dihitung sekaligus untuk
+     semua titik x semua centroid ||x||^2 - 2 x.c + ||c||^2. Diulang `n_init` kali dengan
+     seed tetap, hasil dengan inersia terkecil yang dipakai (deterministik).
+  3. pilih_k(): jumlah klaster dengan silhouette rata-rata tertinggi di rentang K_MIN..K_MAX.
+"""
+import numpy as np
+
+K_MIN = 2
+K_MAX = 6
+N_INIT = 8
+MAX_ITER = 100
+
+
+def standarisasi(x, blok):
+    """
+    (z, rata, sd, bobot) dengan z = fitur siap klaster. `x` (N, F), `blok` = panjang tiap blok
+    kolom (jumlahnya F). rata / sd / bobot dipakai ulang untuk memetakan titik baru (terapkan()).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rata = np.nanmean(x, axis=0) if len(x) else np.zeros(x.shape[1])
+        sd = np.nanstd(x, axis=0) if len(x) else np.ones(x.shape[1])
+    rata = np.nan_to_num(rata)
+    sd = np.where(np.isfinite(sd) & (sd > 0), sd, 1.0)
+    bobot = np.repeat([1 / np.sqrt(b) for b in blok], blok)
+    return terapkan(x, rata, sd, bobot), rata, sd, bobot
+
+
+def terapkan(x, rata, sd, bobot):
+    """Standarisasi titik baru dengan parameter hasil standarisasi()."""
+    return np.nan_to_num((np.asarray(x, dtype=np.float64) - rata) / sd) * bobot
+
+
+def _jarak2(x, c):
+    """Kuadrat jarak Euclid (N, K) semua titik ke semua centroid."""
+    d = (x ** 2).sum(axis=1)[:, None] - 2 * x @ c.T + (c ** 2).sum(axis=1)[None, :]
+    return np.maximum(d, 0.0)
+
+
+def terdekat(x, c):
+    """(label (N,), jarak (N,)) centroid terdekat tiap titik."""
+    d = _jarak2(x, c)
+    label = d.argmin(axis=1)
+    return label, np.sqrt(d[np.arange(len(x)), label])
+
+
+def _kmeans_pp(x, k, rng):
+    n = len(x)
+    pusat = [int(rng.integers(n))]
+    d = _jarak2(x, x[pusat])[:, 0]
+    for _ in range(1, k):
+        total = d.sum()
+        # Semua titik sudah berimpit dengan centroid: ambil acak
+        i = int(rng.integers(n)) if total <= 0 else int(np.searchsorted(np.cumsum(d), rng.random() * total))
+        pusat.append(min(i, n - 1))
+        d = np.minimum(d, _jarak2(x, x[[pusat[-1]]])[:, 0])
+    return x[pusat].copy()
+
+
+def _lloyd(x, c):
+    label = None
+    for _ in range(MAX_ITER):
+        baru = _jarak2(x, c).argmin(axis=1)
+        if label is not None and np.array_equal(baru, label):
+            break
+        label = baru
+        jumlah = np.bincount(label, minlength=len(c))
+        total = np.zeros_like(c)
+        np.add.at(total, label, x)
+        # Centroid kosong tetap di tempatnya
+        isi = jumlah > 0
+        c[isi] = total[isi] / jumlah[isi, None]
+    inersia = float(_jarak2(x, c)[np.arange(len(x)), label].sum())
+    return label, c, inersia
+
+
+def kmeans(x, k, n_init=N_INIT, seed=0):
+    """(label (N,), centroid (k, F), inersia) terbaik dari `n_init` percobaan k-means++."""
+    x = np.asarray(x, dtype=np.float64)
+    k = max(1, min(k, len(x)))
+    rng = np.random.default_rng(seed)
+    terbaik = None
+    for _ in range(n_init):
+        hasil = _lloyd(x, _kmeans_pp(x, k, rng))
+        if terbaik is None or hasil[2] < terbaik[2]:
+            terbaik = hasil
+    return terbaik
+
+
+def silhouette(x, label):
+    """Silhouette rata-rata (-1..1); 0 bila hanya satu klaster atau setiap klaster satu titik."""
+    k = label.max() + 1 if len(label) else 0
+    if k < 2:
+        return 0.0
+    d = np.sqrt(_jarak2(x, x))
+    jumlah = np.bincount(label, minlength=k)
+    # Jumlah jarak tiap titik ke seluruh anggota tiap klaster: (N, K)
+    per_klaster = d @ np.eye(k)[label]
+    sendiri = jumlah[label] - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = per_klaster[np.arange(len(x)), label] / np.where(sendiri > 0, sendiri, 1)
+        lain = per_klaster / np.where(jumlah > 0, jumlah, 1)[None, :]
+    lain[np.arange(len(x)), label] = np.inf
+    lain[:, jumlah == 0] = np.inf
+    b = lain.min(axis=1)
+    s = np.where(sendiri > 0, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0.0)
+    return float(s.mean())
+
+
+def pilih_k(x, k_min=K_MIN, k_max=K_MAX, seed=0):
+    """(k, label, centroid, silhouette) dengan silhouette tertinggi; k=1 bila titik terlalu sedikit."""
+    x = np.asarray(x, dtype=np.float64)
+    terbaik = None
+    for k in range(k_min, min(k_max, len(x) - 1) + 1):
+        label, c, _ = kmeans(x, k, seed=seed)
+        s = silhouette(x, label)
+        if terbaik is None or s > terbaik[3] + 1e-9:
+            terbaik = (k, label, c, s)
+    if terbaik is None:
+        label, c, _ = kmeans(x, 1, seed=seed) if len(x) else (np.zeros(0, dtype=np.int64), np.zeros((0, x.shape[1])), 0.0)
+        return len(c), label, c, 0.0
+    return terbaik
@@ -0,0 +1,155 @@
+"""
+Mesin alokasi kursi Sainte-Laguë (murni NumPy, tanpa Django).
+
+Dipakai untuk semua jenis dapil (DPR RI / DPRD Provinsi / DPRD Kab/Kota): input berupa matriks
+suara dapil x partai dan vektor kursi per dapil. Semua dapil dihitung sekaligus:
+hasil bagi suara / (1, 3, 5, ...) disusun menjadi tensor dapil x (partai * pembagi),
+diurutkan per baris, lalu N teratas tiap dapil (N = kursi dapil) dihitung per partai.
+
+Modul ini sengaja tidak mengimpor Django agar fungsi simulasinya bisa dijalankan
+di process pool (spawn) tanpa setup Django di proses anak. Pool itu dibuat sekali per
+proses dan dipakai ulang oleh semua request (hasilnya pun di-cache per versi data).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import atexit
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+
+# Ambang batas parlemen (UU 7/2017): 4% suara sah
+AMBANG_BATAS = 0.04
+
+# Di bawah jumlah skenario ini, hitungan langsung lebih murah dari kirim-terima ke pool
+POOL_MIN = 4096
+# Batas proses anak per proses web (gunicorn worker), berapapun jumlah CPU
+POOL_MAKS = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def lolos_ambang(suara, ambang=AMBANG_BATAS):
+    """
+    Mask partai yang lolos ambang batas dari total suara semua dapil dalam matriks.
+    `suara`: (..., dapil, partai) -> (..., partai) bool.
+    """
+    per_partai = suara.sum(axis=-2)
+    total = per_partai.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, per_partai / np.where(total > 0, total, 1) >= ambang, False)
+
+
+def alokasi(suara, kursi, ambang=AMBANG_BATAS, lolos=None):
+    """
+    Alokasi kursi Sainte-Laguë untuk semua dapil sekaligus.
+
+    suara : array (dapil, partai) atau (skenario, dapil, partai)
+    kursi : array (dapil,) jumlah kursi tiap dapil
+    lolos : mask (partai,) / (skenario, partai); default dihitung dari `ambang`
+    Hasil : array int dengan bentuk sama dengan `suara` berisi jumlah kursi.
+
+    Seri hasil bagi dipecah secara deterministik: partai dengan indeks (no urut) lebih kecil didahulukan.
+    """
+    suara = np.asarray(suara, dtype=np.float64)
+    kursi = np.asarray(kursi, dtype=np.int64)
+    batch = suara.ndim == 3
+    if not batch:
+        suara = suara[None]
+    if lolos is None:
+        lolos = lolos_ambang(suara, ambang)
+    lolos = np.broadcast_to(np.asarray(lolos, dtype=bool), (suara.shape[0], suara.shape[2]))
+
+    n_skenario, n_dapil, n_partai = suara.shape
+    maks_kursi = int(kursi.max()) if kursi.size else 0
+    hasil = np.zeros(suara.shape, dtype=np.int64)
+    if maks_kursi == 0 or n_partai == 0:
+        return hasil if batch else hasil[0]
+
+    pembagi = 2 * np.arange(maks_kursi) + 1                          # 1, 3, 5, ...
+    hasil_bagi = suara[..., None] / pembagi                          # (S, D, P, K)
+    hasil_bagi = np.where(lolos[:, None, :, None], hasil_bagi, -1.0)  # partai tidak lolos tidak ikut
+    flat = hasil_bagi.reshape(n_skenario, n_dapil, n_partai * maks_kursi)
+
+    # argsort stabil pada nilai negatif = urut turun, seri tetap urut indeks partai
+    urutan = np.argsort(-flat, axis=-1, kind='stable')
+    terpilih = np.arange(n_partai * maks_kursi) < kursi[:, None]      # (D, P*K): N teratas per dapil
+    nilai = np.take_along_axis(flat, urutan, axis=-1)
+    terpilih = terpilih[None] & (nilai > 0)                           # jangan beri kursi dari hasil bagi 0
+    partai = urutan // maks_kursi
+
+    idx_s, idx_d, _ = np.nonzero(terpilih)
+    np.add.at(hasil, (idx_s, idx_d, partai[terpilih]), 1)
+    return hasil if batch else hasil[0]
+
+
+# ==============================================================================
+# SIMULASI WHAT-IF (PERPINDAHAN SUARA)
+# ==============================================================================
+
+def terapkan_skenario(suara, skenario):
+    """
+    Matriks suara per skenario. `skenario`: array (S, 3) berisi (indeks partai asal,
+    indeks partai tujuan, fraksi suara asal yang pindah) dan berlaku di semua dapil.
+    Hasil: (S, dapil, partai).
+    """
+    suara = np.asarray(suara, dtype=np.float64)
+    skenario = np.asarray(skenario, dtype=np.float64).reshape(-1, 3)
+    dari = skenario[:, 0].astype(np.int64)
+    ke = skenario[:, 1].astype(np.int64)
+    pindah = suara[:, dari].T * skenario[:, 2:3]                      # (S, D)
+    hasil = np.repeat(suara[None], len(skenario), axis=0)
+    s = np.arange(len(skenario))
+    hasil[s, :, dari] -= pindah
+    hasil[s, :, ke] += pindah
+    return hasil
+
+
+def _simulasi_chunk(suara, kursi, skenario, ambang):
+    return alokasi(terapkan_skenario(suara, skenario), kursi, ambang)
+
+
+def _tutup_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_pool():
+    """Satu process pool (spawn) per proses, dibuat sekali saat pertama dibutuhkan lalu dipakai ulang."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = min(POOL_MAKS, os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+atexit.register(_tutup_pool)
+
+
+def simulasi(suara, kursi, skenario, ambang=AMBANG_BATAS, chunk=256):
+    """
+    Kursi untuk setiap skenario perpindahan suara: array (S, dapil, partai).
+
+    Skenario diproses per potongan `chunk` agar tensor (chunk, dapil, partai, kursi) tetap kecil.
+    Mulai POOL_MIN skenario, potongan dibagi ke process pool bersama (maks. POOL_MAKS proses,
+    tidak dibuat baru per panggilan); batch yang lebih kecil dihitung langsung di proses ini.
+    """
+    skenario = np.asarray(skenario, dtype=np.float64).reshape(-1, 3)
+    potongan = [skenario[i:i + chunk] for i in range(0, len(skenario), chunk)]
+    if not potongan:
+        return np.zeros((0, *np.shape(suara)), dtype=np.int64)
+    if len(potongan) <= 1 or len(skenario) < POOL_MIN or (os.cpu_count() or 1) <= 1:
+        return np.concatenate([_simulasi_chunk(suara, kursi, p, ambang) for p in potongan])
+    try:
+        hasil = _get_pool().map(_simulasi_chunk, *zip(*[(suara, kursi, p, ambang) for p in potongan]))
+        return np.concatenate(list(hasil))
+    except BrokenProcessPool:
+        # Proses anak mati (OOM / dibunuh): buang pool, hitung langsung; pool dibuat ulang berikutnya
+        _tutup_pool()
+        return np.concatenate([_simulasi_chunk(suara, kursi, p, ambang) for p in potongan])
@@ -0,0 +1,141 @@
+"""
+Titik-dalam-poligon untuk reverse geocoding (murni NumPy, tanpa Django).
+
+Poligon semua wilayah satu level dikemas sekali menjadi array datar, bukan JSON yang di-parse
+ulang per query:
+  - x0, y0, x1, y1 (S,) : seluruh segmen batas (semua cincin, termasuk lubang),
+  - seg_ptr (N + 1,)    : segmen wilayah i = seg_ptr[i]..seg_ptr[i + 1],
+  - bbox (N, 4)         : [min_lon, min_lat, max_lon, max_lat] tiap wilayah,
+  - grid                : bbox tiap wilayah didaftarkan ke sel grid (CSR sel -> wilayah).
+
+Query batch (P titik sekaligus):
+  1. Sel grid tiap titik -> kandidat (titik, wilayah) dari CSR, disaring dengan bbox.
+  2. Ray casting ter-vektorisasi: segmen setiap kandidat dibentangkan (np.repeat), sinar ke
+     arah +lon dihitung persilangannya, lalu dijumlah per kandidat (np.bincount). Ganjil =
+     di dalam (aturan even-odd, sehingga lubang dan MultiPolygon tertangani). Dikerjakan per
+     blok BLOK_SEGMEN segmen agar memori tetap.
+  3. Bila satu titik jatuh di beberapa wilayah (poligon tumpang tindih), dipilih bbox terkecil.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+SEL_PER_WILAYAH = 1.0
+GRID_MAKS = 1 << 20
+BLOK_SEGMEN = 1 << 21
+
+# Grid: asal (2,), ukuran sel (2,), dimensi (nx, ny), ptr (nx*ny + 1,), wilayah (M,)
+Grid = namedtuple('Grid', 'asal ukuran nx ny ptr wilayah')
+IndeksPoligon = namedtuple('IndeksPoligon', 'x0 y0 x1 y1 seg_ptr bbox grid')
+
+
+def _rentang(awal, akhir):
+    """Gabungan arange(awal[i], akhir[i]) untuk semua i, plus indeks i pemiliknya."""
+    panjang = akhir - awal
+    pemilik = np.repeat(np.arange(len(awal)), panjang)
+    if not len(pemilik):
+        return pemilik, pemilik
+    geser = np.cumsum(panjang) - panjang
+    return np.arange(len(pemilik)) - np.repeat(geser, panjang) + np.repeat(awal, panjang), pemilik
+
+
+def _sel(grid, x, y):
+    """Indeks sel (ix, iy) titik, dipotong ke tepi grid."""
+    ix = np.clip(np.floor((x - grid.asal[0]) / grid.ukuran[0]).astype(np.int64), 0, grid.nx - 1)
+    iy = np.clip(np.floor((y - grid.asal[1]) / grid.ukuran[1]).astype(np.int64), 0, grid.ny - 1)
+    return ix, iy
+
+
+def _grid(bbox):
+    asal = bbox[:, :2].min(axis=0)
+    luas = np.maximum(bbox[:, 2:].max(axis=0) - asal, 1e-9)
+    # Sel kira-kira seukuran bbox rata-rata: satu titik hanya memeriksa segelintir wilayah
+    rata = np.maximum(np.median(bbox[:, 2:] - bbox[:, :2], axis=0) / SEL_PER_WILAYAH, 1e-9)
+    n = np.minimum(np.ceil(luas / rata), np.sqrt(GRID_MAKS)).astype(np.int64).clip(1)
+    nx, ny = int(n[0]), int(n[1])
+    grid = Grid(asal, luas / n, nx, ny, None, None)
+
+    ix0, iy0 = _sel(grid, bbox[:, 0], bbox[:, 1])
+    ix1, iy1 = _sel(grid, bbox[:, 2], bbox[:, 3])
+    kolom, wilayah = _rentang(ix0, ix1 + 1)
+    baris_awal, baris_akhir = iy0[wilayah], iy1[wilayah] + 1
+    baris, pasangan = _rentang(baris_awal, baris_akhir)
+    sel = baris * nx + kolom[pasangan]
+    wilayah = wilayah[pasangan]
+    urut = np.argsort(sel, kind='stable')
+    ptr = np.concatenate([[0], np.cumsum(np.bincount(sel, minlength=nx * ny))])
+    return grid._replace(ptr=ptr, wilayah=wilayah[urut])
+
+
+def kemas(cincin_per_wilayah):
+    """IndeksPoligon dari [[cincin (n, 2) lon/lat] per wilayah] (lihat core.spasial.cincin_geojson)."""
+    p0, p1, jumlah = [], [], []
+    bbox = np.zeros((len(cincin_per_wilayah), 4))
+    for i, cincin in enumerate(cincin_per_wilayah):
+        # Cincin ditutup bila titik terakhir != titik pertama
+        cincin = [c if np.array_equal(c[0], c[-1]) else np.vstack([c, c[:1]]) for c in cincin]
+        p0.extend(c[:-1] for c in cincin)
+        p1.extend(c[1:] for c in cincin)
+        jumlah.append(sum(len(c) - 1 for c in cincin))
+        semua = np.concatenate(cincin) if cincin else np.zeros((1, 2))
+        bbox[i] = np.concatenate([semua.min(axis=0), semua.max(axis=0)])
+    p0 = np.concatenate(p0) if p0 else np.zeros((0, 2))
+    p1 = np.concatenate(p1) if p1 else np.zeros((0, 2))
+    seg_ptr = np.concatenate([[0], np.cumsum(jumlah, dtype=np.int64)])
+    grid = _grid(bbox) if len(bbox) else None
+    return IndeksPoligon(p0[:, 0].copy(), p0[:, 1].copy(), p1[:, 0].copy(), p1[:, 1].copy(), seg_ptr, bbox, grid)
+
+
+def _di_dalam(indeks, px, py, titik, wilayah):
+    """Boolean (K,) apakah titik[k] di dalam wilayah[k] (ray casting even-odd)."""
+    awal, akhir = indeks.seg_ptr[wilayah], indeks.seg_ptr[wilayah + 1]
+    silang = np.zeros(len(titik), dtype=np.int64)
+    # Blok kandidat sehingga jumlah segmen yang dibentangkan <= BLOK_SEGMEN
+    kumulatif = np.cumsum(akhir - awal)
+    mulai = 0
+    while mulai < len(titik):
+        batas = kumulatif[mulai - 1] if mulai else 0
+        selesai = max(int(np.searchsorted(kumulatif, batas + BLOK_SEGMEN, side='right')), mulai + 1)
+        seg, k = _rentang(awal[mulai:selesai], akhir[mulai:selesai])
+        x, y = px[titik[mulai:selesai]][k], py[titik[mulai:selesai]][k]
+        x0, y0, x1, y1 = indeks.x0[seg], indeks.y0[seg], indeks.x1[seg], indeks.y1[seg]
+        lintas = (y0 > y) != (y1 > y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            xs = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        kena = lintas & (x < xs)
+        silang[mulai:selesai] = np.bincount(k[kena], minlength=selesai - mulai)
+        mulai = selesai
+    return silang % 2 == 1
+
+
+def cari(indeks, lon, lat):
+    """Indeks wilayah (P,) yang memuat tiap titik (lon, lat), -1 bila tidak ada."""
+    px = np.asarray(lon, dtype=np.float64).ravel()
+    py = np.asarray(lat, dtype=np.float64).ravel()
+    hasil = np.full(len(px), -1, dtype=np.int64)
+    grid = indeks.grid
+    if grid is None or not len(px):
+        return hasil
+
+    # 1. Kandidat dari sel grid (titik di luar grid / tidak berhingga dibuang)
+    sah = np.isfinite(px) & np.isfinite(py)
+    sah &= (px >= grid.asal[0]) & (py >= grid.asal[1])
+    sah &= (px <= grid.asal[0] + grid.ukuran[0] * grid.nx) & (py <= grid.asal[1] + grid.ukuran[1] * grid.ny)
+    ix, iy = _sel(grid, np.where(sah, px, grid.asal[0]), np.where(sah, py, grid.asal[1]))
+    sel = np.where(sah, iy * grid.nx + ix, 0)
+    posisi, titik = _rentang(grid.ptr[sel] * sah, grid.ptr[sel + 1] * sah)
+    wilayah = grid.wilayah[posisi]
+
+    # 2. Saring bbox, lalu ray casting
+    b = indeks.bbox[wilayah]
+    masuk = (px[titik] >= b[:, 0]) & (px[titik] <= b[:, 2]) & (py[titik] >= b[:, 1]) & (py[titik] <= b[:, 3])
+    titik, wilayah = titik[masuk], wilayah[masuk]
+    dalam = _di_dalam(indeks, px, py, titik, wilayah)
+    titik, wilayah = titik[dalam], wilayah[dalam]
+
+    # 3. Tumpang tindih: per titik ambil wilayah dengan bbox terkecil
+    bb = indeks.bbox[wilayah]
+    urut = np.lexsort(((bb[:, 2] - bb[:, 0]) * (bb[:, 3] - bb[:, 1]), titik))
+    titik, pertama = np.unique(titik[urut], return_index=True)
+    hasil[titik] = wilayah[urut][pertama]
+    return hasil
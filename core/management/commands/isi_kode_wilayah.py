@@ -0,0 +1,138 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from core.matcher import RegionIndex
+from core.models import KabupatenKota, Kecamatan, KelurahanDesa
+from core.versioning import bump_data_version
+
+# Panjang kode Kemendagri tanpa titik per level
+LEVEL_KAB, LEVEL_KEC, LEVEL_DESA = 4, 6, 10
+NAMA_LEVEL = {LEVEL_KAB: 'kabupaten', LEVEL_KEC: 'kecamatan', LEVEL_DESA: 'desa'}
+INDUK = {LEVEL_KAB: 0, LEVEL_KEC: LEVEL_KAB, LEVEL_DESA: LEVEL_KEC}
+
+
+class Command(BaseCommand):
+    help = (
+        "Isi kode wilayah Kemendagri (materialized path) pada Kabupaten/Kota, Kecamatan dan Kel/Desa "
+        "dari file referensi CSV berisi kolom kode,nama (kode boleh bertitik, mis. 32.01.01.2001)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="CSV referensi kode wilayah (kode,nama)")
+        parser.add_argument('--provinsi', help="Batasi ke kode provinsi tertentu, mis. 32")
+        parser.add_argument('--timpa', action='store_true', help="Timpa kode yang sudah terisi")
+        parser.add_argument('--dry-run', action='store_true', help="Tampilkan hasil pencocokan tanpa menyimpan")
+
+    def _baca_referensi(self, path, provinsi):
+        ref = {LEVEL_KAB: {}, LEVEL_KEC: {}, LEVEL_DESA: {}}
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as fh:
+                for row in csv.reader(fh):
+                    if len(row) < 2:
+                        continue
+                    kode = row[0].replace('.', '').strip()
+                    if not kode.isdigit() or len(kode) not in ref:
+                        continue
+                    if provinsi and not kode.startswith(provinsi):
+                        continue
+                    ref[len(kode)][kode] = row[1].strip()
+        except OSError as e:
+            raise CommandError(f"Gagal membaca {path}: {e}")
+        # Indeks nama referensi per level, dibatasi ke kode induknya (core.matcher)
+        return {
+            level: RegionIndex(((kode, nama, kode[:INDUK[level]] or None) for kode, nama in rows.items()), NAMA_LEVEL[level])
+            for level, rows in ref.items()
+        }
+
+    def _cocokkan(self, objs, index, kode_induk=None):
+        """
+        Pasangkan objek wilayah dengan kode referensi di bawah `kode_induk` (nama ternormalisasi,
+        fuzzy bila tidak persis). Nama ambigu dalam satu induk dilewati dan dilaporkan.
+        """
+        cocok, gagal = {}, []
+        for obj in objs:
+            m = index.match(obj.nama, kode_induk)
+            if m.id is not None:
+                cocok[obj] = m.id
+            else:
+                gagal.append(obj)
+        # Satu kode tidak boleh dipakai dua baris (data ganda di database)
+        dipakai = {}
+        for obj, kode in cocok.items():
+            dipakai.setdefault(kode, []).append(obj)
+        for objs in dipakai.values():
+            if len(objs) > 1:
+                for obj in objs:
+                    del cocok[obj]
+                gagal += objs
+        return cocok, gagal
+
+    def handle(self, *args, **opts):
+        provinsi = (opts['provinsi'] or '').replace('.', '')
+        ref = self._baca_referensi(opts['file'], provinsi)
+        timpa = opts['timpa']
+        hasil = {}
+
+        # 1. Kabupaten/Kota: "KAB. BOGOR" juga cocok dengan "BOGOR"; KAB/KOTA memecah nama kembar
+        kabs = list(KabupatenKota.objects.all())
+        cocok, gagal = self._cocokkan([k for k in kabs if timpa or not k.kode], ref[LEVEL_KAB])
+        hasil[KabupatenKota] = (cocok, gagal)
+        kode_kab = {k.pk: cocok.get(k, k.kode) for k in kabs}
+
+        # 2. Kecamatan, dicocokkan hanya di bawah kode kabupaten induknya
+        kecs = list(Kecamatan.objects.all())
+        cocok_kec, gagal_kec = {}, []
+        per_kab = {}
+        for kec in kecs:
+            if timpa or not kec.kode:
+                per_kab.setdefault(kec.kabupaten_kota_id, []).append(kec)
+        for kab_id, objs in per_kab.items():
+            if not kode_kab.get(kab_id):
+                gagal_kec += objs
+                continue
+            c, g = self._cocokkan(objs, ref[LEVEL_KEC], kode_kab[kab_id])
+            cocok_kec.update(c)
+            gagal_kec += g
+        hasil[Kecamatan] = (cocok_kec, gagal_kec)
+        kode_kec = {k.pk: cocok_kec.get(k, k.kode) for k in kecs}
+
+        # 3. Kelurahan/Desa di bawah kode kecamatan induknya
+        cocok_desa, gagal_desa = {}, []
+        per_kec = {}
+        for desa in KelurahanDesa.objects.all().iterator():
+            if timpa or not desa.kode:
+                per_kec.setdefault(desa.kecamatan_id, []).append(desa)
+        for kec_id, objs in per_kec.items():
+            if not kode_kec.get(kec_id):
+                gagal_desa += objs
+                continue
+            c, g = self._cocokkan(objs, ref[LEVEL_DESA], kode_kec[kec_id])
+            cocok_desa.update(c)
+            gagal_desa += g
+        hasil[KelurahanDesa] = (cocok_desa, gagal_desa)
+
+        for model, (cocok, gagal) in hasil.items():
+            self.stdout.write(f"{model._meta.verbose_name}: {len(cocok)} cocok, {len(gagal)} tidak cocok")
+            if opts['verbosity'] >= 2:
+                for obj in gagal:
+                    self.stdout.write(f"  - {obj.nama} (id={obj.pk})")
+
+        if opts['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: tidak ada yang disimpan."))
+            return
+
+        try:
+            with transaction.atomic():
+                for model, (cocok, _) in hasil.items():
+                    if timpa:
+                        # Kosongkan dulu agar pertukaran kode antar baris tidak bentrok unique
+                        model.objects.filter(pk__in=[o.pk for o in cocok]).update(kode=None)
+                    for obj, kode in cocok.items():
+                        obj.kode = kode
+                    model.objects.bulk_update(list(cocok), ['kode'], batch_size=500)
+                bump_data_version(KabupatenKota, Kecamatan, KelurahanDesa)
+        except IntegrityError as e:
+            raise CommandError(f"Kode bentrok dengan kode yang sudah terisi ({e}). Jalankan ulang dengan --timpa.")
+        self.stdout.write(self.style.SUCCESS("Kode wilayah tersimpan."))
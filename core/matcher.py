@@ -0,0 +1,262 @@
+"""
+Pencocokan nama wilayah (fuzzy) lewat indeks in-memory.
+
+Nama dinormalisasi (huruf besar, tanpa tanda baca & spasi, awalan "KAB."/"KOTA"/"KEC."/"DESA"
+dibuang) lalu diindeks per induk wilayah. Pencarian: kunci persis -> trigram + edit distance.
+Hasil selalu deterministik: kandidat diurut (skor turun, nama, id), dan nama yang
+tidak bisa dibedakan dilaporkan sebagai ambigu, bukan ditebak.
+
+Indeks wilayah dibangun dari cache referensi (core.refdata) sekali per versi data wilayah.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from .refdata import get_wilayah, wilayah_cache
+
+# Awalan yang dibuang per level; jenis (KAB/KOTA) tetap disimpan untuk memecah nama kembar
+_AWALAN = {
+    'kabupaten': re.compile(r'^(KABUPATEN|KAB|KOTA ADMINISTRASI|KOTA ADM|KOTA)\b'),
+    'kecamatan': re.compile(r'^(KECAMATAN|KEC)\b'),
+    'desa': re.compile(r'^(KELURAHAN|KEL|DESA|DS)\b'),
+}
+
+EXACT, FUZZY, AMBIGUOUS, NONE = 'exact', 'fuzzy', 'ambiguous', 'none'
+
+Match = namedtuple('Match', 'id score status candidates')
+
+
+def normalisasi(nama, level=None):
+    """
+    (kunci, jenis): 'Kab. Bandung  Barat' -> ('BANDUNGBARAT', 'KAB').
+    Kunci tanpa spasi agar 'KOTABARU' == 'KOTA BARU'.
+    """
+    s = ' '.join(re.sub(r'[^A-Z0-9 ]', ' ', str(nama or '').upper()).split())
+    jenis = None
+    pola = _AWALAN.get(level)
+    if pola:
+        m = pola.match(s)
+        # Nama yang isinya hanya awalan (mis. kecamatan "KOTA") tidak dipotong
+        if m and s[m.end():].strip():
+            jenis = 'KOTA' if m.group(1).startswith('KOTA') else 'KAB' if m.group(1).startswith('KAB') else None
+            s = s[m.end():]
+    return s.replace(' ', ''), jenis
+
+
+def _trigram(key):
+    padded = f'${key}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _rasio_edit(a, b):
+    """1 - levenshtein(a, b) / max(len): 1.0 = identik."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return 1 - prev[-1] / max(len(a), len(b))
+
+
+class RegionIndex:
+    """
+    Indeks nama wilayah satu level. `entries`: iterable (id, nama, parent_id).
+    Semua lookup bisa dibatasi ke satu induk (parent_id), mis. kecamatan di satu kabupaten.
+    """
+
+    # Kandidat trigram yang dinilai ulang dengan edit distance
+    SHORTLIST = 25
+    # Selisih skor di bawah ini dianggap seri (ambigu)
+    TIE = 0.02
+
+    def __init__(self, entries, level=None):
+        self.level = level
+        self._entry = {}        # id -> (kunci, jenis, parent_id, nama asli)
+        self._exact = {}        # (parent_id, kunci) & (None, kunci) -> [id]
+        self._by_parent = {}    # parent_id -> [id]
+        self._trigrams = {}     # trigram -> set(id)
+        sorted_keys = []
+        for pk, nama, parent_id in entries:
+            key, jenis = normalisasi(nama, level)
+            self._entry[pk] = (key, jenis, parent_id, nama)
+            self._exact.setdefault((parent_id, key), []).append(pk)
+            if parent_id is not None:
+                self._exact.setdefault((None, key), []).append(pk)
+            self._by_parent.setdefault(parent_id, []).append(pk)
+            for t in _trigram(key):
+                self._trigrams.setdefault(t, set()).add(pk)
+            sorted_keys.append((key, pk))
+        sorted_keys.sort()
+        self._sorted = sorted_keys
+        self._sorted_keys = [k for k, _ in sorted_keys]
+
+    def __len__(self):
+        return len(self._entry)
+
+    def nama(self, pk):
+        return self._entry[pk][3]
+
+    def _order(self, scored):
+        return sorted(scored, key=lambda s: (-s[1], self._entry[s[0]][0], s[0]))
+
+    def _konflik_jenis(self, pk, jenis):
+        # "KOTA BOGOR" tidak pernah cocok dengan "KAB. BOGOR"
+        return bool(jenis and self._entry[pk][1] and self._entry[pk][1] != jenis)
+
+    def _pilih_jenis(self, ids, jenis):
+        # Tanpa jenis di salah satu sisi, kandidat berjenis sama didahulukan untuk memecah seri
+        if not jenis:
+            return ids
+        ids = [i for i in ids if not self._konflik_jenis(i, jenis)]
+        sama = [i for i in ids if self._entry[i][1] == jenis]
+        return sama if len(ids) > 1 and sama else ids
+
+    def _in_scope(self, parent_id):
+        if parent_id is None:
+            return None
+        return set(self._by_parent.get(parent_id, ()))
+
+    def _fuzzy_candidates(self, key, parent_id):
+        scope = self._in_scope(parent_id)
+        if scope is not None and len(scope) <= self.SHORTLIST * 4:
+            # Induk kecil: nilai semua anaknya
+            return scope
+        counts = {}
+        for t in _trigram(key):
+            for pk in self._trigrams.get(t, ()):
+                if scope is None or pk in scope:
+                    counts[pk] = counts.get(pk, 0) + 1
+        ranked = sorted(counts.items(), key=lambda c: (-c[1], self._entry[c[0]][0], c[0]))
+        return [pk for pk, _ in ranked[:self.SHORTLIST]]
+
+    def match(self, nama, parent_id=None, cutoff=0.8):
+        """
+        Cocokkan satu nama. Match.status:
+          exact     - kunci ternormalisasi persis (satu kandidat)
+          fuzzy     - kandidat terbaik >= cutoff dan tidak seri
+          ambiguous - beberapa kandidat dengan skor sama (lihat Match.candidates)
+          none      - tidak ada kandidat >= cutoff
+        """
+        key, jenis = normalisasi(nama, self.level)
+        if not key:
+            return Match(None, 0.0, NONE, ())
+        ids = self._pilih_jenis(self._exact.get((parent_id, key), []), jenis)
+        if len(ids) == 1:
+            return Match(ids[0], 1.0, EXACT, ((ids[0], 1.0),))
+        if ids:
+            return Match(None, 1.0, AMBIGUOUS, tuple(self._order([(i, 1.0) for i in ids])))
+
+        scored = self._order([
+            (pk, round(_rasio_edit(key, self._entry[pk][0]), 4))
+            for pk in self._fuzzy_candidates(key, parent_id)
+        ])
+        scored = [s for s in scored if s[1] >= cutoff and not self._konflik_jenis(s[0], jenis)]
+        if not scored:
+            return Match(None, 0.0, NONE, ())
+        best = scored[0][1]
+        tied = [s for s in scored if best - s[1] < self.TIE]
+        tied_ids = self._pilih_jenis([pk for pk, _ in tied], jenis)
+        if len(tied_ids) == 1:
+            return Match(tied_ids[0], best, FUZZY, tuple(scored[:5]))
+        return Match(None, best, AMBIGUOUS, tuple(s for s in tied if s[0] in tied_ids))
+
+    def search(self, term, parent_id=None, limit=20, fuzzy=True):
+        """
+        Id untuk autocomplete, urut: kunci persis, awalan, mengandung; fuzzy hanya bila semuanya kosong.
+        Awalan via bisect di kunci terurut; 'mengandung' via irisan posting trigram.
+        Filter `parent_id` diterapkan sebelum batas `limit`, jadi hasil terbatas tidak pernah terpotong scope.
+        """
+        key, _ = normalisasi(term, self.level)
+        if not key:
+            return []
+        scope = self._in_scope(parent_id)
+        ok = (lambda pk: True) if scope is None else scope.__contains__
+        result, seen = [], set()
+
+        def add(pks):
+            for pk in pks:
+                if pk not in seen and ok(pk):
+                    seen.add(pk)
+                    result.append(pk)
+
+        add(sorted(self._exact.get((parent_id, key), [])))
+        # Awalan: filter induk diterapkan per kandidat, batas dihitung dari hasil yang lolos
+        i = bisect_left(self._sorted_keys, key)
+        while i < len(self._sorted) and self._sorted_keys[i].startswith(key) and len(result) < limit:
+            add((self._sorted[i][1],))
+            i += 1
+        if len(result) < limit and len(key) >= 3:
+            # Kandidat 'mengandung' = punya semua trigram dalam term (tanpa padding)
+            posting = [self._trigrams.get(key[j:j + 3], set()) for j in range(len(key) - 2)]
+            common = set.intersection(*posting)
+            add(sorted((pk for pk in common if key in self._entry[pk][0]), key=lambda pk: (self._entry[pk][0], pk)))
+        if fuzzy and not result:
+            m = self.match(term, parent_id, cutoff=0.6)
+            add(pk for pk, _ in m.candidates)
+        return result[:limit]
+
+    def laporan(self, nama, match):
+        """Pesan deterministik untuk hasil yang tidak bisa dipakai (ambigu / tidak ditemukan)."""
+        if match.status == AMBIGUOUS:
+            daftar = ', '.join(f"{self._entry[pk][3]} (id={pk}, skor {score:.2f})" for pk, score in match.candidates)
+            return f"'{nama}' ambigu: {daftar}"
+        return f"'{nama}' tidak ditemukan"
+
+
+# ==============================================================================
+# INDEKS WILAYAH (DARI CACHE REFERENSI)
+# ==============================================================================
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def _build(level):
+    w = get_wilayah()
+    if level == 'kabupaten':
+        entries = ((k.id, k.nama, None) for k in w.kabupaten.values())
+    elif level == 'kecamatan':
+        entries = ((k.id, k.nama, k.kabupaten_id) for k in w.kecamatan.values())
+    else:
+        entries = ((d.id, d.nama, d.kecamatan_id) for d in w.desa.values())
+    return RegionIndex(entries, level)
+
+
+def get_region_index(level):
+    """RegionIndex untuk 'kabupaten' / 'kecamatan' / 'desa', dibangun sekali per versi data wilayah."""
+    version = wilayah_cache.version
+    idx = _indexes.get((level, version))
+    if idx is None:
+        idx = _build(level)
+        with _lock:
+            if wilayah_cache.version == version:
+                for old in [k for k in _indexes if k[1] != version]:
+                    del _indexes[old]
+                _indexes[(level, version)] = idx
+    return idx
+
+
+def cocokkan_kecamatan(nama_kecamatan, nama_kabupaten=None):
+    """
+    Resolusi kecamatan dari pasangan nama (mis. baris Excel / properti GeoJSON).
+    Bila nama kabupaten diberikan, pencarian kecamatan dibatasi ke kabupaten itu.
+    Mengembalikan (Match, pesan error atau None).
+    """
+    kec_index = get_region_index('kecamatan')
+    parent_id = None
+    if nama_kabupaten:
+        kab_index = get_region_index('kabupaten')
+        kab = kab_index.match(nama_kabupaten)
+        if kab.id is None:
+            return kab, f"Kabupaten {kab_index.laporan(nama_kabupaten, kab)}"
+        parent_id = kab.id
+    m = kec_index.match(nama_kecamatan, parent_id)
+    if m.id is None:
+        return m, f"Kecamatan {kec_index.laporan(nama_kecamatan, m)}"
+    return m, None
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-19 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_tpsdptpemilu_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(max_length=100, unique=True, verbose_name='Domain Data')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versi')),
+            ],
+            options={
+                'verbose_name': 'Versi Data',
+                'verbose_name_plural': 'Versi Data',
+            },
+        ),
+    ]
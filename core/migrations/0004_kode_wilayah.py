@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 01:33
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kabupatenkota',
+            name='kode',
+            field=models.CharField(blank=True, help_text='Kode Kemendagri 4 digit, contoh: 3201', max_length=4, null=True, unique=True, validators=[django.core.validators.RegexValidator('^\\d+$', 'Kode wilayah hanya berisi angka (tanpa titik).')], verbose_name='Kode Wilayah'),
+        ),
+        migrations.AddField(
+            model_name='kecamatan',
+            name='kode',
+            field=models.CharField(blank=True, help_text='Kode Kemendagri 6 digit, contoh: 320101', max_length=6, null=True, unique=True, validators=[django.core.validators.RegexValidator('^\\d+$', 'Kode wilayah hanya berisi angka (tanpa titik).')], verbose_name='Kode Wilayah'),
+        ),
+        migrations.AddField(
+            model_name='kelurahandesa',
+            name='kode',
+            field=models.CharField(blank=True, help_text='Kode Kemendagri 10 digit, contoh: 3201012001', max_length=10, null=True, unique=True, validators=[django.core.validators.RegexValidator('^\\d+$', 'Kode wilayah hanya berisi angka (tanpa titik).')], verbose_name='Kode Wilayah'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import Q
 
 # ==============================================================================
 # MASTER DATA: PARTAI POLITIK
@@ -43,12 +45,45 @@ class Partai(models.Model):
 # ==============================================================================
 # DATA WILAYAH & GEOGRAFI
 # ==============================================================================
+# Kode wilayah Kemendagri (dipakai KPU) disimpan tanpa titik sebagai materialized path:
+# Kab/Kota 4 digit (3201), Kecamatan 6 digit (320101), Kel/Desa 10 digit (3201012001).
+# Kode anak selalu diawali kode induknya, sehingga "semua wilayah di bawah X"
+# cukup satu range scan indeks: kode >= '3201' AND kode < '3202'.
+
+kode_validator = RegexValidator(r'^\d+$', "Kode wilayah hanya berisi angka (tanpa titik).")
+
+
+def kode_range(kode, field='kode'):
+    """Q range indeks untuk kode `kode` beserta seluruh turunannya."""
+    # Batas atas = prefix dengan karakter terakhir dinaikkan ('32' -> '33', '99' -> '9:'),
+    # bukan angka + 1 yang memanjang untuk kode serba-9 ('100' < '99' secara string)
+    upper = kode[:-1] + chr(ord(kode[-1]) + 1)
+    return Q(**{f'{field}__gte': kode, f'{field}__lt': upper})
+
+
+class WilayahQuerySet(models.QuerySet):
+    def under(self, *kodes, field='kode'):
+        """Wilayah yang berada di bawah salah satu `kodes` (mis. semua kab/kota satu dapil)."""
+        q = Q()
+        for kode in kodes:
+            q |= kode_range(kode, field)
+        return self.filter(q) if kodes else self.none()
+
 
 class KabupatenKota(models.Model):
     """
     Menyimpan data Kabupaten atau Kota.
     Terhubung langsung ke Dapil RI dan Dapil Provinsi.
     """
+    kode = models.CharField(
+        max_length=4,
+        unique=True,
+        null=True,
+        blank=True,
+        validators=[kode_validator],
+        verbose_name="Kode Wilayah",
+        help_text="Kode Kemendagri 4 digit, contoh: 3201"
+    )
     nama = models.CharField(
         max_length=200, 
         verbose_name="Nama Kabupaten/Kota", 
@@ -73,6 +108,8 @@ class KabupatenKota(models.Model):
         verbose_name="Dapil Provinsi"
     )
 
+    objects = WilayahQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Kabupaten/Kota"
         verbose_name_plural = "Data Kabupaten/Kota"
@@ -102,12 +139,23 @@ class Kecamatan(models.Model):
         db_index=True,
         verbose_name="Dapil Kab/Kota"
     )
+    kode = models.CharField(
+        max_length=6,
+        unique=True,
+        null=True,
+        blank=True,
+        validators=[kode_validator],
+        verbose_name="Kode Wilayah",
+        help_text="Kode Kemendagri 6 digit, contoh: 320101"
+    )
     nama = models.CharField(
         max_length=200, 
         verbose_name="Nama Kecamatan", 
         db_index=True
     )
 
+    objects = WilayahQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Kecamatan"
         verbose_name_plural = "Data Kecamatan"
@@ -139,12 +187,23 @@ class KelurahanDesa(models.Model):
         db_index=True,
         verbose_name="Dapil Kab/Kota"
     )
+    kode = models.CharField(
+        max_length=10,
+        unique=True,
+        null=True,
+        blank=True,
+        validators=[kode_validator],
+        verbose_name="Kode Wilayah",
+        help_text="Kode Kemendagri 10 digit, contoh: 3201012001"
+    )
     nama = models.CharField(
         max_length=200, 
         verbose_name="Nama Kelurahan/Desa", 
         db_index=True
     )
 
+    objects = WilayahQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Kelurahan/Desa"
         verbose_name_plural = "Data Kelurahan/Desa"
@@ -258,3 +317,24 @@ class TPSDPTPilkada(models.Model):
 
     def __str__(self):
         return f"TPS/DPT Pilkada - {self.kecamatan.nama}"
+
+
+# ==============================================================================
+# VERSI DATA (INVALIDASI CACHE LINTAS WORKER)
+# ==============================================================================
+
+class DataVersion(models.Model):
+    """
+    Nomor versi per domain data (label model, mis. 'pilegri_2024.detailsuaracaleg').
+    Naik setiap ada perubahan data; dibaca setiap worker sekali per request
+    untuk membuang cache lokal yang sudah basi (lihat core.versioning).
+    """
+    domain = models.CharField(max_length=100, unique=True, verbose_name="Domain Data")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versi")
+
+    class Meta:
+        verbose_name = "Versi Data"
+        verbose_name_plural = "Versi Data"
+
+    def __str__(self):
+        return f"{self.domain} v{self.version}"
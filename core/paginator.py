@@ -0,0 +1,226 @@
+import threading
+
+from django.contrib.admin.utils import get_fields_from_path
+from django.contrib.admin.views.main import ChangeList, ALL_VAR, ORDER_VAR, PAGE_VAR
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator, Page, InvalidPage
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .versioning import data_version
+
+# ==============================================================================
+# CACHE COUNT
+# ==============================================================================
+# Kunci cache memuat versi data model terkait (core.versioning), jadi entri lama
+# otomatis tidak terpakai setelah ada perubahan di worker mana pun.
+
+_lock = threading.Lock()
+_count_cache = {}
+_boundary_cache = {}
+_CACHE_MAX = 2000
+
+
+def _cache_get(store, key):
+    return store.get(key)
+
+
+def _cache_set(store, key, value):
+    with _lock:
+        if len(store) >= _CACHE_MAX:
+            store.clear()
+        store[key] = value
+
+
+# ==============================================================================
+# PAGINATOR: COUNT DI TABEL DASAR + KEYSET
+# ==============================================================================
+
+class BareCountPaginator(Paginator):
+    """
+    Paginator untuk changelist yang queryset-nya penuh anotasi berat (with_totals, subquery per partai).
+
+    - COUNT dijalankan di `bare_queryset` (tabel dasar + filter yang sama, tanpa anotasi)
+      dan di-cache per kombinasi filter + versi data.
+    - Jika urutan hanya memakai kolom tabel dasar (bukan anotasi), PK halaman dicari di tabel
+      dasar lalu anotasi berat hanya dihitung untuk PK di halaman itu. Bila semua kolom urut
+      NOT NULL, pencarian memakai keyset (WHERE kunci > batas halaman sebelumnya); halaman
+      acak tanpa batas tersimpan memakai OFFSET (tetap tanpa anotasi).
+    """
+
+    def __init__(self, object_list, per_page, bare_queryset=None, cache_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.bare_queryset = bare_queryset
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if self.bare_queryset is None:
+            return super().count
+        count = _cache_get(_count_cache, self.cache_key) if self.cache_key else None
+        if count is None:
+            count = self.bare_queryset.order_by().count()
+            if self.cache_key:
+                _cache_set(_count_cache, self.cache_key, count)
+        return count
+
+    @cached_property
+    def keyset_fields(self):
+        """Daftar (field, descending) bila urutan bisa dijalankan di tabel dasar, selain itu None."""
+        if self.bare_queryset is None:
+            return None
+        ordering = self.object_list.query.order_by
+        if not ordering:
+            return None
+        model = self.bare_queryset.model
+        result = []
+        self.keyset_safe = True
+        for item in ordering:
+            if not isinstance(item, str) or item == '?':
+                return None
+            desc = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = model._meta.pk.name
+            try:
+                path = get_fields_from_path(model, name)
+            except Exception:
+                return None
+            if path[-1].is_relation:
+                return None
+            # Keyset hanya valid bila semua field di jalur relasi NOT NULL
+            if any(getattr(f, 'null', True) for f in path):
+                self.keyset_safe = False
+            result.append((name, desc))
+        if not any(name == model._meta.pk.name for name, _ in result):
+            result.append((model._meta.pk.name, False))
+        return result
+
+    def _after(self, boundary):
+        """Q untuk baris sesudah `boundary` sesuai urutan (a, b, c) campuran ASC/DESC."""
+        q = Q()
+        for i, (name, desc) in enumerate(self.keyset_fields):
+            cond = Q(**{f"{name}__{'lt' if desc else 'gt'}": boundary[i]})
+            for j, (prev_name, _) in enumerate(self.keyset_fields[:i]):
+                cond &= Q(**{prev_name: boundary[j]})
+            q |= cond
+        return q
+
+    def _field_index(self, name):
+        return [n for n, _ in self.keyset_fields].index(name)
+
+    def _page_pks(self, number, bottom):
+        names = [n for n, _ in self.keyset_fields]
+        ordered = self.bare_queryset.order_by(*[('-' if d else '') + n for n, d in self.keyset_fields])
+        boundaries_key = self.cache_key + (tuple(names), tuple(d for _, d in self.keyset_fields))
+        boundaries = _cache_get(_boundary_cache, boundaries_key) or {}
+        if number == 1:
+            rows = ordered[:self.per_page]
+        elif self.keyset_safe and number - 1 in boundaries:
+            rows = ordered.filter(self._after(boundaries[number - 1]))[:self.per_page]
+        else:
+            rows = ordered[bottom:bottom + self.per_page]
+        rows = list(rows.values_list(*names))
+        if rows:
+            boundaries = {**boundaries, number: rows[-1]}
+            _cache_set(_boundary_cache, boundaries_key, boundaries)
+        pk_index = self._field_index(self.bare_queryset.model._meta.pk.name)
+        return [r[pk_index] for r in rows]
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if self.keyset_fields is None or self.cache_key is None:
+            return super().page(number)
+        pks = self._page_pks(number, bottom)
+        # Anotasi berat hanya dihitung untuk baris di halaman ini
+        objs = {o.pk: o for o in self.object_list.filter(pk__in=pks)}
+        return Page([objs[pk] for pk in pks if pk in objs], number, self)
+
+
+class BareCountChangeList(ChangeList):
+    """ChangeList yang menghitung & memaginasi lewat tabel dasar (lihat BareCountPaginator)."""
+
+    _bare_mode = False
+
+    def get_ordering(self, request, queryset):
+        # Urutan changelist bisa memakai anotasi yang tidak ada di tabel dasar
+        if self._bare_mode:
+            return []
+        return super().get_ordering(request, queryset)
+
+    def _bare_queryset(self, request):
+        # Terapkan filter/pencarian yang sama pada queryset dasar tanpa anotasi
+        root = self.root_queryset
+        self.root_queryset = self.model_admin.get_count_queryset(request)
+        self._bare_mode = True
+        try:
+            return self.get_queryset(request)
+        finally:
+            self.root_queryset = root
+            self._bare_mode = False
+
+    def _cache_key(self, request):
+        params = tuple(sorted(
+            (k, tuple(v)) for k, v in request.GET.lists() if k not in (PAGE_VAR, ORDER_VAR, ALL_VAR)
+        ))
+        admin_cls = type(self.model_admin)
+        return (admin_cls.__module__, admin_cls.__name__, params, data_version(*self.model_admin.get_count_models()))
+
+    def get_results(self, request):
+        bare = self._bare_queryset(request)
+        cache_key = self._cache_key(request)
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page, bare_queryset=bare, cache_key=cache_key
+        )
+        result_count = paginator.count
+
+        if self.model_admin.show_full_result_count:
+            full_key = cache_key[:2] + ((), cache_key[3])
+            full_result_count = _cache_get(_count_cache, full_key)
+            if full_result_count is None:
+                full_result_count = self.model_admin.get_count_queryset(request).count()
+                _cache_set(_count_cache, full_key, full_result_count)
+        else:
+            full_result_count = None
+        can_show_all = result_count <= self.list_max_show_all
+        multi_page = result_count > self.list_per_page
+
+        if (self.show_all and can_show_all) or not multi_page:
+            result_list = self.queryset._clone()
+        else:
+            try:
+                result_list = paginator.page(self.page_num).object_list
+            except InvalidPage:
+                raise IncorrectLookupParameters
+
+        self.result_count = result_count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = not self.show_full_result_count or bool(full_result_count)
+        self.full_result_count = full_result_count
+        self.result_list = result_list
+        self.can_show_all = can_show_all
+        self.multi_page = multi_page
+        self.paginator = paginator
+
+
+class BareCountAdminMixin:
+    """
+    Mixin ModelAdmin untuk changelist beranotasi berat.
+    Override get_count_queryset() bila tabel dasar bukan manager default model,
+    dan count_models bila filter/pencarian melewati model lain.
+    """
+    paginator = BareCountPaginator
+    count_models = ()
+
+    def get_changelist(self, request, **kwargs):
+        return BareCountChangeList
+
+    def get_count_queryset(self, request):
+        return self.model._default_manager.all()
+
+    def get_count_models(self):
+        return (self.model, *self.count_models)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return self.paginator(queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs)
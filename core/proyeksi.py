@@ -0,0 +1,96 @@
+"""
+Mesin proyeksi ala quick count dari hasil parsial (murni NumPy, tanpa Django).
+
+Setiap strata (kabupaten/kota) diproyeksikan dengan estimator rasio berbobot DPT:
+    suara_strata[p] = DPT_strata * sum(suara kecamatan masuk[p]) / sum(DPT kecamatan masuk)
+Strata yang belum punya kecamatan masuk memakai rasio gabungan semua strata yang sudah masuk.
+
+Selang kepercayaan dari bootstrap bertingkat: kecamatan diambil ulang (with replacement) di
+dalam strata masing-masing. Semua replikasi dihitung sekaligus: jumlah pengambilan tiap
+kecamatan per replikasi (B, N) dikalikan matriks [suara, DPT] per blok strata -> (B, strata, kolom).
+"""
+import numpy as np
+
+N_BOOT = 1000
+ALPHA = 0.05
+
+
+def _hitung_bobot(strata, n_boot, rng):
+    """Matriks (n_boot, N) jumlah terambilnya tiap kecamatan, resampling di dalam strata."""
+    n = len(strata)
+    urutan = np.argsort(strata, kind='stable')
+    s_urut = strata[urutan]
+    awal = np.searchsorted(s_urut, s_urut, side='left')
+    jumlah = np.searchsorted(s_urut, s_urut, side='right') - awal
+    # Posisi kolom j diganti kecamatan acak dari strata yang sama
+    pilih = awal + (rng.random((n_boot, n)) * jumlah).astype(np.int64)
+    flat = (np.arange(n_boot)[:, None] * n + urutan[pilih]).ravel()
+    return np.bincount(flat, minlength=n_boot * n).reshape(n_boot, n).astype(np.float64)
+
+
+def proyeksi(suara, dpt, strata, dpt_strata, n_boot=N_BOOT, seed=0):
+    """
+    Proyeksi suara per strata untuk estimasi titik dan setiap replikasi bootstrap.
+
+    suara      : (N, P) suara peserta di kecamatan yang sudah masuk
+    dpt        : (N,) DPT kecamatan tersebut (> 0)
+    strata     : (N,) indeks strata 0..H-1
+    dpt_strata : (H,) total DPT tiap strata, termasuk kecamatan yang belum masuk
+    Hasil      : (proj, masuk) dengan proj (1 + n_boot, H, P) (baris 0 = estimasi titik)
+                 dan masuk (H,) bool strata yang sudah punya data.
+    """
+    suara = np.asarray(suara, dtype=np.float64)
+    dpt = np.asarray(dpt, dtype=np.float64)
+    strata = np.asarray(strata, dtype=np.int64)
+    dpt_strata = np.asarray(dpt_strata, dtype=np.float64)
+    n, p = suara.shape
+    h = len(dpt_strata)
+    masuk = np.bincount(strata, minlength=h) > 0
+    if n == 0:
+        return np.zeros((1 + n_boot, h, p)), masuk
+
+    # Kolom per kecamatan di blok strata-nya: [suara..., dpt] -> (N, H * (P + 1))
+    nilai = np.concatenate([suara, dpt[:, None]], axis=1)
+    blok = np.zeros((n, h, p + 1))
+    blok[np.arange(n), strata] = nilai
+    blok = blok.reshape(n, h * (p + 1))
+
+    bobot = np.vstack([np.ones((1, n)), _hitung_bobot(strata, n_boot, np.random.default_rng(seed))])
+    total = (bobot @ blok).reshape(1 + n_boot, h, p + 1)
+    v, d = total[..., :p], total[..., p]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rasio = np.where(d[..., None] > 0, v / np.where(d > 0, d, 1)[..., None], 0.0)
+        gabungan = v.sum(axis=1) / np.maximum(d.sum(axis=1), 1)[:, None]          # (B+1, P)
+    rasio = np.where(masuk[None, :, None], rasio, gabungan[:, None, :])
+    return rasio * dpt_strata[None, :, None], masuk
+
+
+def ringkasan_share(proj, alpha=ALPHA):
+    """
+    Share peserta dari proyeksi suara (B+1, P): (titik, bawah, atas) masing-masing (P,),
+    bawah/atas = persentil alpha/2 dan 1-alpha/2 dari replikasi bootstrap.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.nan_to_num(proj / proj.sum(axis=-1, keepdims=True))
+    boot = share[1:] if len(share) > 1 else share
+    bawah, atas = np.percentile(boot, [alpha / 2 * 100, (1 - alpha / 2) * 100], axis=0)
+    return share[0], bawah, atas
+
+
+def ringkasan_pemenang(proj, alpha=ALPHA):
+    """
+    Pemenang proyeksi dari (B+1, P): (indeks pemenang, runner-up, margin titik, margin bawah,
+    margin atas, peluang menang) — margin = share pemenang - share runner-up.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.nan_to_num(proj / proj.sum(axis=-1, keepdims=True))
+    if share.shape[-1] < 2:
+        return 0, None, 1.0, 1.0, 1.0, 1.0
+    urut = np.argsort(-share[0], kind='stable')
+    a, b = int(urut[0]), int(urut[1])
+    margin = share[:, a] - share[:, b]
+    boot = margin[1:] if len(margin) > 1 else margin
+    bawah, atas = np.percentile(boot, [alpha / 2 * 100, (1 - alpha / 2) * 100])
+    peluang = float((share[1:].argmax(axis=1) == a).mean()) if len(share) > 1 else 1.0
+    return a, b, float(margin[0]), float(bawah), float(atas), peluang
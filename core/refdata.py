@@ -0,0 +1,133 @@
+"""
+Cache data referensi lintas request (per proses): Partai, Dapil RI dan pohon wilayah
+Kabupaten/Kota -> Kecamatan -> Kelurahan/Desa.
+
+Data ini hampir tidak pernah berubah selama masa rekap, tapi selama ini di-query ulang
+(atau di-join lewat select_related) berkali-kali dalam satu request. Setiap cache
+menyimpan snapshot immutable (namedtuple / mappingproxy) dan nomor versi yang naik
+setiap kali data salah satu model sumbernya berubah.
+"""
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from .models import Partai, DapilRI, KabupatenKota, Kecamatan, KelurahanDesa
+from .versioning import subscribe
+
+PartaiRef = namedtuple('PartaiRef', 'id no_urut nama warna_hex logo_url')
+DapilRef = namedtuple('DapilRef', 'id nama kursi kabupaten_ids')
+KabupatenRef = namedtuple('KabupatenRef', 'id nama dapil_ri_id kecamatan_ids kode')
+KecamatanRef = namedtuple('KecamatanRef', 'id nama kabupaten_id desa_ids kode')
+DesaRef = namedtuple('DesaRef', 'id nama kecamatan_id kode')
+Wilayah = namedtuple('Wilayah', 'kabupaten kecamatan desa kode')
+
+
+class ReferenceCache:
+    """
+    Snapshot hasil `loader()` yang dibangun sekali lalu dibagi semua request/thread.
+    `version` naik (dan snapshot dibuang) setiap data salah satu `models` berubah,
+    baik di proses ini maupun di worker lain (lihat core.versioning).
+    """
+
+    def __init__(self, name, loader, models):
+        self.name = name
+        self.loader = loader
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+        for model in models:
+            subscribe(model, self.invalidate)
+
+    def get(self):
+        version, snapshot = self.version, self._snapshot
+        if snapshot is None:
+            snapshot = self.loader()
+            with self._lock:
+                # Jangan simpan snapshot yang sudah basi karena ada perubahan saat loading
+                if self.version == version:
+                    self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+
+# ==============================================================================
+# LOADER
+# ==============================================================================
+
+def _load_partai():
+    return tuple(
+        PartaiRef(p.id, p.no_urut, p.nama, p.warna_hex, p.logo.url if p.logo else None)
+        for p in Partai.objects.order_by('no_urut')
+    )
+
+
+def _load_dapil_ri():
+    kab_ids = {}
+    for kab_id, dapil_id in KabupatenKota.objects.filter(dapil_ri__isnull=False).order_by('nama').values_list('id', 'dapil_ri_id'):
+        kab_ids.setdefault(dapil_id, []).append(kab_id)
+    return MappingProxyType({
+        d.id: DapilRef(d.id, d.nama, d.kursi, tuple(kab_ids.get(d.id, ())))
+        for d in DapilRI.objects.order_by('nama')
+    })
+
+
+def _load_wilayah():
+    desa, desa_ids = {}, {}
+    for d_id, nama, kec_id, kode in KelurahanDesa.objects.order_by('nama').values_list('id', 'nama', 'kecamatan_id', 'kode'):
+        desa[d_id] = DesaRef(d_id, nama, kec_id, kode)
+        desa_ids.setdefault(kec_id, []).append(d_id)
+
+    kecamatan, kec_ids = {}, {}
+    for k_id, nama, kab_id, kode in Kecamatan.objects.order_by('nama').values_list('id', 'nama', 'kabupaten_kota_id', 'kode'):
+        kecamatan[k_id] = KecamatanRef(k_id, nama, kab_id, tuple(desa_ids.get(k_id, ())), kode)
+        kec_ids.setdefault(kab_id, []).append(k_id)
+
+    kabupaten = {
+        kab_id: KabupatenRef(kab_id, nama, dapil_id, tuple(kec_ids.get(kab_id, ())), kode)
+        for kab_id, nama, dapil_id, kode in KabupatenKota.objects.order_by('nama').values_list('id', 'nama', 'dapil_ri_id', 'kode')
+    }
+    # Indeks kode wilayah -> ref (level terlihat dari panjang kode: 4 / 6 / 10)
+    kode = {r.kode: r for level in (kabupaten, kecamatan, desa) for r in level.values() if r.kode}
+    return Wilayah(MappingProxyType(kabupaten), MappingProxyType(kecamatan), MappingProxyType(desa), MappingProxyType(kode))
+
+
+partai_cache = ReferenceCache('partai', _load_partai, [Partai])
+dapil_ri_cache = ReferenceCache('dapil_ri', _load_dapil_ri, [DapilRI, KabupatenKota])
+wilayah_cache = ReferenceCache('wilayah', _load_wilayah, [KabupatenKota, Kecamatan, KelurahanDesa])
+
+
+def get_partai_list():
+    """Tuple PartaiRef urut no_urut (logo_url sudah jadi string / None)."""
+    return partai_cache.get()
+
+
+def get_dapil_ri():
+    """Mapping id -> DapilRef (nama, kursi, kabupaten_ids)."""
+    return dapil_ri_cache.get()
+
+
+def get_wilayah():
+    """Pohon wilayah: Wilayah(kabupaten={id: KabupatenRef}, kecamatan={...}, desa={...}, kode={kode: ref})."""
+    return wilayah_cache.get()
+
+
+def get_nama_wilayah(kecamatan_id):
+    """(nama kecamatan, nama kabupaten, nama dapil RI / '-') tanpa query."""
+    w = get_wilayah()
+    kec = w.kecamatan.get(kecamatan_id)
+    if kec is None:
+        return '-', '-', '-'
+    kab = w.kabupaten[kec.kabupaten_id]
+    dapil = get_dapil_ri().get(kab.dapil_ri_id)
+    return kec.nama, kab.nama, dapil.nama if dapil else '-'
+
+
+def get_dapil_ri_id(kecamatan_id):
+    """dapil_ri_id kabupaten induk sebuah kecamatan (None bila belum dipetakan)."""
+    w = get_wilayah()
+    kec = w.kecamatan.get(kecamatan_id)
+    return w.kabupaten[kec.kabupaten_id].dapil_ri_id if kec else None
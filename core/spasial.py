@@ -0,0 +1,259 @@
+"""
+Ketetanggaan poligon dan autokorelasi spasial (murni NumPy, tanpa Django).
+
+Ketetanggaan ("rook": berbagi sisi batas, bukan hanya satu titik sudut):
+  1. Koordinat lon/lat diproyeksikan ke km (equirectangular di lintang tengah data).
+  2. Prefilter grid: bbox tiap wilayah (diperlebar TOLERANSI_KM) didaftarkan ke sel grid;
+     hanya pasangan yang berbagi sel dan bbox-nya beririsan yang diuji (bukan n^2 pasangan).
+  3. Uji pasangan di dalam irisan bbox saja: segmen A yang kedua ujung dan titik tengahnya
+     berjarak <= TOLERANSI_KM dari batas B dihitung sebagai batas bersama, begitu pula
+     sebaliknya (menangani simpul yang tidak persis sama / T-junction). Panjang batas
+     bersama = yang terbesar dari kedua arah.
+
+Graf disimpan ringkas sebagai daftar sisi (i < j) dan diubah ke bentuk CSR (indptr, indices)
+untuk statistik: lag spasial W @ z dengan bobot baris (row-standardized) cukup np.bincount.
+  - moran_global(): Moran's I, harapan, z-score dan p-value (asumsi normal).
+  - lisa(): Local Moran I_i, pseudo p-value dari permutasi bersyarat (tetangga diacak dari
+    wilayah lain, with replacement, dihitung per blok permutasi) dan kuadran HH/LL/HL/LH.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+TOLERANSI_KM = 0.01
+N_PERM = 499
+ALPHA = 0.05
+BLOK_TITIK = 4096
+BLOK_PERM = 50
+
+Graf = namedtuple('Graf', 'indptr indices')
+
+
+# ==============================================================================
+# GEOMETRI & KETETANGGAAN
+# ==============================================================================
+
+def cincin_geojson(geojson):
+    """Daftar cincin [(n, 2) lon/lat] dari Feature / Polygon / MultiPolygon GeoJSON (lainnya diabaikan)."""
+    if not isinstance(geojson, dict):
+        return []
+    geom = geojson.get('geometry', geojson) if geojson.get('type') == 'Feature' else geojson
+    if not isinstance(geom, dict):
+        return []
+    tipe, coords = geom.get('type'), geom.get('coordinates') or []
+    if tipe == 'Polygon':
+        poligon = [coords]
+    elif tipe == 'MultiPolygon':
+        poligon = coords
+    elif tipe == 'GeometryCollection':
+        return [c for g in geom.get('geometries') or [] for c in cincin_geojson(g)]
+    else:
+        return []
+    hasil = []
+    for poly in poligon:
+        for ring in poly:
+            a = np.asarray([p[:2] for p in ring], dtype=np.float64)
+            if a.ndim == 2 and len(a) >= 2:
+                hasil.append(a)
+    return hasil
+
+
+class _Batas:
+    """Segmen batas satu wilayah (km): p0, p1 (m, 2) dan bbox."""
+    __slots__ = ('p0', 'p1', 'bbox')
+
+    def __init__(self, cincin):
+        self.p0 = np.concatenate([c[:-1] for c in cincin])
+        self.p1 = np.concatenate([c[1:] for c in cincin])
+        semua = np.concatenate([self.p0, self.p1])
+        self.bbox = np.concatenate([semua.min(axis=0), semua.max(axis=0)])
+
+
+def _proyeksi(cincin_per_wilayah):
+    lat = [c[:, 1].mean() for cincin in cincin_per_wilayah for c in cincin]
+    cos0 = math.cos(math.radians(float(np.mean(lat)))) if lat else 1.0
+    skala = np.array([111.32 * cos0, 110.574])
+    return [[c * skala for c in cincin] for cincin in cincin_per_wilayah]
+
+
+def _dekat(titik, p0, p1, tol):
+    """Boolean (n,) titik yang jaraknya <= tol dari salah satu segmen (p0, p1)."""
+    hasil = np.zeros(len(titik), dtype=bool)
+    if not len(titik) or not len(p0):
+        return hasil
+    dx, dy = p1[:, 0] - p0[:, 0], p1[:, 1] - p0[:, 1]
+    dd = np.maximum(dx * dx + dy * dy, 1e-18)
+    # Matriks jarak titik x segmen diproses per blok titik agar memori tetap kecil
+    blok = max(1, min(BLOK_TITIK, BLOK_TITIK * 256 // len(p0)))
+    for mulai in range(0, len(titik), blok):
+        t = titik[mulai:mulai + blok]
+        rx = t[:, 0, None] - p0[None, :, 0]
+        ry = t[:, 1, None] - p0[None, :, 1]
+        u = np.clip((rx * dx + ry * dy) / dd, 0.0, 1.0)
+        rx -= u * dx
+        ry -= u * dy
+        hasil[mulai:mulai + len(t)] = (rx * rx + ry * ry <= tol * tol).any(axis=1)
+    return hasil
+
+
+def _di_kotak(p0, p1, kotak):
+    """Segmen yang bbox-nya beririsan dengan kotak [xmin, ymin, xmax, ymax]."""
+    lo, hi = np.minimum(p0, p1), np.maximum(p0, p1)
+    return (hi[:, 0] >= kotak[0]) & (lo[:, 0] <= kotak[2]) & (hi[:, 1] >= kotak[1]) & (lo[:, 1] <= kotak[3])
+
+
+def _panjang_bersama(a, b, tol):
+    """Panjang (km) segmen `a` yang menempel pada batas `b`."""
+    kotak = np.concatenate([np.maximum(a.bbox[:2], b.bbox[:2]) - tol, np.minimum(a.bbox[2:], b.bbox[2:]) + tol])
+    sa, sb = _di_kotak(a.p0, a.p1, kotak), _di_kotak(b.p0, b.p1, kotak)
+    if not sa.any() or not sb.any():
+        return 0.0
+    p0, p1 = a.p0[sa], a.p1[sa]
+    q0, q1 = b.p0[sb], b.p1[sb]
+    m = len(p0)
+    dekat = _dekat(np.concatenate([p0, p1, (p0 + p1) / 2]), q0, q1, tol)
+    nempel = dekat[:m] & dekat[m:2 * m] & dekat[2 * m:]
+    return float(np.sqrt(((p1[nempel] - p0[nempel]) ** 2).sum(axis=1)).sum())
+
+
+def tetangga(cincin_per_wilayah, tol=TOLERANSI_KM, hanya=None):
+    """
+    Sisi graf ketetanggaan [(i, j, panjang_km)] dengan i < j (indeks ke `cincin_per_wilayah`,
+    daftar cincin lon/lat per wilayah hasil cincin_geojson()). `hanya` (himpunan indeks):
+    cukup sisi yang menyentuh wilayah itu, untuk memperbarui satu wilayah yang batasnya diubah.
+    """
+    batas = [_Batas(c) if c else None for c in _proyeksi(cincin_per_wilayah)]
+    ada = [i for i, b in enumerate(batas) if b is not None]
+    if len(ada) < 2:
+        return []
+    bbox = np.array([batas[i].bbox for i in ada])
+    bbox[:, :2] -= tol
+    bbox[:, 2:] += tol
+
+    # Sel grid seukuran median bbox: tiap wilayah rata-rata hanya menyentuh beberapa sel
+    sel = max(float(np.median(np.maximum(bbox[:, 2] - bbox[:, 0], bbox[:, 3] - bbox[:, 1]))), tol * 10)
+    lo = np.floor(bbox[:, :2] / sel).astype(np.int64)
+    hi = np.floor(bbox[:, 2:] / sel).astype(np.int64)
+    grid = {}
+    for k in range(len(ada)):
+        for gx in range(lo[k, 0], hi[k, 0] + 1):
+            for gy in range(lo[k, 1], hi[k, 1] + 1):
+                grid.setdefault((gx, gy), []).append(k)
+    calon = set()
+    for isi in grid.values():
+        for x in range(len(isi)):
+            for y in range(x + 1, len(isi)):
+                calon.add((isi[x], isi[y]) if isi[x] < isi[y] else (isi[y], isi[x]))
+
+    if hanya is not None:
+        calon = {(x, y) for x, y in calon if ada[x] in hanya or ada[y] in hanya}
+
+    sisi = []
+    for x, y in sorted(calon):
+        bx, by = bbox[x], bbox[y]
+        if bx[2] < by[0] or by[2] < bx[0] or bx[3] < by[1] or by[3] < bx[1]:
+            continue
+        a, b = batas[ada[x]], batas[ada[y]]
+        panjang = max(_panjang_bersama(a, b, tol), _panjang_bersama(b, a, tol))
+        # Hanya bersentuhan di satu titik (queen) tidak dihitung
+        if panjang > tol:
+            sisi.append((ada[x], ada[y], panjang))
+    return sisi
+
+
+def graf_csr(n, sisi_i, sisi_j):
+    """Graf simetris (indptr, indices) dari daftar sisi tak berarah i-j untuk n simpul."""
+    sisi_i, sisi_j = np.asarray(sisi_i, dtype=np.int64), np.asarray(sisi_j, dtype=np.int64)
+    asal = np.concatenate([sisi_i, sisi_j])
+    tuju = np.concatenate([sisi_j, sisi_i])
+    urut = np.lexsort((tuju, asal))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(asal, minlength=n))])
+    return Graf(indptr, tuju[urut])
+
+
+def subgraf(graf, pilih):
+    """Graf terbatas pada simpul `pilih` (boolean (n,)), diberi indeks ulang 0..m-1."""
+    n = len(graf.indptr) - 1
+    asal = np.repeat(np.arange(n), np.diff(graf.indptr))
+    baru = np.cumsum(pilih) - 1
+    tetap = pilih[asal] & pilih[graf.indices]
+    a, b = baru[asal[tetap]], baru[graf.indices[tetap]]
+    satu_arah = a < b
+    return graf_csr(int(pilih.sum()), a[satu_arah], b[satu_arah])
+
+
+# ==============================================================================
+# AUTOKORELASI SPASIAL
+# ==============================================================================
+
+def lag(z, graf):
+    """Lag spasial bobot baris: rata-rata z tetangga tiap simpul (0 bila tanpa tetangga)."""
+    n = len(graf.indptr) - 1
+    derajat = np.diff(graf.indptr)
+    asal = np.repeat(np.arange(n), derajat)
+    total = np.bincount(asal, weights=z[graf.indices], minlength=n)
+    return np.where(derajat > 0, total / np.maximum(derajat, 1), 0.0)
+
+
+def _p_normal(z):
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def moran_global(x, graf):
+    """(I, E[I], z, p dua arah) Moran's I dengan bobot baris; None bila data / tetangga tidak cukup."""
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    derajat = np.diff(graf.indptr)
+    s0 = float((derajat > 0).sum())
+    z = x - x.mean() if n else x
+    m2 = float((z ** 2).sum())
+    if n < 3 or s0 == 0 or m2 == 0:
+        return None
+    i_moran = n / s0 * float((z * lag(z, graf)).sum()) / m2
+    e_i = -1.0 / (n - 1)
+
+    # Varians di bawah asumsi normal: S1 dari (w_ij + w_ji)^2, S2 dari (w_i. + w_.i)^2
+    asal = np.repeat(np.arange(n), derajat)
+    inv = np.where(derajat > 0, 1.0 / np.maximum(derajat, 1), 0.0)
+    s1 = 0.5 * float(((inv[asal] + inv[graf.indices]) ** 2).sum())
+    kolom = np.bincount(graf.indices, weights=inv[asal], minlength=n)
+    s2 = float(((np.where(derajat > 0, 1.0, 0.0) + kolom) ** 2).sum())
+    var = (n * n * s1 - n * s2 + 3 * s0 * s0) / ((n * n - 1) * s0 * s0) - e_i ** 2
+    z_i = (i_moran - e_i) / math.sqrt(var) if var > 0 else 0.0
+    return i_moran, e_i, z_i, _p_normal(z_i)
+
+
+def lisa(x, graf, n_perm=N_PERM, alpha=ALPHA, seed=0):
+    """
+    Local Moran per simpul: (I_i (n,), lag z (n,), pseudo p (n,), kuadran (n,) str).
+    Kuadran 'HH' / 'LL' (hot / cold spot), 'HL' / 'LH' (outlier) bila p <= alpha, selain itu 'ns'.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    sd = x.std() if n else 0.0
+    z = (x - x.mean()) / sd if sd > 0 else np.zeros(n)
+    lz = lag(z, graf)
+    local = z * lz
+    derajat = np.diff(graf.indptr)
+    p = np.ones(n)
+
+    if n > 2 and derajat.any():
+        k_max = int(derajat.max())
+        rng = np.random.default_rng(seed)
+        lebih = np.zeros(n)
+        kolom = np.arange(k_max)[None, None, :]
+        masker = kolom < derajat[None, :, None]
+        for mulai in range(0, n_perm, BLOK_PERM):
+            b = min(BLOK_PERM, n_perm - mulai)
+            # Tetangga acak dari n - 1 wilayah lain (indeks >= i digeser satu)
+            acak = rng.integers(0, n - 1, size=(b, n, k_max))
+            acak += acak >= np.arange(n)[None, :, None]
+            lag_acak = (z[acak] * masker).sum(axis=2) / np.maximum(derajat, 1)[None, :]
+            local_acak = z[None, :] * lag_acak
+            lebih += np.where(local >= 0, local_acak >= local[None, :], local_acak <= local[None, :]).sum(axis=0)
+        p = np.where(derajat > 0, (lebih + 1) / (n_perm + 1), 1.0)
+
+    kuadran = np.where(z >= 0, np.where(lz >= 0, 'HH', 'HL'), np.where(lz >= 0, 'LH', 'LL'))
+    kuadran = np.where((p <= alpha) & (derajat > 0), kuadran, 'ns')
+    return local, lz, p, kuadran
@@ -1,3 +1,67 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from core import klaster, kursi, lokasi, proyeksi
+
+
+class AlokasiKursiTests(SimpleTestCase):
+    # Dapil 1 (3 kursi): hasil bagi A 30000, 10000, 6000 / B 10000 / C 10000 -> seri 10000
+    # tiga arah, dipecah ke indeks terkecil: A 2, B 1. Dapil 2 (1 kursi): D terbanyak tetapi
+    # suara nasionalnya 1500 / 52500 = 2,9% < 4%, jadi kursinya ke A.
+    SUARA = np.array([
+        [30000, 10000, 10000, 0],
+        [1000, 0, 0, 1500],
+    ])
+    KURSI = np.array([3, 1])
+
+    def test_seri_dan_ambang_batas(self):
+        np.testing.assert_array_equal(kursi.alokasi(self.SUARA, self.KURSI), [[2, 1, 0, 0], [1, 0, 0, 0]])
+
+    def test_tanpa_ambang_batas(self):
+        np.testing.assert_array_equal(kursi.alokasi(self.SUARA, self.KURSI, ambang=0), [[2, 1, 0, 0], [0, 0, 0, 1]])
+
+    def test_simulasi_pool_sama_dengan_langsung(self):
+        rng = np.random.default_rng(0)
+        suara = rng.integers(0, 50000, size=(5, 6))
+        n_kursi = np.array([3, 6, 8, 4, 10])
+        skenario = np.array([(a, b, f) for a in range(6) for b in range(6) if a != b for f in (0.05, 0.1, 0.3)])
+
+        langsung = kursi.alokasi(kursi.terapkan_skenario(suara, skenario), n_kursi)
+        np.testing.assert_array_equal(kursi.simulasi(suara, n_kursi, skenario, chunk=16), langsung)
+        with mock.patch.object(kursi, 'POOL_MIN', 0), mock.patch.object(kursi.os, 'cpu_count', return_value=2):
+            np.testing.assert_array_equal(kursi.simulasi(suara, n_kursi, skenario, chunk=16), langsung)
+            self.assertIsNotNone(kursi._pool)
+        kursi._tutup_pool()
+
+
+class LokasiTests(SimpleTestCase):
+    # Wilayah 0: persegi 0..10 berlubang 4..6; wilayah 1: pulau 4.5..5.5 di dalam lubang itu
+    LUAR = np.array([[0, 0], [10, 0], [10, 10], [0, 10]], dtype=float)
+    LUBANG = np.array([[4, 4], [6, 4], [6, 6], [4, 6]], dtype=float)
+    PULAU = np.array([[4.5, 4.5], [5.5, 4.5], [5.5, 5.5], [4.5, 5.5]], dtype=float)
+
+    def test_titik_di_lubang(self):
+        indeks = lokasi.kemas([[self.LUAR, self.LUBANG], [self.PULAU]])
+        lon = [2, 4.2, 5, 11, np.nan]
+        lat = [2, 4.2, 5, 5, 5]
+        np.testing.assert_array_equal(lokasi.cari(indeks, lon, lat), [0, -1, 1, -1, -1])
+
+
+class KlasterTests(SimpleTestCase):
+    def test_dua_kelompok_terpisah(self):
+        x = np.array([[0, 0], [0, 1], [1, 0], [10, 10], [10, 11], [11, 10]], dtype=float)
+        label, _, _ = klaster.kmeans(x, 2)
+        self.assertEqual(len(set(label[:3])), 1)
+        self.assertEqual(len(set(label[3:])), 1)
+        self.assertNotEqual(label[0], label[3])
+
+
+class ProyeksiTests(SimpleTestCase):
+    def test_estimasi_titik(self):
+        # Satu strata: share 90 / 150 dan 60 / 150 dikali DPT strata 300
+        proj, masuk = proyeksi.proyeksi([[60, 40], [30, 20]], [100, 50], [0, 0], [300], n_boot=10)
+        np.testing.assert_allclose(proj[0], [[180, 120]])
+        self.assertEqual(proj.shape, (11, 1, 2))
+        np.testing.assert_array_equal(masuk, [True])
@@ -0,0 +1,312 @@
+"""
+Bus invalidasi cache lintas worker (proses gunicorn).
+
+Setiap cache lokal per proses (data referensi, count changelist, matriks agregat, payload peta)
+didaftarkan ke domain data = label model. Perubahan data menaikkan:
+  - versi lokal domain tersebut (langsung, di proses yang menulis), dan
+  - baris DataVersion di database (setelah transaksi commit, digabung per transaksi).
+
+Worker lain mencocokkan tabel DataVersion sekali di awal setiap request (DataVersionMiddleware,
+kecuali /static/ dan /media/); domain yang versinya berubah di-invalidasi di proses itu.
+Tidak ada TTL: cache tetap dipakai selama versinya sama.
+
+Tabel turunan (peringkat, hasil deteksi) diperbarui lewat on_data_change(): dipanggil di thread
+latar proses penulis setelah commit (digabung per JEDA_SINKRON detik), sehingga jalur baca tidak
+pernah menulis ke database dan request penulis tidak ikut menanggung hitungannya.
+
+Penulisan massal (bulk_create/bulk_update/queryset.update) tidak memicu signal,
+jadi pemanggilnya wajib memanggil bump_data_version() sendiri.
+"""
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import DataVersion
+
+# App yang datanya di-cache; model lain (session, log admin) tidak memicu invalidasi
+WATCHED_APPS = ('core', 'pilpres_2024', 'pilegri_2024', 'geojson')
+
+_lock = threading.Lock()
+_local = {}         # domain -> versi lokal, naik setiap invalidasi (lokal maupun dari worker lain)
+_listeners = {}     # domain -> [callback]
+_seen = None        # domain -> versi DB terakhir yang sudah diproses proses ini
+_pending = threading.local()
+
+logger = logging.getLogger(__name__)
+
+
+def domain_of(model):
+    return model._meta.concrete_model._meta.label_lower
+
+
+def subscribe(model, callback):
+    """Panggil `callback()` setiap data `model` berubah, di proses ini maupun di worker lain."""
+    with _lock:
+        _listeners.setdefault(domain_of(model), []).append(callback)
+
+
+
+def data_version(*models):
+    """Tuple versi lokal untuk dipakai sebagai bagian kunci cache."""
+    return tuple(_local.get(domain_of(m), 0) for m in models)
+
+
+class VersionedCache:
+    """
+    Cache hasil turunan (agregat, peringkat, analisis) per kunci, otomatis basi saat data
+    salah satu `models` berubah. Entri versi lama dibuang ketika entri versi baru disimpan.
+    `maxsize` membatasi jumlah kunci bila kunci berasal dari parameter request.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, *models, maxsize=None):
+        self.models = models
+        self.maxsize = maxsize
+        self._store = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Nilai untuk `key` pada versi data saat ini; `build()` hanya dipanggil bila belum ada."""
+        version = data_version(*self.models)
+        value = self._store.get((key, version), self._MISSING)
+        if value is self._MISSING:
+            value = build()
+            with self._lock:
+                # Jangan simpan hasil yang sudah basi karena ada perubahan saat menghitung
+                if data_version(*self.models) == version:
+                    for old in [k for k in self._store if k[1] != version]:
+                        del self._store[old]
+                    if self.maxsize and len(self._store) >= self.maxsize:
+                        self._store.clear()
+                    self._store[(key, version)] = value
+        return value
+
+
+def _invalidate_local(domains):
+    with _lock:
+        for d in domains:
+            _local[d] = _local.get(d, 0) + 1
+        callbacks = [cb for d in domains for cb in _listeners.get(d, ())]
+    for cb in callbacks:
+        cb()
+
+
+# ==============================================================================
+# PUBLIKASI KE DATABASE
+# ==============================================================================
+
+def _publish(domains):
+    for d in domains:
+        if DataVersion.objects.filter(domain=d).update(version=F('version') + 1):
+            continue
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(domain=d, version=1)
+        except IntegrityError:
+            # Worker lain baru saja membuat barisnya
+            DataVersion.objects.filter(domain=d).update(version=F('version') + 1)
+
+
+def _after_commit(domains, perubahan):
+    _publish(domains)
+    _antrekan(perubahan)
+
+
+class _Batch:
+    """Kumpulan domain (dan objek) yang berubah dalam satu transaksi, dipublikasi sekali saat commit."""
+
+    def __init__(self):
+        self.domains = set()
+        self.perubahan = {}
+
+    def __call__(self):
+        _after_commit(sorted(self.domains), self.perubahan)
+
+
+def _gabung(perubahan, model, objs):
+    # None = objek tidak diketahui (anggap semua berubah), menang atas daftar objek
+    if objs is None or perubahan.get(model, ()) is None:
+        perubahan[model] = None
+    else:
+        perubahan.setdefault(model, []).extend(objs)
+
+
+def bump_data_version(*models, objs=None):
+    """
+    Tandai data `models` berubah: invalidasi lokal sekarang, publikasi ke worker lain saat commit.
+    `objs` = objek yang disimpan / dihapus (satu model) untuk callback on_data_change(); tanpa
+    `objs` perubahannya dianggap menyeluruh.
+    """
+    domains = {domain_of(m) for m in models}
+    _invalidate_local(domains)
+    perubahan = {}
+    for m in models:
+        _gabung(perubahan, m._meta.concrete_model, objs)
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        _after_commit(sorted(domains), perubahan)
+        return
+    # Baris DataVersion baru di-update setelah commit: tidak ada lock yang ditahan
+    # sepanjang transaksi panjang (import), dan banyak perubahan cukup satu UPDATE per domain.
+    # Batch yang ikut ter-rollback hilang dari run_on_commit, jadi dibuat baru.
+    batch = getattr(_pending, 'batch', None)
+    if batch is None or not any(entry[1] is batch for entry in conn.run_on_commit):
+        batch = _pending.batch = _Batch()
+        transaction.on_commit(batch)
+    batch.domains.update(domains)
+    for m, objs in perubahan.items():
+        _gabung(batch.perubahan, m, objs)
+
+
+@receiver([post_save, post_delete])
+def _bump_on_change(sender, **kwargs):
+    if sender is DataVersion or sender._meta.app_label not in WATCHED_APPS:
+        return
+    bump_data_version(sender, objs=[kwargs['instance']])
+
+
+# ==============================================================================
+# TABEL TURUNAN (SETELAH COMMIT, DI LUAR REQUEST PENULIS)
+# ==============================================================================
+
+# Perubahan yang masuk dalam jeda ini digabung menjadi satu panggilan callback
+JEDA_SINKRON = 0.5
+
+_writers = {}                       # model -> [callback]
+_antrean = {}                       # callback -> {model: [objek] | None}
+_antrean_cv = threading.Condition()
+_jalan_lock = threading.Lock()      # callback tidak pernah berjalan bersamaan dalam satu proses
+_pekerja = None
+
+
+def on_data_change(model, callback):
+    """
+    Panggil `callback(perubahan)` setelah transaksi yang mengubah data `model` commit, hanya di
+    proses yang menulis (worker lain tidak ikut, beda dengan subscribe()). Untuk memperbarui
+    tabel turunan sehingga pembacaannya cukup query biasa.
+
+    `perubahan` = {model: [objek yang disimpan / dihapus] atau None (tidak diketahui = semua)}.
+    Callback berjalan di thread latar proses penulis, bukan di request-nya: perubahan yang masuk
+    selama JEDA_SINKRON detik digabung menjadi satu panggilan. Tabel turunan tertinggal kira-kira
+    JEDA_SINKRON detik + lama hitungnya dari commit. Kegagalan dicatat di log; proses yang mati
+    sebelum sempat menjalankannya tertolong penulisan berikutnya atau perintah sinkronkan_*.
+    """
+    with _lock:
+        _writers.setdefault(model._meta.concrete_model, []).append(callback)
+
+
+def _antrekan(perubahan):
+    global _pekerja
+    with _lock:
+        tugas = {}
+        for m, objs in perubahan.items():
+            for cb in _writers.get(m, ()):
+                tugas.setdefault(cb, {})[m] = objs
+    if not tugas:
+        return
+    with _antrean_cv:
+        for cb, isi in tugas.items():
+            gabungan = _antrean.setdefault(cb, {})
+            for m, objs in isi.items():
+                _gabung(gabungan, m, objs)
+        # Thread tidak ikut ter-fork: cek ulang di setiap proses
+        if _pekerja is None or not _pekerja.is_alive():
+            _pekerja = threading.Thread(target=_kerja, name='sinkron-turunan', daemon=True)
+            _pekerja.start()
+        _antrean_cv.notify()
+
+
+def jalankan_tertunda():
+    """Jalankan semua callback on_data_change yang masih antre, sekarang, di thread pemanggil."""
+    with _jalan_lock:
+        with _antrean_cv:
+            tugas = list(_antrean.items())
+            _antrean.clear()
+        for cb, perubahan in tugas:
+            try:
+                cb(perubahan)
+            except Exception:
+                logger.exception("Sinkronisasi tabel turunan %s gagal", getattr(cb, '__qualname__', cb))
+
+
+def _kerja():
+    while True:
+        with _antrean_cv:
+            while not _antrean:
+                _antrean_cv.wait()
+        time.sleep(JEDA_SINKRON)
+        jalankan_tertunda()
+        # Koneksi database thread latar tidak dipakai request, jangan biarkan terbuka
+        connections.close_all()
+
+
+# Perintah manajemen / shell: selesaikan antrean sebelum proses keluar
+atexit.register(jalankan_tertunda)
+
+
+@contextmanager
+def kunci_sinkron(nama):
+    """
+    Serialisasi sinkronisasi tabel turunan `nama` lintas proses: transaksi yang memegang row lock
+    baris DataVersion 'kunci:<nama>'. Di dalamnya versi data dicocokkan dulu (sync_data_versions),
+    jadi cache lokal sudah memuat commit worker lain; sinkronisasi yang selesai belakangan selalu
+    membaca data yang lebih baru dan tidak menimpa hasil yang lebih baru dengan yang lama.
+    """
+    domain = f'kunci:{nama}'
+    with transaction.atomic():
+        DataVersion.objects.get_or_create(domain=domain)
+        DataVersion.objects.select_for_update().get(domain=domain)
+        sync_data_versions()
+        yield
+
+
+# ==============================================================================
+# SINKRONISASI ANTAR WORKER
+# ==============================================================================
+
+def sync_data_versions():
+    """
+    Bandingkan tabel DataVersion dengan versi yang terakhir diproses, invalidasi domain yang berubah.
+    Satu query kecil; dipanggil sekali per request oleh DataVersionMiddleware.
+    """
+    global _seen
+    try:
+        rows = dict(DataVersion.objects.values_list('domain', 'version'))
+    except DatabaseError:
+        # Tabel belum dimigrasi
+        return
+    with _lock:
+        seen, _seen = _seen, rows
+    if seen is None:
+        # Request pertama proses ini: belum ada cache yang dibangun, cukup catat
+        return
+    changed = [d for d, v in rows.items() if seen.get(d) != v]
+    if changed:
+        _invalidate_local(changed)
+
+
+class DataVersionMiddleware:
+    """
+    Sinkronkan versi data dengan worker lain sekali di awal setiap request, kecuali file
+    statis / media (dilayani Django di siapa/urls.py) yang tidak pernah membaca cache data.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.skip_prefixes = tuple(
+            '/' + p.strip('/') + '/' for p in (settings.STATIC_URL, settings.MEDIA_URL) if p and p.strip('/')
+        )
+
+    def __call__(self, request):
+        if not request.path.startswith(self.skip_prefixes):
+            sync_data_versions()
+        return self.get_response(request)
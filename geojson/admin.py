@@ -1,6 +1,7 @@
 from django.contrib import admin
-from django.utils.html import mark_safe
-from .models import KabupatenGeoJSON, KecamatanGeoJSON
+from django.utils.html import format_html, mark_safe
+from .models import KabupatenGeoJSON, KecamatanGeoJSON, AnomaliKecamatan
+from .tetangga import sinkronkan as sinkronkan_tetangga
 import json
 
 class GeoJSONMapPreviewMixin:
@@ -89,6 +90,12 @@ class KabupatenGeoJSONAdmin(GeoJSONMapPreviewMixin, admin.ModelAdmin):
     def has_geojson_data(self, obj):
         return bool(obj.geojson_data)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Batas berubah: perbarui pasangan tetangga kabupaten ini saja
+        if 'geojson_data' in form.changed_data:
+            sinkronkan_tetangga('kabupaten', obj.kabupaten_id)
+
 
 @admin.register(KecamatanGeoJSON)
 class KecamatanGeoJSONAdmin(GeoJSONMapPreviewMixin, admin.ModelAdmin):
@@ -110,3 +117,80 @@ class KecamatanGeoJSONAdmin(GeoJSONMapPreviewMixin, admin.ModelAdmin):
     def has_geojson_data(self, obj):
         return bool(obj.geojson_data)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Batas berubah: perbarui pasangan tetangga kecamatan ini saja
+        if 'geojson_data' in form.changed_data:
+            sinkronkan_tetangga('kecamatan', obj.kecamatan_id)
+
+
+
+# ==============================================================================
+# ANOMALI REKAP
+# ==============================================================================
+
+class AnomaliFilter(admin.SimpleListFilter):
+    """
+    Filter changelist rekap (model dengan FK `kecamatan`) berdasarkan tabel AnomaliKecamatan.
+    Subclass menentukan `pemilu` yang relevan; anomali lintas (Pileg vs Pilpres) ikut di keduanya.
+    """
+    title = 'Anomali'
+    parameter_name = 'anomali'
+    pemilu = ()
+
+    def lookups(self, request, model_admin):
+        return (('semua', 'Ada Anomali (⚠)'), *AnomaliKecamatan.JENIS_CHOICES)
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        flags = AnomaliKecamatan.objects.filter(pemilu__in=self.pemilu)
+        if value != 'semua':
+            flags = flags.filter(jenis=value)
+        return queryset.filter(kecamatan_id__in=flags.values('kecamatan_id'))
+
+
+class AnomaliPilpresFilter(AnomaliFilter):
+    pemilu = ('pilpres', 'lintas')
+
+
+class AnomaliPilegRIFilter(AnomaliFilter):
+    pemilu = ('pileg_ri', 'lintas')
+
+
+@admin.register(AnomaliKecamatan)
+class AnomaliKecamatanAdmin(admin.ModelAdmin):
+    """Daftar anomali rekap (read-only). Tabel diperbarui setiap data rekap berubah (geojson.anomali)."""
+    list_display = ('kecamatan', 'get_kabupaten', 'pemilu', 'get_jenis', 'get_nilai', 'get_skor', 'peserta', 'keterangan')
+    list_filter = ('pemilu', 'jenis', 'kecamatan__kabupaten_kota')
+    search_fields = ('kecamatan__nama', 'kecamatan__kabupaten_kota__nama')
+    ordering = ('kecamatan__kabupaten_kota__nama', 'kecamatan__nama', 'pemilu', 'jenis')
+    list_select_related = ('kecamatan__kabupaten_kota',)
+    list_per_page = 100
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Kabupaten/Kota", ordering="kecamatan__kabupaten_kota__nama")
+    def get_kabupaten(self, obj):
+        return obj.kecamatan.kabupaten_kota.nama
+
+    @admin.display(description="Jenis Anomali", ordering="jenis")
+    def get_jenis(self, obj):
+        warna = '#dc3545' if obj.jenis == 'partisipasi_lebih' else '#fd7e14'
+        return format_html('<span style="background:{}; color:#fff; padding:2px 8px; border-radius:10px; font-size:11px; font-weight:700;">{}</span>', warna, obj.get_jenis_display())
+
+    @admin.display(description="Nilai", ordering="nilai")
+    def get_nilai(self, obj):
+        return f"{obj.nilai:.2f}%".replace('.', ',')
+
+    @admin.display(description="Skor Z", ordering="skor")
+    def get_skor(self, obj):
+        return f"{obj.skor:+.2f}".replace('.', ',')
@@ -0,0 +1,240 @@
+"""
+Pemindaian anomali rekap seluruh kecamatan (NumPy, satu kali jalan per versi data).
+
+Sumber angka adalah rollup kecamatan (geojson.recap), disusun menjadi matriks
+kecamatan x peserta lalu diperiksa sekaligus:
+  - partisipasi (suara masuk / DPT) di atas 100% atau di luar batas z-score robust,
+  - rasio suara tidak sah yang tidak wajar (z-score robust, dua arah),
+  - selisih total suara masuk Pileg RI vs Pilpres di kecamatan yang sama,
+  - share partai / paslon yang menyimpang dari share kabupatennya.
+
+Z-score robust = 0.6745 * (x - median) / MAD, sehingga satu-dua kecamatan ekstrem tidak
+menggeser batasnya. Karena median / MAD dihitung atas seluruh provinsi, satu perubahan bisa
+menggeser status kecamatan mana pun, jadi pemindaian selalu menyeluruh.
+
+Hasil disimpan di tabel AnomaliKecamatan. Sinkronisasi tidak berjalan di request penulis: setelah
+commit (core.versioning.on_data_change) perubahan diantrekan ke thread latar, semua perubahan
+dalam JEDA_SINKRON detik digabung menjadi satu pemindaian, dan dua pemindaian tidak pernah
+berjalan bersamaan (kunci_sinkron). Tabel tertinggal paling lama JEDA_SINKRON detik + satu kali
+pemindaian (+ pemindaian yang sedang berjalan) dari commit; hanya baris yang berubah yang
+ditulis / dihapus. Mode peta dan filter admin hanya membaca tabel; isi awal / perbaikan manual
+lewat perintah `sinkronkan_anomali`.
+"""
+import warnings
+
+import numpy as np
+
+from core.bulk import bulk_upsert
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.refdata import get_partai_list, get_wilayah
+from core.versioning import VersionedCache, kunci_sinkron, on_data_change
+from pilpres_2024.refdata import get_paslon_list
+from .models import AnomaliKecamatan
+from .recap import get_rollup, SEMUA_SUMBER
+
+# Batas |z| robust (Iglewicz & Hoaglin) dan jumlah kecamatan minimum agar median/MAD bermakna
+Z_BATAS = 3.5
+MIN_SAMPEL = 5
+# Selisih total suara masuk Pileg RI vs Pilpres (relatif terhadap yang lebih besar)
+SELISIH_BATAS = 0.05
+# Share peserta baru dianggap menyimpang bila z tinggi DAN selisih absolutnya >= 5 poin
+SHARE_MIN_SELISIH = 0.05
+
+_FIELDS = ('nilai', 'skor', 'peserta', 'keterangan')
+
+SUMBER = (*SEMUA_SUMBER, Partai, KabupatenKota, Kecamatan)
+_peta_cache = VersionedCache(AnomaliKecamatan, KabupatenKota, Kecamatan)
+
+
+def _fmt(v):
+    return "{:,}".format(int(v)).replace(',', '.')
+
+
+def _r(v):
+    return round(float(v), 2)
+
+
+def robust_z(x):
+    """Z-score robust per kolom (NaN diabaikan, hasil NaN -> 0). `x`: (n,) atau (n, k)."""
+    x = np.asarray(x, dtype=np.float64)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        med = np.nanmedian(x, axis=0)
+        dev = np.abs(x - med)
+        mad = np.nanmedian(dev, axis=0)
+        # MAD 0 (mayoritas nilai sama): pakai rata-rata deviasi absolut
+        mean_ad = np.nanmean(dev, axis=0)
+        z = np.where(mad > 0, 0.6745 * (x - med) / np.where(mad > 0, mad, 1),
+                     np.where(mean_ad > 0, (x - med) / (1.2533 * np.where(mean_ad > 0, mean_ad, 1)), 0.0))
+    z = np.nan_to_num(z)
+    z[..., np.isfinite(x).sum(axis=0) < MIN_SAMPEL] = 0.0
+    return z
+
+
+# ==============================================================================
+# MATRIKS DARI ROLLUP
+# ==============================================================================
+
+def _matriks(mode):
+    """(kec_ids, kab_idx, peserta, suara (K, P), sts, dpt) untuk kecamatan yang sudah punya rekap."""
+    rollup = get_rollup(mode)
+    w = get_wilayah()
+    if mode == 'pilpres':
+        peserta = [(p.id, f"{p.no_urut:02d} {p.nama_capres}") for p in get_paslon_list()]
+    else:
+        peserta = [(p.id, p.nama) for p in get_partai_list()]
+    kec_ids = np.array([k for k in sorted(rollup) if k in w.kecamatan], dtype=np.int64)
+    rows = [rollup[k] for k in kec_ids.tolist()]
+    suara = np.array([[r.suara.get(pid, 0) for pid, _ in peserta] for r in rows], dtype=np.float64).reshape(len(rows), len(peserta))
+    sts = np.array([r.sts for r in rows], dtype=np.float64)
+    dpt = np.array([r.dpt for r in rows], dtype=np.float64)
+    _, kab_idx = np.unique([w.kecamatan[k].kabupaten_id for k in kec_ids.tolist()], return_inverse=True)
+    return kec_ids, kab_idx.astype(np.int64), peserta, suara, sts, dpt
+
+
+# ==============================================================================
+# PEMINDAIAN
+# ==============================================================================
+
+def _scan_mode(mode, hasil):
+    kec_ids, kab_idx, peserta, suara, sts, dpt = _matriks(mode)
+    if not len(kec_ids):
+        return {}
+    sah = suara.sum(axis=1)
+    masuk = sah + sts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        partisipasi = np.where(dpt > 0, masuk / dpt, np.nan)
+        rasio_ts = np.where(masuk > 0, sts / masuk, np.nan)
+        share = np.where(sah[:, None] > 0, suara / sah[:, None], np.nan)
+
+    # 1. Partisipasi: > 100% mutlak, selain itu di luar batas z robust
+    z_part = robust_z(partisipasi)
+    lebih = partisipasi > 1
+    ekstrem = ~lebih & (np.abs(z_part) > Z_BATAS)
+    for i in np.nonzero(lebih | ekstrem)[0]:
+        hasil[(int(kec_ids[i]), mode, 'partisipasi_lebih' if lebih[i] else 'partisipasi_ekstrem')] = (
+            _r(partisipasi[i] * 100), _r(z_part[i]), '',
+            f"Suara masuk {_fmt(masuk[i])} dari DPT {_fmt(dpt[i])}",
+        )
+
+    # 2. Rasio suara tidak sah
+    z_ts = robust_z(rasio_ts)
+    for i in np.nonzero(np.abs(z_ts) > Z_BATAS)[0]:
+        hasil[(int(kec_ids[i]), mode, 'tidak_sah')] = (
+            _r(rasio_ts[i] * 100), _r(z_ts[i]), '',
+            f"Tidak sah {_fmt(sts[i])} dari {_fmt(masuk[i])} suara masuk",
+        )
+
+    # 3. Share peserta vs share kabupaten (kabupaten dihitung dari kecamatan yang sama)
+    if suara.shape[1]:
+        kab_suara = np.zeros((kab_idx.max() + 1, suara.shape[1]))
+        np.add.at(kab_suara, kab_idx, suara)
+        kab_sah = kab_suara.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            kab_share = np.where(kab_sah > 0, kab_suara / np.where(kab_sah > 0, kab_sah, 1), np.nan)
+        selisih = share - kab_share[kab_idx]
+        z_share = robust_z(selisih)
+        z_share[np.abs(np.nan_to_num(selisih)) < SHARE_MIN_SELISIH] = 0
+        terburuk = np.abs(z_share).argmax(axis=1)
+        z_max = z_share[np.arange(len(kec_ids)), terburuk]
+        for i in np.nonzero(np.abs(z_max) > Z_BATAS)[0]:
+            j = terburuk[i]
+            hasil[(int(kec_ids[i]), mode, 'share_menyimpang')] = (
+                _r(share[i, j] * 100), _r(z_max[i]), peserta[j][1][:100],
+                f"Kabupaten {kab_share[kab_idx[i], j] * 100:.1f}%".replace('.', ','),
+            )
+    return dict(zip(kec_ids.tolist(), masuk.tolist()))
+
+
+def scan():
+    """{(kecamatan_id, pemilu, jenis): (nilai, skor, peserta, keterangan)} untuk seluruh provinsi."""
+    hasil = {}
+    masuk_pilpres = _scan_mode('pilpres', hasil)
+    masuk_pileg = _scan_mode('pileg_ri', hasil)
+
+    # 4. Total suara masuk Pileg RI vs Pilpres (surat suara berbeda, pemilih yang sama)
+    bersama = np.array(sorted(masuk_pilpres.keys() & masuk_pileg.keys()), dtype=np.int64)
+    if len(bersama):
+        a = np.array([masuk_pileg[k] for k in bersama.tolist()])
+        b = np.array([masuk_pilpres[k] for k in bersama.tolist()])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rel = np.where(np.maximum(a, b) > 0, (a - b) / np.maximum(a, b), 0.0)
+        z_rel = robust_z(rel)
+        for i in np.nonzero(np.abs(rel) > SELISIH_BATAS)[0]:
+            hasil[(int(bersama[i]), 'lintas', 'selisih_total')] = (
+                _r(rel[i] * 100), _r(z_rel[i]), '',
+                f"Pileg RI {_fmt(a[i])} vs Pilpres {_fmt(b[i])}",
+            )
+    return hasil
+
+
+def sinkronkan(perubahan=None):
+    """
+    Tulis anomali baru / berubah, hapus yang sudah tidak berlaku. Hasil: (ditulis, dihapus).
+    `perubahan` (dari on_data_change) diabaikan: pemindaian selalu seluruh provinsi.
+    """
+    with kunci_sinkron('anomali'):
+        baru = scan()
+        lama = {
+            (row[1], row[2], row[3]): (row[0], row[4:])
+            for row in AnomaliKecamatan.objects.values_list('pk', 'kecamatan_id', 'pemilu', 'jenis', *_FIELDS)
+        }
+        berubah = [
+            AnomaliKecamatan(kecamatan_id=key[0], pemilu=key[1], jenis=key[2], **dict(zip(_FIELDS, values)))
+            for key, values in baru.items() if key not in lama or lama[key][1] != values
+        ]
+        usang = [pk for key, (pk, _) in lama.items() if key not in baru]
+        bulk_upsert(AnomaliKecamatan, berubah, unique_fields=['kecamatan', 'pemilu', 'jenis'], update_fields=list(_FIELDS))
+        if usang:
+            AnomaliKecamatan.objects.filter(pk__in=usang).delete()
+    return len(berubah), len(usang)
+
+
+for _model in SUMBER:
+    on_data_change(_model, sinkronkan)
+
+
+# ==============================================================================
+# DATA PETA
+# ==============================================================================
+
+WARNA = {0: '#28a745', 1: '#ffc107', 2: '#fd7e14'}
+WARNA_BERAT = '#dc3545'
+
+
+def _hitung_peta(level):
+    w = get_wilayah()
+    per_kec = {}
+    for kec_id, pemilu, jenis, nilai, skor, peserta in AnomaliKecamatan.objects.order_by('kecamatan_id', 'pemilu', 'jenis').values_list(
+        'kecamatan_id', 'pemilu', 'jenis', 'nilai', 'skor', 'peserta'
+    ):
+        per_kec.setdefault(kec_id, []).append([pemilu, jenis, nilai, skor, peserta])
+
+    hasil = {}
+    if level == 'kecamatan':
+        for kec_id, flags in per_kec.items():
+            berat = len(flags) >= 3 or any(f[1] == 'partisipasi_lebih' for f in flags)
+            hasil[kec_id] = {
+                'warna': WARNA_BERAT if berat else WARNA[min(len(flags), 2)],
+                'fill_opacity': 0.85 if berat else 0.65,
+                'jumlah': len(flags), 'anomali': flags,
+            }
+        return hasil
+    # Kabupaten: proporsi kecamatan bertanda
+    for kab_id, kab in w.kabupaten.items():
+        ditandai = [k for k in kab.kecamatan_ids if k in per_kec]
+        if not ditandai:
+            continue
+        rasio = len(ditandai) / max(len(kab.kecamatan_ids), 1)
+        hasil[kab_id] = {
+            'warna': WARNA_BERAT if rasio >= 0.25 else WARNA[2] if rasio >= 0.1 else WARNA[1],
+            'fill_opacity': 0.45 + 0.4 * min(rasio / 0.25, 1),
+            'jumlah': sum(len(per_kec[k]) for k in ditandai), 'kecamatan': len(ditandai),
+        }
+    return hasil
+
+
+def get_peta_anomali(level):
+    """{region_id: {warna, fill_opacity, jumlah, ...}} untuk mode peta anomali ('kokab' / 'kecamatan')."""
+    level = 'kecamatan' if level == 'kecamatan' else 'kabupaten'
+    return _peta_cache.get(level, lambda: _hitung_peta(level))
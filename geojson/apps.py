@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GeojsonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'geojson'
+
+    def ready(self):
+        # Daftarkan sinkronisasi tabel anomali setiap data rekap berubah
+        from . import anomali  # noqa: F401
@@ -0,0 +1,99 @@
+"""
+Data peta mode caleg (choropleth satu caleg Pileg DPR RI).
+
+Suara satu caleg per kecamatan dibaca lewat indeks caleg-first DetailSuaraCaleg
+(caleg, rekap_suara, jumlah_suara), lalu dibagi suara sah kecamatan dari rollup footer
+(geojson.recap). Hasil per caleg ringkas (array id -> nilai) dan di-cache per versi data,
+jadi berpindah caleg di peta cukup mewarnai ulang layer tanpa memuat geometri lagi.
+"""
+from core.models import Partai, DapilRI, KabupatenKota, Kecamatan
+from core.refdata import get_dapil_ri, get_partai_list, get_wilayah
+from core.versioning import VersionedCache
+from pilegri_2024.models import Caleg, RekapSuara, SuaraPartai, DetailSuaraCaleg, PeringkatCaleg
+from .recap import get_rollup
+
+_options_cache = VersionedCache(Caleg, Partai, DapilRI)
+_stats_cache = VersionedCache(
+    DetailSuaraCaleg, SuaraPartai, RekapSuara, Caleg, Partai, DapilRI, KabupatenKota, Kecamatan, maxsize=2000
+)
+
+# Jumlah kecamatan terbaik yang dikirim untuk popup peringkat
+TOP_N = 10
+
+
+def _build_options():
+    calegs = {}
+    for c_id, no, nama, partai_id, dapil_id in Caleg.objects.order_by('no_urut').values_list(
+        'id', 'no_urut', 'nama', 'partai_id', 'daerah_pemilihan_id'
+    ):
+        calegs.setdefault((dapil_id, partai_id), []).append([c_id, no, nama])
+    return {
+        'dapil': [
+            {
+                'id': d.id, 'nama': d.nama,
+                'partai': [
+                    {'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama, 'caleg': calegs[(d.id, p.id)]}
+                    for p in get_partai_list() if (d.id, p.id) in calegs
+                ],
+            } for d in get_dapil_ri().values()
+        ],
+    }
+
+
+def get_caleg_options():
+    """Pilihan caleg untuk picker peta: dapil -> partai -> [id, no_urut, nama]."""
+    return _options_cache.get('options', _build_options)
+
+
+def _permil(v, total):
+    return round(v * 1000 / total) if total else 0
+
+
+def _build_stats(caleg_id):
+    caleg = Caleg.objects.filter(pk=caleg_id).values('id', 'no_urut', 'nama', 'partai_id', 'daerah_pemilihan_id').first()
+    if caleg is None:
+        return None
+    w = get_wilayah()
+    dapil = get_dapil_ri().get(caleg['daerah_pemilihan_id'])
+    partai = next((p for p in get_partai_list() if p.id == caleg['partai_id']), None)
+
+    # Indeks caleg-first: satu range scan untuk caleg ini
+    suara = dict(DetailSuaraCaleg.objects.filter(caleg_id=caleg_id).values_list('rekap_suara__kecamatan_id', 'jumlah_suara'))
+    rollup = get_rollup('pileg_ri')
+
+    kab_ids = dapil.kabupaten_ids if dapil else ()
+    kecamatan, kabupaten = [], []
+    for kab_id in kab_ids:
+        kab_suara = kab_sah = 0
+        for kec_id in w.kabupaten[kab_id].kecamatan_ids:
+            v = suara.get(kec_id) or 0
+            row = rollup.get(kec_id)
+            sah = sum(row.suara.values()) if row else 0
+            kab_suara += v
+            kab_sah += sah
+            kecamatan.append([kec_id, v, _permil(v, sah)])
+        kabupaten.append([kab_id, kab_suara, _permil(kab_suara, kab_sah)])
+
+    top = sorted(kecamatan, key=lambda r: (-r[1], -r[2], r[0]))[:TOP_N]
+    peringkat = PeringkatCaleg.objects.filter(pk=caleg_id).values('peringkat', 'terpilih').first() or {}
+    return {
+        'caleg': {
+            'id': caleg['id'], 'no_urut': caleg['no_urut'], 'nama': caleg['nama'],
+            'total': sum(r[1] for r in kecamatan),
+            'peringkat': peringkat.get('peringkat'), 'terpilih': peringkat.get('terpilih', False),
+        },
+        'partai': {'id': partai.id, 'nama': partai.nama, 'warna': partai.warna_hex} if partai else None,
+        'dapil': {'id': dapil.id, 'nama': dapil.nama} if dapil else None,
+        # [id wilayah, suara, share per mil terhadap suara sah wilayah]
+        'kecamatan': kecamatan,
+        'kabupaten': kabupaten,
+        'top': [
+            [kec_id, w.kecamatan[kec_id].nama, w.kabupaten[w.kecamatan[kec_id].kabupaten_id].nama, v, share]
+            for kec_id, v, share in top if v
+        ],
+    }
+
+
+def get_caleg_stats(caleg_id):
+    """Statistik choropleth satu caleg (None bila caleg tidak ada)."""
+    return _stats_cache.get(caleg_id, lambda: _build_stats(caleg_id))
@@ -0,0 +1,75 @@
+"""
+Pencarian wilayah dengan profil suara paling mirip ("kecamatan mana yang memilih paling mirip dengan ini?").
+
+Indeks per level (kecamatan / kabupaten) dibangun sekali per versi data dari rollup (geojson.recap):
+matriks wilayah x fitur [share paslon, share partai, partisipasi, rasio tidak sah] hasil
+geojson.klaster.fitur_profil, distandarisasi per kolom dan diberi bobot per blok (core.klaster).
+Baris juga disimpan dalam bentuk ter-normalisasi (panjang 1), sehingga satu query cukup satu
+perkalian matriks-vektor (N x F) + argpartition untuk top-k: cosine = U @ u, Euclid dari
+||a||^2 - 2 a.b + ||b||^2. Untuk ~7.000 kecamatan nasional x ~30 fitur itu di bawah 1 ms.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from core import klaster as engine
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.refdata import get_wilayah
+from core.versioning import VersionedCache
+from .klaster import fitur_profil, per_kabupaten
+from .recap import get_rollup, SEMUA_SUMBER
+
+METRIK = ('cosine', 'euclid')
+K_DEFAULT = 10
+K_MAX = 50
+
+# ids (N,), posisi {id: baris}, z (N, F) fitur terstandar, unit (N, F) z / ||z||, norma2 (N,) ||z||^2
+IndeksMirip = namedtuple('IndeksMirip', 'ids posisi z unit norma2')
+
+_cache = VersionedCache(*SEMUA_SUMBER, Partai, KabupatenKota, Kecamatan)
+
+
+def _bangun(level):
+    w = get_wilayah()
+    pilpres, pileg = get_rollup('pilpres'), get_rollup('pileg_ri')
+    if level == 'kabupaten':
+        pilpres, pileg = per_kabupaten(pilpres), per_kabupaten(pileg)
+        ids = sorted(k for k in pilpres.keys() | pileg.keys() if k in w.kabupaten)
+    else:
+        ids = sorted(k for k in pilpres.keys() | pileg.keys() if k in w.kecamatan)
+    x, blok = fitur_profil(pilpres, pileg, ids, tidak_sah=True)
+    z = engine.standarisasi(x, blok)[0]
+    norma2 = (z ** 2).sum(axis=1)
+    norma = np.sqrt(norma2)
+    unit = z / np.where(norma > 0, norma, 1)[:, None]
+    return IndeksMirip(np.array(ids, dtype=np.int64), {r: i for i, r in enumerate(ids)}, z, unit, norma2)
+
+
+def get_indeks(level='kecamatan'):
+    """IndeksMirip untuk level 'kecamatan' / 'kabupaten', di-cache per versi data."""
+    return _cache.get(level, lambda: _bangun(level))
+
+
+def cari_mirip(level, region_id, k=K_DEFAULT, metrik='cosine'):
+    """
+    [(region_id, skor)] k wilayah paling mirip dengan `region_id` (tidak termasuk dirinya), urut
+    dari yang paling mirip. Skor cosine -1..1 (makin besar makin mirip), Euclid = jarak (makin
+    kecil makin mirip). None bila wilayah belum punya rekap.
+    """
+    indeks = get_indeks(level)
+    i = indeks.posisi.get(region_id)
+    if i is None:
+        return None
+    if len(indeks.ids) < 2:
+        return []
+    k = max(1, min(k, len(indeks.ids) - 1))
+    if metrik == 'euclid':
+        nilai = np.sqrt(np.maximum(indeks.norma2 - 2 * indeks.z @ indeks.z[i] + indeks.norma2[i], 0.0))
+        kunci = nilai.copy()
+    else:
+        nilai = indeks.unit @ indeks.unit[i]
+        kunci = -nilai
+    kunci[i] = np.inf
+    calon = np.argpartition(kunci, k - 1)[:k]
+    calon = calon[np.argsort(kunci[calon], kind='stable')]
+    return [(int(indeks.ids[j]), round(float(nilai[j]), 4)) for j in calon]
@@ -0,0 +1,173 @@
+"""
+Profil pemilih per wilayah untuk mode peta "Analisis Pemetaan" (mesin: core.klaster).
+
+Setiap kecamatan yang sudah punya rekap (Pilpres dan/atau Pileg RI) menjadi satu vektor:
+  [share paslon..., share partai..., partisipasi Pilpres, partisipasi Pileg RI]
+(share = suara / suara sah, partisipasi = (sah + tidak sah) / DPT). Kecamatan dikelompokkan
+dengan k-means (k dipilih lewat silhouette), klaster diurutkan dari anggota terbanyak.
+Kabupaten/kota tidak diklaster ulang: vektor gabungannya dipetakan ke centroid terdekat,
+jadi legenda kedua level sama. Label dan centroid di-cache per versi data.
+"""
+import warnings
+
+import numpy as np
+
+from core import klaster as engine
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.refdata import get_partai_list, get_wilayah
+from core.versioning import VersionedCache
+from pilpres_2024.refdata import get_paslon_list
+from .recap import get_rollup, SEMUA_SUMBER
+
+# Warna klaster (kualitatif, sengaja tidak memakai warna paslon/partai)
+WARNA_KLASTER = ('#1f77b4', '#ff7f0e', '#2ca02c', '#9467bd', '#8c564b', '#e377c2', '#17becf', '#bcbd22')
+
+# Jumlah partai teratas yang ditampilkan per profil / per wilayah
+TOP_PARTAI = 3
+
+_cache = VersionedCache(*SEMUA_SUMBER, Partai, KabupatenKota, Kecamatan)
+
+
+def _share(suara, sah):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(sah[:, None] > 0, suara / np.where(sah > 0, sah, 1)[:, None], np.nan)
+
+
+def _vektor(rollups, ids, kolom):
+    """(share (N, P), partisipasi (N,), rasio tidak sah (N,)) satu pemilu; baris tanpa rekap = NaN."""
+    suara = np.full((len(ids), len(kolom)), np.nan)
+    sts, dpt = np.full(len(ids), np.nan), np.full(len(ids), np.nan)
+    for i, region_id in enumerate(ids):
+        row = rollups.get(region_id)
+        if row is not None:
+            suara[i] = [row.suara.get(c, 0) for c in kolom]
+            sts[i], dpt[i] = row.sts, row.dpt
+    sah = suara.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        partisipasi = np.where(dpt > 0, (sah + sts) / np.where(dpt > 0, dpt, 1), np.nan)
+        tidak_sah = np.where(sah + sts > 0, sts / np.where(sah + sts > 0, sah + sts, 1), np.nan)
+    return _share(suara, sah), partisipasi, tidak_sah
+
+
+class _Agregat:
+    __slots__ = ('suara', 'sts', 'dpt')
+
+    def __init__(self):
+        self.suara, self.sts, self.dpt = {}, 0, 0
+
+
+def per_kabupaten(rollup):
+    """Rollup kecamatan dijumlah per kabupaten: {kab_id: _Agregat} (atribut sama dengan rollup)."""
+    w = get_wilayah()
+    hasil = {}
+    for kec_id, row in rollup.items():
+        kec = w.kecamatan.get(kec_id)
+        if kec is None:
+            continue
+        agg = hasil.setdefault(kec.kabupaten_id, _Agregat())
+        agg.sts += row.sts
+        agg.dpt += row.dpt
+        for key, v in row.suara.items():
+            agg.suara[key] = agg.suara.get(key, 0) + v
+    return hasil
+
+
+def fitur_profil(pilpres, pileg, ids, tidak_sah=False):
+    """
+    (x (N, F), blok) fitur mentah wilayah `ids` dari rollup Pilpres & Pileg RI (NaN = tidak ada rekap):
+    [share paslon..., share partai..., partisipasi Pilpres, partisipasi Pileg RI(, tidak sah Pilpres, Pileg RI)].
+    """
+    paslon_ids = [p.id for p in get_paslon_list()]
+    partai_ids = [p.id for p in get_partai_list()]
+    sx, tx, ux = _vektor(pilpres, ids, paslon_ids)
+    sy, ty, uy = _vektor(pileg, ids, partai_ids)
+    kolom = [sx, sy, tx[:, None], ty[:, None]]
+    blok = [len(paslon_ids), len(partai_ids), 2]
+    if tidak_sah:
+        kolom += [ux[:, None], uy[:, None]]
+        blok.append(2)
+    return np.hstack(kolom), tuple(blok)
+
+
+def _profil(raw):
+    """Ringkasan satu vektor fitur mentah (NaN = tidak ada data): share paslon, partai teratas, partisipasi."""
+    paslon, partai = get_paslon_list(), get_partai_list()
+    n_p, n_q = len(paslon), len(partai)
+    r = lambda v: round(float(v) * 100, 1) if np.isfinite(v) else None
+    share_q = raw[n_p:n_p + n_q]
+    urut = [j for j in np.argsort(-np.nan_to_num(share_q, nan=-1), kind='stable') if np.isfinite(share_q[j])][:TOP_PARTAI]
+    return {
+        'paslon': [r(raw[c]) for c in range(n_p)],
+        'partai': [[partai[j].id, r(share_q[j])] for j in urut],
+        'partisipasi': [r(raw[n_p + n_q]), r(raw[n_p + n_q + 1])],
+    }
+
+
+def _hitung():
+    w = get_wilayah()
+    pilpres, pileg = get_rollup('pilpres'), get_rollup('pileg_ri')
+    kec_ids = sorted(k for k in pilpres.keys() | pileg.keys() if k in w.kecamatan)
+    x, blok = fitur_profil(pilpres, pileg, kec_ids)
+    z, rata, sd, bobot = engine.standarisasi(x, blok)
+    k, label, centroid, sil = engine.pilih_k(z)
+
+    # Urutkan klaster dari anggota terbanyak (Profil 1 = paling umum)
+    jumlah = np.bincount(label, minlength=k) if k else np.zeros(0, dtype=np.int64)
+    urutan = np.argsort(-jumlah, kind='stable')
+    posisi = np.empty(k, dtype=np.int64)
+    posisi[urutan] = np.arange(k)
+    label, centroid, jumlah = posisi[label], centroid[urutan], jumlah[urutan]
+
+    # Centroid dalam satuan asli = rata-rata anggota (kolom tanpa data diabaikan)
+    klaster = []
+    for c in range(k):
+        anggota = x[label == c]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            ada = np.isfinite(anggota).any(axis=0)
+            raw = np.where(ada, np.nanmean(np.where(ada, anggota, 0), axis=0), np.nan)
+        klaster.append({'no': c + 1, 'warna': WARNA_KLASTER[c % len(WARNA_KLASTER)], 'jumlah': int(jumlah[c]), **_profil(raw)})
+
+    def petakan(ids, xs):
+        lbl, jarak = engine.terdekat(engine.terapkan(xs, rata, sd, bobot), centroid)
+        return {
+            region_id: {
+                'warna': WARNA_KLASTER[lbl[i] % len(WARNA_KLASTER)],
+                # Makin dekat ke centroid makin pekat (wilayah "khas" profilnya)
+                'fill_opacity': round(0.85 - 0.4 * min(float(jarak[i]) / 3, 1), 2),
+                'klaster': int(lbl[i]) + 1,
+                'jarak': round(float(jarak[i]), 2),
+                **_profil(xs[i]),
+            }
+            for i, region_id in enumerate(ids)
+        }
+
+    kab_pilpres, kab_pileg = per_kabupaten(pilpres), per_kabupaten(pileg)
+    kab_ids = sorted(kab_pilpres.keys() | kab_pileg.keys())
+    xk, _ = fitur_profil(kab_pilpres, kab_pileg, kab_ids)
+
+    return {
+        'recap': {
+            'k': k, 'kecamatan': len(kec_ids), 'silhouette': round(sil, 3), 'klaster': klaster,
+            'paslon': [{'no_urut': p.no_urut, 'nama': p.nama_capres, 'warna': p.warna_hex} for p in get_paslon_list()],
+            'partai': {p.id: {'nama': p.nama, 'warna': p.warna_hex} for p in get_partai_list()},
+        },
+        # Kecamatan: centroid terdekat = label k-means (iterasi Lloyd berhenti saat label stabil)
+        'kecamatan': petakan(kec_ids, x) if k else {},
+        'kabupaten': petakan(kab_ids, xk) if k else {},
+    }
+
+
+def get_klaster():
+    """{'recap': {k, kecamatan, silhouette, klaster: [...]}, 'kecamatan': {...}, 'kabupaten': {...}}."""
+    return _cache.get('klaster', _hitung)
+
+
+def get_peta_klaster(level):
+    """{region_id: {warna, fill_opacity, klaster, jarak, paslon, partai, partisipasi}} ('kokab' / 'kecamatan')."""
+    return get_klaster()['kecamatan' if level == 'kecamatan' else 'kabupaten']
+
+
+def get_recap_klaster():
+    """Blok rekap footer mode analisis: profil (centroid) tiap klaster."""
+    return get_klaster()['recap']
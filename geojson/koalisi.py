@@ -0,0 +1,166 @@
+"""
+Analisis lintas pemilu: suara partai koalisi (Pileg RI) vs suara paslon (Pilpres) per wilayah.
+
+Kecamatan yang punya rekap di kedua pemilu disusun menjadi dua matriks selaras wilayah x paslon:
+  x = share paslon di Pilpres, y = share gabungan partai koalisinya (KoalisiPilpres) di Pileg RI
+(y = suara partai @ matriks keanggotaan koalisi). Dari situ, per paslon sekaligus:
+  - korelasi Pearson x vs y antar kecamatan,
+  - rasio split-ticket x / y (di atas 1 = paslon lebih kuat dari koalisinya),
+  - regresi x ~ a + b*y dan residual ter-standar (kecamatan yang menyimpang dari pola provinsi),
+ditambah indeks split per wilayah = 1/2 * sum|x - y| (0 = pemilih koalisi konsisten).
+Hasil di-cache per versi data.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.refdata import get_partai_list, get_wilayah
+from core.versioning import VersionedCache
+from pilpres_2024.models import KoalisiPilpres
+from pilpres_2024.refdata import get_paslon_list
+from .recap import get_rollup, SEMUA_SUMBER
+
+# Per paslon (urut no_urut): korelasi, r2, intercept, slope, share paslon & koalisi (agregat), rasio agregat
+RingkasanKoalisi = namedtuple('RingkasanKoalisi', 'paslon partai korelasi r2 intercept slope share_paslon share_koalisi rasio')
+
+_cache = VersionedCache(
+    *SEMUA_SUMBER, KoalisiPilpres, Partai, KabupatenKota, Kecamatan
+)
+
+
+def _matriks(level):
+    """(region_ids, suara paslon (R, C), sah pilpres (R,), suara koalisi (R, C), sah pileg (R,))."""
+    w = get_wilayah()
+    paslon = get_paslon_list()
+    partai_ids = [p.id for p in get_partai_list()]
+    kolom = {pid: j for j, pid in enumerate(partai_ids)}
+    # Keanggotaan koalisi: (partai, paslon)
+    anggota = np.zeros((len(partai_ids), len(paslon)))
+    for c, p in enumerate(paslon):
+        for pid in p.koalisi_ids:
+            if pid in kolom:
+                anggota[kolom[pid], c] = 1
+
+    pilpres, pileg = get_rollup('pilpres'), get_rollup('pileg_ri')
+    kec_ids = [k for k in sorted(pilpres.keys() & pileg.keys()) if k in w.kecamatan]
+    x = np.array([[pilpres[k].suara.get(p.id, 0) for p in paslon] for k in kec_ids], dtype=np.float64).reshape(len(kec_ids), len(paslon))
+    s = np.array([[pileg[k].suara.get(pid, 0) for pid in partai_ids] for k in kec_ids], dtype=np.float64).reshape(len(kec_ids), len(partai_ids))
+    y = s @ anggota
+    sah_x, sah_y = x.sum(axis=1), s.sum(axis=1)
+
+    if level == 'kabupaten':
+        kab_ids = sorted({w.kecamatan[k].kabupaten_id for k in kec_ids})
+        idx = np.searchsorted(kab_ids, [w.kecamatan[k].kabupaten_id for k in kec_ids])
+
+        def agregat(a):
+            out = np.zeros((len(kab_ids), *a.shape[1:]))
+            np.add.at(out, idx, a)
+            return out
+        return kab_ids, agregat(x), agregat(sah_x), agregat(y), agregat(sah_y)
+    return kec_ids, x, sah_x, y, sah_y
+
+
+def _share(v, total):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total[:, None] > 0, v / np.where(total > 0, total, 1)[:, None], np.nan)
+
+
+def _hitung(level):
+    region_ids, x, sah_x, y, sah_y = _matriks(level)
+    paslon = get_paslon_list()
+    partai = {p.id: p for p in get_partai_list()}
+    sx, sy = _share(x, sah_x), _share(y, sah_y)
+    valid = np.isfinite(sx).all(axis=1) & np.isfinite(sy).all(axis=1)
+    n = int(valid.sum())
+
+    # Korelasi & regresi per kolom (paslon), hanya wilayah yang valid di kedua pemilu
+    vx, vy = sx[valid], sy[valid]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dx, dy = vx - vx.mean(axis=0), vy - vy.mean(axis=0)
+        cov = (dx * dy).sum(axis=0)
+        var_x, var_y = (dx ** 2).sum(axis=0), (dy ** 2).sum(axis=0)
+        korelasi = cov / np.sqrt(var_x * var_y)
+        slope = np.where(var_y > 0, cov / np.where(var_y > 0, var_y, 1), 0.0)
+        intercept = vx.mean(axis=0) - slope * vy.mean(axis=0) if n else np.zeros(len(paslon))
+        residual = sx - (intercept + slope * sy)
+        sd = np.nanstd(residual[valid], axis=0, ddof=1) if n > 1 else np.zeros(len(paslon))
+        residual_z = np.where(sd > 0, residual / np.where(sd > 0, sd, 1), 0.0)
+        rasio = np.where(sy > 0, sx / np.where(sy > 0, sy, 1), np.nan)
+    split = 0.5 * np.abs(sx - sy).sum(axis=1)
+
+    total_x, total_y = x[valid].sum(axis=0), y[valid].sum(axis=0)
+    share_x = total_x / max(sah_x[valid].sum(), 1)
+    share_y = total_y / max(sah_y[valid].sum(), 1)
+    ringkasan = [
+        RingkasanKoalisi(
+            p, [partai[pid] for pid in p.koalisi_ids if pid in partai],
+            float(np.nan_to_num(korelasi[c])), float(np.nan_to_num(korelasi[c]) ** 2),
+            float(np.nan_to_num(intercept[c])), float(slope[c]),
+            float(share_x[c]), float(share_y[c]), float(share_x[c] / share_y[c]) if share_y[c] else None,
+        ) for c, p in enumerate(paslon)
+    ]
+    r = lambda v: round(float(v), 4) if np.isfinite(v) else None
+    wilayah = {
+        region_id: {
+            'split': r(split[i]),
+            # Per paslon: [share pilpres, share koalisi pileg, rasio, residual z]
+            'paslon': [[r(sx[i, c]), r(sy[i, c]), r(rasio[i, c]), r(residual_z[i, c])] for c in range(len(paslon))],
+        }
+        for i, region_id in enumerate(region_ids) if valid[i]
+    }
+    return {'n': n, 'ringkasan': ringkasan, 'wilayah': wilayah}
+
+
+def get_analisis_koalisi(level='kecamatan'):
+    """
+    Analisis koalisi vs paslon untuk level 'kecamatan' / 'kabupaten':
+    {'n', 'ringkasan': [RingkasanKoalisi], 'wilayah': {region_id: {split, paslon: [[x, y, rasio, z]]}}}.
+    """
+    return _cache.get(level, lambda: _hitung(level))
+
+
+# ==============================================================================
+# DATA PETA
+# ==============================================================================
+
+def get_peta_koalisi(level):
+    """
+    {region_id: {warna, fill_opacity, split, paslon}} untuk mode peta koalisi ('kokab' / 'kecamatan').
+    Warna = paslon yang paling unggul dari koalisinya (x - y terbesar); opacity = indeks split.
+    """
+    level = 'kecamatan' if level == 'kecamatan' else 'kabupaten'
+    return _cache.get(('peta', level), lambda: _hitung_peta(level))
+
+
+def _hitung_peta(level):
+    analisis = get_analisis_koalisi(level)
+    paslon = get_paslon_list()
+    hasil = {}
+    for region_id, row in analisis['wilayah'].items():
+        selisih = [(x - y) if x is not None and y is not None else -1 for x, y, _, _ in row['paslon']]
+        c = int(np.argmax(selisih)) if selisih else None
+        hasil[region_id] = {
+            'warna': paslon[c].warna_hex if c is not None else '#808080',
+            # Split 0 -> pudar, split >= 0.3 -> pekat
+            'fill_opacity': round(0.25 + 0.65 * min((row['split'] or 0) / 0.3, 1), 2),
+            **row,
+        }
+    return hasil
+
+
+def get_recap_koalisi():
+    """Blok rekap footer mode koalisi: ringkasan per paslon (tingkat kecamatan, seluruh provinsi)."""
+    analisis = get_analisis_koalisi('kecamatan')
+    return {
+        'kecamatan': analisis['n'],
+        'paslon': [
+            {
+                'id': r.paslon.id, 'no_urut': r.paslon.no_urut, 'nama': r.paslon.nama_capres, 'warna': r.paslon.warna_hex,
+                'koalisi': [p.nama for p in r.partai],
+                'korelasi': round(r.korelasi, 3), 'slope': round(r.slope, 3),
+                'share_paslon': round(r.share_paslon * 100, 2), 'share_koalisi': round(r.share_koalisi * 100, 2),
+                'rasio': round(r.rasio, 3) if r.rasio is not None else None,
+            } for r in analisis['ringkasan']
+        ],
+    }
@@ -0,0 +1,59 @@
+"""
+Reverse geocoding koordinat -> kabupaten/kota & kecamatan (mesin: core.lokasi).
+
+Poligon Batas Kokab / Batas Kecamatan dikemas sekali per versi data menjadi array datar
+beserta bbox dan grid indeksnya, sehingga satu query (atau ribuan titik check-in lapangan /
+koordinat TPS sekaligus) tidak mem-parse GeoJSON lagi. Kecamatan dicari lebih dulu; kabupaten
+diambil dari induk kecamatan itu agar keduanya selalu konsisten, dan baru dicari dari poligon
+kabupaten bila titik tidak jatuh di kecamatan mana pun (batas kecamatan belum lengkap).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from core import lokasi as engine
+from core.models import KabupatenKota, Kecamatan
+from core.refdata import get_wilayah
+from core.versioning import VersionedCache
+from .models import KabupatenGeoJSON, KecamatanGeoJSON
+from .tetangga import _poligon
+
+TITIK_MAKS = 10000
+
+# ids (N,) id wilayah, indeks core.lokasi.IndeksPoligon atas baris 0..N-1
+IndeksLokasi = namedtuple('IndeksLokasi', 'ids indeks')
+
+_cache = VersionedCache(KabupatenGeoJSON, KecamatanGeoJSON, KabupatenKota, Kecamatan)
+
+
+def _bangun(level):
+    ids, cincin = _poligon(level)
+    return IndeksLokasi(np.array(ids, dtype=np.int64), engine.kemas(cincin))
+
+
+def get_indeks(level):
+    """IndeksLokasi level 'kabupaten' / 'kecamatan' (hanya wilayah yang punya poligon)."""
+    return _cache.get(level, lambda: _bangun(level))
+
+
+def _cari(level, lon, lat):
+    idx = get_indeks(level)
+    baris = engine.cari(idx.indeks, lon, lat)
+    return np.where(baris >= 0, idx.ids[np.maximum(baris, 0)] if len(idx.ids) else 0, 0)
+
+
+def cari_wilayah(lat, lon):
+    """
+    (kabupaten_ids (P,), kecamatan_ids (P,)) untuk titik lat/lon (skalar atau array);
+    0 = tidak ditemukan di wilayah mana pun.
+    """
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    kecamatan = _cari('kecamatan', lon, lat)
+
+    wilayah = get_wilayah()
+    induk = np.array([wilayah.kecamatan[k].kabupaten_id if k in wilayah.kecamatan else 0 for k in kecamatan.tolist()], dtype=np.int64)
+    sisa = np.flatnonzero(induk == 0)
+    if len(sisa):
+        induk[sisa] = _cari('kabupaten', lon[sisa], lat[sisa])
+    return induk, kecamatan
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from geojson.tetangga import sinkronkan
+
+
+class Command(BaseCommand):
+    help = (
+        "Hitung ulang graf ketetanggaan (berbagi sisi batas) dari Batas Kokab / Batas Kecamatan "
+        "ke tabel Tetangga Wilayah. Hanya pasangan yang berubah yang ditulis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--level', choices=['kokab', 'kecamatan', 'semua'], default='semua')
+
+    def handle(self, *args, **opts):
+        levels = ['kabupaten', 'kecamatan'] if opts['level'] == 'semua' else [
+            'kabupaten' if opts['level'] == 'kokab' else 'kecamatan'
+        ]
+        for level in levels:
+            mulai = time.monotonic()
+            ditulis, dihapus = sinkronkan(level)
+            self.stdout.write(self.style.SUCCESS(
+                f"{level}: {ditulis} pasangan ditulis, {dihapus} dihapus ({time.monotonic() - mulai:.1f} dtk)"
+            ))
@@ -0,0 +1,114 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.matcher import get_region_index
+from core.refdata import get_wilayah
+from core.versioning import bump_data_version
+from geojson.models import KabupatenGeoJSON, KecamatanGeoJSON
+from geojson.tetangga import sinkronkan as sinkronkan_tetangga
+
+# Nama properti yang lazim di GeoJSON batas wilayah (BIG/RBI, GADM, Kemendagri)
+DEFAULT_KOLOM = {
+    'kokab': {'nama': ('WADMKK', 'NAMOBJ', 'NAME_2', 'nama', 'kabupaten'), 'induk': (), 'kode': ('KDPKAB', 'kode')},
+    'kecamatan': {'nama': ('WADMKC', 'NAMOBJ', 'NAME_3', 'nama', 'kecamatan'), 'induk': ('WADMKK', 'NAME_2', 'kabupaten'), 'kode': ('KDCPUM', 'kode')},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Impor batas wilayah dari FeatureCollection GeoJSON ke Batas Kokab / Batas Kecamatan. "
+        "Wilayah dicocokkan lewat kode Kemendagri bila ada, selain itu lewat nama (fuzzy, dibatasi kabupaten induk)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="File GeoJSON (FeatureCollection)")
+        parser.add_argument('--level', choices=['kokab', 'kecamatan'], default='kecamatan')
+        parser.add_argument('--kolom-nama', help="Properti nama wilayah")
+        parser.add_argument('--kolom-induk', help="Properti nama kabupaten induk (level kecamatan)")
+        parser.add_argument('--kolom-kode', help="Properti kode wilayah Kemendagri")
+        parser.add_argument('--timpa', action='store_true', help="Timpa GeoJSON yang sudah terisi")
+        parser.add_argument('--dry-run', action='store_true', help="Tampilkan hasil pencocokan tanpa menyimpan")
+
+    def _kolom(self, props, opsi, kandidat):
+        if opsi:
+            return props.get(opsi)
+        return next((props[k] for k in kandidat if props.get(k)), None)
+
+    def _resolve(self, props, level, opts):
+        """(id wilayah, pesan error)."""
+        kolom = DEFAULT_KOLOM[level]
+        wilayah = get_wilayah()
+        kode = str(self._kolom(props, opts['kolom_kode'], kolom['kode']) or '').replace('.', '').strip()
+        if kode:
+            ref = wilayah.kode.get(kode)
+            if ref is not None and len(kode) == (4 if level == 'kokab' else 6):
+                return ref.id, None
+
+        nama = self._kolom(props, opts['kolom_nama'], kolom['nama'])
+        if not nama:
+            return None, "properti nama kosong"
+        if level == 'kokab':
+            index = get_region_index('kabupaten')
+            m = index.match(nama)
+            return m.id, None if m.id else index.laporan(nama, m)
+
+        parent_id = None
+        induk = self._kolom(props, opts['kolom_induk'], kolom['induk'])
+        if induk:
+            kab_index = get_region_index('kabupaten')
+            kab = kab_index.match(induk)
+            if kab.id is None:
+                return None, f"kabupaten {kab_index.laporan(induk, kab)}"
+            parent_id = kab.id
+        index = get_region_index('kecamatan')
+        m = index.match(nama, parent_id)
+        return m.id, None if m.id else index.laporan(nama, m)
+
+    def handle(self, *args, **opts):
+        level = opts['level']
+        try:
+            with open(opts['file'], encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Gagal membaca {opts['file']}: {e}")
+        features = data.get('features') if isinstance(data, dict) else None
+        if not features:
+            raise CommandError("File bukan FeatureCollection atau tidak berisi feature.")
+
+        cocok, gagal = {}, []
+        for i, feature in enumerate(features):
+            region_id, error = self._resolve(feature.get('properties') or {}, level, opts)
+            if error:
+                gagal.append(f"#{i}: {error}")
+            elif region_id in cocok:
+                gagal.append(f"#{i}: wilayah id={region_id} sudah dipakai feature #{cocok[region_id][0]}")
+            else:
+                cocok[region_id] = (i, feature)
+
+        self.stdout.write(f"{len(cocok)} feature cocok, {len(gagal)} gagal")
+        for msg in gagal:
+            self.stdout.write(f"  - {msg}")
+        if opts['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: tidak ada yang disimpan."))
+            return
+
+        model, fk = (KabupatenGeoJSON, 'kabupaten_id') if level == 'kokab' else (KecamatanGeoJSON, 'kecamatan_id')
+        existing = {getattr(o, fk): o for o in model.objects.filter(**{f'{fk}__in': list(cocok)})}
+        update, create = [], []
+        for region_id, (_, feature) in sorted(cocok.items()):
+            obj = existing.get(region_id)
+            if obj is None:
+                create.append(model(**{fk: region_id, 'geojson_data': feature}))
+            elif opts['timpa'] or not obj.geojson_data:
+                obj.geojson_data = feature
+                update.append(obj)
+        with transaction.atomic():
+            model.objects.bulk_update(update, ['geojson_data'], batch_size=100)
+            model.objects.bulk_create(create, batch_size=100)
+            bump_data_version(model)
+        self.stdout.write(self.style.SUCCESS(f"{len(create)} dibuat, {len(update)} diperbarui."))
+        if create or update:
+            ditulis, dihapus = sinkronkan_tetangga('kabupaten' if level == 'kokab' else 'kecamatan')
+            self.stdout.write(f"Graf tetangga: {ditulis} pasangan ditulis, {dihapus} dihapus.")
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from geojson.anomali import sinkronkan
+
+
+class Command(BaseCommand):
+    help = (
+        "Pindai ulang anomali rekap seluruh kecamatan ke tabel Anomali Kecamatan. Biasanya otomatis "
+        "setiap data rekap berubah; dipakai untuk isi awal setelah migrate atau setelah data diubah "
+        "langsung di database. Hanya baris yang berubah yang ditulis / dihapus."
+    )
+
+    def handle(self, *args, **opts):
+        mulai = time.monotonic()
+        ditulis, dihapus = sinkronkan()
+        self.stdout.write(self.style.SUCCESS(
+            f"{ditulis} anomali ditulis, {dihapus} dihapus ({time.monotonic() - mulai:.1f} dtk)"
+        ))
@@ -0,0 +1,139 @@
+"""
+Katalog metrik choropleth peta (?metrik=) dengan kelas yang dihitung di server (mesin: core.kelas).
+
+Metrik dihitung dari rollup (geojson.recap) untuk semua wilayah di level yang tampil
+(seluruh kabupaten/kota atau seluruh kecamatan provinsi), lalu dibagi k kelas dengan
+kuantil / interval sama / Jenks. Setiap wilayah menerima warna kelasnya; klien cukup
+melukis warna itu. Hasil di-cache per (metrik, level, klasifikasi, k) dan versi data.
+
+Kode metrik:
+  paslon_<id>, partai_<id>          share suara sah peserta
+  partisipasi_<mode>                (sah + tidak sah) / DPT
+  tidak_sah_<mode>                  tidak sah / (sah + tidak sah)
+  margin_<mode>                     (terbesar - kedua) / sah
+  enp_<mode>                        jumlah partai/paslon efektif 1 / sum(share^2) (Laakso-Taagepera)
+dengan <mode> = pilpres / pileg_ri.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from core import kelas as engine
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.refdata import get_partai_list
+from core.versioning import VersionedCache
+from pilpres_2024.refdata import get_paslon_list
+from .recap import SEMUA_SUMBER
+from .region import LEVELS, _rollup_level
+
+KLASIFIKASI = {'kuantil': 'Kuantil', 'interval': 'Interval Sama', 'jenks': 'Jenks (Natural Breaks)'}
+KELAS_DEFAULT = 5
+KELAS_MIN, KELAS_MAX = 3, 7
+
+PEMILU = {'pilpres': 'Pilpres', 'pileg_ri': 'Pileg RI'}
+
+# Warna ujung palet per jenis metrik (share peserta memakai warna peserta itu sendiri)
+WARNA_JENIS = {'partisipasi': '#1b7837', 'tidak_sah': '#b2182b', 'margin': '#6f42c1', 'enp': '#2166ac'}
+NAMA_JENIS = {
+    'partisipasi': 'Partisipasi', 'tidak_sah': 'Rasio Tidak Sah',
+    'margin': 'Margin Pemenang', 'enp': 'Jumlah Peserta Efektif',
+}
+
+Metrik = namedtuple('Metrik', 'kode nama grup mode jenis peserta_id warna persen')
+
+_cache = VersionedCache(*SEMUA_SUMBER, Partai, KabupatenKota, Kecamatan, maxsize=500)
+
+
+def get_katalog():
+    """{kode: Metrik} semua metrik yang tersedia (urut seperti ditampilkan di pemilih metrik)."""
+    katalog = {}
+    for p in get_paslon_list():
+        kode = f'paslon_{p.id}'
+        katalog[kode] = Metrik(kode, f'{p.no_urut:02d} {p.nama_capres}', 'Share Paslon (Pilpres)', 'pilpres', 'share', p.id, p.warna_hex, True)
+    for p in get_partai_list():
+        kode = f'partai_{p.id}'
+        katalog[kode] = Metrik(kode, p.nama, 'Share Partai (Pileg RI)', 'pileg_ri', 'share', p.id, p.warna_hex, True)
+    for jenis, nama in NAMA_JENIS.items():
+        for mode, pemilu in PEMILU.items():
+            kode = f'{jenis}_{mode}'
+            katalog[kode] = Metrik(kode, f'{nama} {pemilu}', nama, mode, jenis, None, WARNA_JENIS[jenis], jenis != 'enp')
+    return katalog
+
+
+def nilai_metrik(metrik, level):
+    """(region_ids, nilai (N,)) metrik untuk seluruh wilayah level itu yang punya rekap."""
+    rows = _rollup_level(metrik.mode, level)
+    ids = sorted(rows)
+    if metrik.mode == 'pilpres':
+        kolom = [p.id for p in get_paslon_list()]
+    else:
+        kolom = [p.id for p in get_partai_list()]
+    suara = np.array([[rows[r].suara.get(c, 0) for c in kolom] for r in ids], dtype=np.float64).reshape(len(ids), len(kolom))
+    sts = np.array([rows[r].sts for r in ids], dtype=np.float64)
+    dpt = np.array([rows[r].dpt for r in ids], dtype=np.float64)
+    sah = suara.sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = suara / np.where(sah > 0, sah, np.nan)[:, None]
+        if metrik.jenis == 'share':
+            nilai = share[:, kolom.index(metrik.peserta_id)]
+        elif metrik.jenis == 'partisipasi':
+            nilai = (sah + sts) / np.where(dpt > 0, dpt, np.nan)
+        elif metrik.jenis == 'tidak_sah':
+            nilai = sts / np.where(sah + sts > 0, sah + sts, np.nan)
+        elif metrik.jenis == 'margin':
+            dua = -np.sort(-np.nan_to_num(share), axis=1)[:, :2] if len(kolom) >= 2 else np.zeros((len(ids), 2))
+            nilai = np.where(sah > 0, dua[:, 0] - dua[:, 1], np.nan)
+        else:
+            nilai = 1 / (share ** 2).sum(axis=1)
+    return ids, nilai
+
+
+def _hitung(metrik, level, klasifikasi, k):
+    ids, nilai = nilai_metrik(metrik, level)
+    tepi = engine.BATAS[klasifikasi](nilai, k)
+    kelas = engine.klasifikasikan(nilai, tepi)
+    n_kelas = len(tepi) - 1
+    warna = engine.palet(metrik.warna, n_kelas) if n_kelas > 0 else []
+    skala = 100 if metrik.persen else 1
+    r = lambda v: round(float(v) * skala, 2)
+
+    wilayah = {
+        region_id: {'warna': warna[kelas[i]], 'fill_opacity': 0.8, 'nilai': r(nilai[i]), 'kelas': int(kelas[i]) + 1}
+        for i, region_id in enumerate(ids) if kelas[i] >= 0
+    }
+    jumlah = np.bincount(kelas[kelas >= 0], minlength=n_kelas) if n_kelas > 0 else []
+    return {
+        'wilayah': wilayah,
+        'legenda': {
+            'kode': metrik.kode, 'nama': metrik.nama, 'satuan': '%' if metrik.persen else '',
+            'klasifikasi': klasifikasi, 'nama_klasifikasi': KLASIFIKASI[klasifikasi],
+            # [warna, batas bawah, batas atas, jumlah wilayah] per kelas
+            'kelas': [[warna[c], r(tepi[c]), r(tepi[c + 1]), int(jumlah[c])] for c in range(n_kelas)],
+        },
+    }
+
+
+def get_peta_metrik(kode, level, klasifikasi='kuantil', k=KELAS_DEFAULT):
+    """
+    {'wilayah': {region_id: {warna, fill_opacity, nilai, kelas}}, 'legenda': {...}} untuk metrik `kode`
+    di level peta ('kokab' / 'kecamatan'); None bila kode / klasifikasi tidak dikenal.
+    """
+    metrik = get_katalog().get(kode)
+    if metrik is None or klasifikasi not in KLASIFIKASI:
+        return None
+    level = LEVELS.get(level, level)
+    k = max(KELAS_MIN, min(k, KELAS_MAX))
+    return _cache.get((kode, level, klasifikasi, k), lambda: _hitung(metrik, level, klasifikasi, k))
+
+
+def get_katalog_data():
+    """Pilihan metrik & klasifikasi untuk pemilih di header peta."""
+    grup = {}
+    for m in get_katalog().values():
+        grup.setdefault(m.grup, []).append([m.kode, m.nama])
+    return {
+        'grup': [{'nama': nama, 'metrik': isi} for nama, isi in grup.items()],
+        'klasifikasi': [[kode, nama] for kode, nama in KLASIFIKASI.items()],
+        'kelas_default': KELAS_DEFAULT,
+    }
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_kode_wilayah'),
+        ('geojson', '0002_alter_kabupatengeojson_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomaliKecamatan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pemilu', models.CharField(choices=[('pilpres', 'Pilpres'), ('pileg_ri', 'Pileg DPR RI'), ('lintas', 'Pilpres vs Pileg RI')], max_length=10, verbose_name='Pemilu')),
+                ('jenis', models.CharField(choices=[('partisipasi_lebih', 'Partisipasi > 100%'), ('partisipasi_ekstrem', 'Partisipasi Ekstrem'), ('tidak_sah', 'Rasio Tidak Sah Tidak Wajar'), ('selisih_total', 'Selisih Total Suara Pileg vs Pilpres'), ('share_menyimpang', 'Perolehan Menyimpang dari Kabupaten')], max_length=20, verbose_name='Jenis Anomali')),
+                ('nilai', models.FloatField(default=0, verbose_name='Nilai (%)')),
+                ('skor', models.FloatField(default=0, verbose_name='Skor Z (Robust)')),
+                ('peserta', models.CharField(blank=True, default='', max_length=100, verbose_name='Partai / Paslon')),
+                ('keterangan', models.CharField(blank=True, default='', max_length=255, verbose_name='Keterangan')),
+                ('kecamatan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomali_set', to='core.kecamatan', verbose_name='Kecamatan')),
+            ],
+            options={
+                'verbose_name': 'Anomali Rekap',
+                'verbose_name_plural': 'Anomali Rekap',
+                'indexes': [models.Index(fields=['pemilu', 'jenis'], name='geojson_anomali_jenis_idx')],
+                'unique_together': {('kecamatan', 'pemilu', 'jenis')},
+            },
+        ),
+    ]
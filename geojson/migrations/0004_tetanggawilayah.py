@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geojson', '0003_anomalikecamatan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TetanggaWilayah',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('kabupaten', 'Kabupaten/Kota'), ('kecamatan', 'Kecamatan')], max_length=10, verbose_name='Level')),
+                ('wilayah_id', models.PositiveIntegerField(verbose_name='ID Wilayah')),
+                ('tetangga_id', models.PositiveIntegerField(verbose_name='ID Tetangga')),
+                ('panjang_km', models.FloatField(default=0, verbose_name='Panjang Batas Bersama (km)')),
+            ],
+            options={
+                'verbose_name': 'Tetangga Wilayah',
+                'verbose_name_plural': 'Tetangga Wilayah',
+                'unique_together': {('level', 'wilayah_id', 'tetangga_id')},
+            },
+        ),
+    ]
@@ -55,3 +55,76 @@ class KecamatanGeoJSON(models.Model):
 
     def __str__(self):
         return f"Peta Wilayah - {self.kecamatan.nama}"
+
+
+# ==============================================================================
+# TABEL TURUNAN: ANOMALI REKAP PER KECAMATAN
+# ==============================================================================
+
+class AnomaliKecamatan(models.Model):
+    """
+    Tanda anomali rekap per kecamatan (tabel turunan, tidak diinput manual).
+    Dihitung ulang sekaligus untuk seluruh provinsi oleh geojson.anomali setiap data rekap
+    berubah; hanya baris yang berubah yang ditulis.
+    """
+    PEMILU_CHOICES = [
+        ('pilpres', 'Pilpres'),
+        ('pileg_ri', 'Pileg DPR RI'),
+        ('lintas', 'Pilpres vs Pileg RI'),
+    ]
+    JENIS_CHOICES = [
+        ('partisipasi_lebih', 'Partisipasi > 100%'),
+        ('partisipasi_ekstrem', 'Partisipasi Ekstrem'),
+        ('tidak_sah', 'Rasio Tidak Sah Tidak Wajar'),
+        ('selisih_total', 'Selisih Total Suara Pileg vs Pilpres'),
+        ('share_menyimpang', 'Perolehan Menyimpang dari Kabupaten'),
+    ]
+
+    kecamatan = models.ForeignKey(Kecamatan, on_delete=models.CASCADE, related_name='anomali_set', verbose_name="Kecamatan")
+    pemilu = models.CharField(max_length=10, choices=PEMILU_CHOICES, verbose_name="Pemilu")
+    jenis = models.CharField(max_length=20, choices=JENIS_CHOICES, verbose_name="Jenis Anomali")
+    nilai = models.FloatField(default=0, verbose_name="Nilai (%)")
+    skor = models.FloatField(default=0, verbose_name="Skor Z (Robust)")
+    # Untuk share_menyimpang: partai / paslon (no urut) dengan penyimpangan terbesar
+    peserta = models.CharField(max_length=100, blank=True, default='', verbose_name="Partai / Paslon")
+    keterangan = models.CharField(max_length=255, blank=True, default='', verbose_name="Keterangan")
+
+    class Meta:
+        verbose_name = "Anomali Rekap"
+        verbose_name_plural = "Anomali Rekap"
+        unique_together = ('kecamatan', 'pemilu', 'jenis')
+        indexes = [
+            models.Index(fields=['pemilu', 'jenis'], name='geojson_anomali_jenis_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kecamatan.nama} - {self.get_jenis_display()}"
+
+
+# ==============================================================================
+# TABEL TURUNAN: KETETANGGAAN WILAYAH
+# ==============================================================================
+
+class TetanggaWilayah(models.Model):
+    """
+    Graf ketetanggaan wilayah (berbagi sisi batas) dari poligon Batas Kokab / Batas Kecamatan.
+    Dihitung oleh geojson.tetangga (prefilter grid bbox), bukan diinput manual. Satu baris per
+    pasangan (wilayah_id < tetangga_id); id merujuk KabupatenKota atau Kecamatan sesuai level.
+    """
+    LEVEL_CHOICES = [
+        ('kabupaten', 'Kabupaten/Kota'),
+        ('kecamatan', 'Kecamatan'),
+    ]
+
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES, verbose_name="Level")
+    wilayah_id = models.PositiveIntegerField(verbose_name="ID Wilayah")
+    tetangga_id = models.PositiveIntegerField(verbose_name="ID Tetangga")
+    panjang_km = models.FloatField(default=0, verbose_name="Panjang Batas Bersama (km)")
+
+    class Meta:
+        verbose_name = "Tetangga Wilayah"
+        verbose_name_plural = "Tetangga Wilayah"
+        unique_together = ('level', 'wilayah_id', 'tetangga_id')
+
+    def __str__(self):
+        return f"{self.get_level_display()} {self.wilayah_id} - {self.tetangga_id}"
@@ -0,0 +1,89 @@
+"""
+Proyeksi hasil provinsi & kabupaten dari rekap yang sudah masuk (mesin: core.proyeksi).
+
+Strata = Kabupaten/Kota, bobot = TPSDPTPemilu.jumlah_dpt. Kecamatan yang sudah punya rekap
+diambil dari rollup (geojson.recap), DPT seluruh kecamatan dari TPSDPTPemilu. Hasil di-cache
+per versi data, jadi setelah satu rekap disimpan hanya request berikutnya yang menghitung ulang.
+"""
+import numpy as np
+
+from core import proyeksi as engine
+from core.models import Partai, KabupatenKota, Kecamatan, TPSDPTPemilu
+from core.refdata import get_partai_list, get_wilayah
+from core.versioning import VersionedCache
+from pilpres_2024.refdata import get_paslon_list
+from .recap import get_rollup, MODEL_SUMBER
+
+_cache = {mode: VersionedCache(*models, Partai, KabupatenKota, Kecamatan) for mode, models in MODEL_SUMBER.items()}
+
+
+def _peserta(mode):
+    if mode == 'pilpres':
+        return [{'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama_capres, 'warna': p.warna_hex} for p in get_paslon_list()]
+    return [{'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama, 'warna': p.warna_hex} for p in get_partai_list()]
+
+
+def _pct(v):
+    return round(float(v) * 100, 2)
+
+
+def _blok(peserta, proj, masuk_dpt, total_dpt, kec_masuk, kec_total):
+    """Ringkasan satu wilayah dari proyeksi suaranya (B+1, P)."""
+    share, bawah, atas = engine.ringkasan_share(proj)
+    a, b, margin, m_bawah, m_atas, peluang = engine.ringkasan_pemenang(proj)
+    return {
+        'kecamatan_masuk': kec_masuk, 'kecamatan_total': kec_total,
+        'cakupan_dpt': _pct(masuk_dpt / total_dpt) if total_dpt else 0.0,
+        'peserta': [
+            {**p, 'share': _pct(share[j]), 'bawah': _pct(bawah[j]), 'atas': _pct(atas[j]), 'suara': int(round(proj[0, j]))}
+            for j, p in enumerate(peserta)
+        ],
+        'pemenang': {
+            'id': peserta[a]['id'], 'runner_up': peserta[b]['id'] if b is not None else None,
+            'margin': _pct(margin), 'margin_bawah': _pct(m_bawah), 'margin_atas': _pct(m_atas),
+            'peluang': round(peluang * 100, 1),
+        } if peserta and proj[0].sum() > 0 else None,
+    }
+
+
+def _hitung(mode):
+    w = get_wilayah()
+    peserta = _peserta(mode)
+    rollup = get_rollup(mode)
+    dpt_all = dict(TPSDPTPemilu.objects.values_list('kecamatan_id', 'jumlah_dpt'))
+
+    kab_ids = list(w.kabupaten)
+    kab_idx = {k: i for i, k in enumerate(kab_ids)}
+    dpt_strata = np.zeros(len(kab_ids))
+    kec_total = np.zeros(len(kab_ids), dtype=np.int64)
+    for kec_id, kec in w.kecamatan.items():
+        dpt_strata[kab_idx[kec.kabupaten_id]] += dpt_all.get(kec_id) or 0
+        kec_total[kab_idx[kec.kabupaten_id]] += 1
+
+    # Sampel: kecamatan yang sudah masuk dan punya DPT (rasio suara / DPT terdefinisi)
+    sampel = [k for k in sorted(rollup) if k in w.kecamatan and (dpt_all.get(k) or 0) > 0]
+    suara = np.array([[rollup[k].suara.get(p['id'], 0) for p in peserta] for k in sampel], dtype=np.float64).reshape(len(sampel), len(peserta))
+    dpt = np.array([dpt_all[k] for k in sampel], dtype=np.float64)
+    strata = np.array([kab_idx[w.kecamatan[k].kabupaten_id] for k in sampel], dtype=np.int64)
+
+    proj, masuk = engine.proyeksi(suara, dpt, strata, dpt_strata)
+    dpt_masuk = np.bincount(strata, weights=dpt, minlength=len(kab_ids))
+    kec_masuk = np.bincount(strata, minlength=len(kab_ids))
+
+    return {
+        'mode': mode,
+        'n_boot': engine.N_BOOT,
+        'provinsi': _blok(peserta, proj.sum(axis=1), dpt.sum(), dpt_strata.sum(), len(sampel), int(kec_total.sum())),
+        'kabupaten': [
+            {
+                'id': kab_id, 'nama': w.kabupaten[kab_id].nama, 'ada_data': bool(masuk[i]),
+                **_blok(peserta, proj[:, i], dpt_masuk[i], dpt_strata[i], int(kec_masuk[i]), int(kec_total[i])),
+            }
+            for i, kab_id in enumerate(kab_ids)
+        ],
+    }
+
+
+def get_proyeksi(mode):
+    """Proyeksi 'pilpres' / 'pileg_ri' (provinsi + per kabupaten) dengan selang kepercayaan 95%."""
+    return _cache[mode].get('proyeksi', lambda: _hitung(mode))
@@ -0,0 +1,169 @@
+"""
+Lapisan rollup untuk rekapitulasi footer peta.
+
+Total per kecamatan (TPS, DPT, suara tidak sah, suara per paslon / per partai) dihitung sekali per
+versi data dengan GROUP BY, lalu rekap sebuah konteks (provinsi, kabupaten, dapil, prefix kode)
+cukup menjumlah baris kecamatan di konteks itu. Hasilnya tidak bergantung pada fitur geometri
+yang dikirim, jadi footer tetap benar walau peta difilter atau GeoJSON-nya belum lengkap.
+
+TPS/DPT hanya dihitung dari kecamatan yang sudah punya rekap, agar partisipasi tidak terdistorsi
+oleh kecamatan yang belum diinput.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.db.models import Sum
+
+from core.models import Partai, DapilRI, KabupatenKota, Kecamatan, TPSDPTPemilu
+from core.refdata import get_wilayah, get_dapil_ri, get_partai_list
+from core.versioning import VersionedCache
+from pilpres_2024.models import PaslonPilpres, RekapSuaraPilpres, DetailSuaraPaslon
+from pilpres_2024.refdata import get_paslon_list
+import pilegri_2024.models as pilegri
+from pilegri_2024.kursi import kursi_per_dapil
+
+# Satu baris rollup per kecamatan; suara = {paslon_id / partai_id: jumlah}
+KecamatanRollup = namedtuple('KecamatanRollup', 'tps dpt sts suara')
+
+# Model sumber rollup per mode (dipakai modul analisis lain sebagai kunci cache versi data)
+MODEL_SUMBER = {
+    'pilpres': (RekapSuaraPilpres, DetailSuaraPaslon, PaslonPilpres, TPSDPTPemilu),
+    'pileg_ri': (pilegri.RekapSuara, pilegri.SuaraPartai, pilegri.DetailSuaraCaleg, pilegri.Caleg, TPSDPTPemilu),
+}
+# Gabungan model sumber kedua mode
+SEMUA_SUMBER = tuple(dict.fromkeys(m for models in MODEL_SUMBER.values() for m in models))
+_rollup_cache = {mode: VersionedCache(*models) for mode, models in MODEL_SUMBER.items()}
+# Rekap per konteks juga bergantung pada pohon wilayah (kecamatan pindah kabupaten / dapil) dan metadata partai
+_recap_cache = {
+    mode: VersionedCache(*models, Partai, DapilRI, KabupatenKota, Kecamatan, maxsize=500)
+    for mode, models in MODEL_SUMBER.items()
+}
+
+
+def _build_rollup(rekap_rows, suara_rows):
+    tpsdpt = {k: (t, d) for k, t, d in TPSDPTPemilu.objects.values_list('kecamatan_id', 'jumlah_tps', 'jumlah_dpt')}
+    suara = {}
+    for kec_id, key, total in suara_rows:
+        per_kec = suara.setdefault(kec_id, {})
+        per_kec[key] = per_kec.get(key, 0) + (total or 0)
+    rows = {}
+    for kec_id, sts in rekap_rows:
+        tps, dpt = tpsdpt.get(kec_id, (0, 0))
+        rows[kec_id] = KecamatanRollup(tps or 0, dpt or 0, sts or 0, MappingProxyType(suara.get(kec_id, {})))
+    return MappingProxyType(rows)
+
+
+def _rollup_pilpres():
+    return _build_rollup(
+        RekapSuaraPilpres.objects.values_list('kecamatan_id', 'suara_tidak_sah'),
+        DetailSuaraPaslon.objects.values_list('rekap_suara__kecamatan_id', 'paslon_id').annotate(t=Sum('jumlah_suara')).order_by(),
+    )
+
+
+def _rollup_pileg_ri():
+    # Suara partai = suara partai saja + total suara caleg partai tersebut
+    suara_partai = pilegri.SuaraPartai.objects.values_list('rekap_suara__kecamatan_id', 'partai_id').annotate(t=Sum('jumlah_suara')).order_by()
+    suara_caleg = pilegri.DetailSuaraCaleg.objects.values_list('rekap_suara__kecamatan_id', 'caleg__partai_id').annotate(t=Sum('jumlah_suara')).order_by()
+    return _build_rollup(
+        pilegri.RekapSuara.objects.values_list('kecamatan_id', 'suara_tidak_sah'),
+        [*suara_partai, *suara_caleg],
+    )
+
+
+_BUILDERS = {'pilpres': _rollup_pilpres, 'pileg_ri': _rollup_pileg_ri}
+
+
+def get_rollup(mode):
+    """{kecamatan_id: KecamatanRollup} untuk 'pilpres' / 'pileg_ri', di-cache per versi data."""
+    return _rollup_cache[mode].get(mode, _BUILDERS[mode])
+
+
+# ==============================================================================
+# KONTEKS WILAYAH
+# ==============================================================================
+
+def get_konteks(request):
+    """
+    Konteks rekap dari parameter request (sama dengan filter get_geo_data):
+    ?kode=<prefix kode Kemendagri>, ?kab_id=, ?dapil_id=; tanpa parameter = provinsi.
+    """
+    kode = request.GET.get('kode', '').replace('.', '').strip()
+    if kode.isdigit():
+        return ('kode', kode)
+    for param in ('kab_id', 'dapil_id'):
+        value = request.GET.get(param, '')
+        if value.isdigit():
+            return (param, int(value))
+    return ('provinsi', None)
+
+
+def kecamatan_ids(konteks):
+    """Id kecamatan dalam konteks, diambil dari cache wilayah (tanpa query)."""
+    w = get_wilayah()
+    jenis, value = konteks
+    if jenis == 'kode':
+        return [k.id for k in w.kecamatan.values() if k.kode and k.kode.startswith(value)]
+    if jenis == 'kab_id':
+        kab = w.kabupaten.get(value)
+        return list(kab.kecamatan_ids) if kab else []
+    if jenis == 'dapil_id':
+        dapil = get_dapil_ri().get(value)
+        kab_ids = dapil.kabupaten_ids if dapil else ()
+        return [k for kab_id in kab_ids for k in w.kabupaten[kab_id].kecamatan_ids]
+    return list(w.kecamatan)
+
+
+# ==============================================================================
+# BLOK REKAP
+# ==============================================================================
+
+def _hitung_recap(mode, konteks):
+    rollup = get_rollup(mode)
+    tps = dpt = sts = kec_count = 0
+    suara = {}
+    for kec_id in kecamatan_ids(konteks):
+        row = rollup.get(kec_id)
+        if row is None:
+            continue
+        kec_count += 1
+        tps += row.tps
+        dpt += row.dpt
+        sts += row.sts
+        for key, v in row.suara.items():
+            suara[key] = suara.get(key, 0) + v
+
+    if mode == 'pilpres':
+        peserta = [
+            {'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama_capres, 'warna': p.warna_hex, 'suara': suara.get(p.id, 0)}
+            for p in get_paslon_list()
+        ]
+        key = 'paslon'
+    else:
+        peserta = [
+            {'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama, 'warna': p.warna_hex, 'logo_url': p.logo_url or '', 'suara': suara.get(p.id, 0)}
+            for p in get_partai_list()
+        ]
+        key = 'partai'
+        # Kursi hanya bermakna untuk dapil utuh: konteks provinsi (semua dapil) atau satu dapil
+        if konteks[0] in ('provinsi', 'dapil_id'):
+            per_dapil = kursi_per_dapil()
+            dapil_ids = per_dapil if konteks[0] == 'provinsi' else [konteks[1]]
+            for item in peserta:
+                item['kursi'] = sum(per_dapil.get(d, {}).get(item['id'], 0) for d in dapil_ids)
+    return {
+        'konteks': konteks[0],
+        'kecamatan': kec_count,
+        'tps': tps, 'dpt': dpt,
+        'sah': sum(suara.values()), 'sts': sts,
+        key: peserta,
+    }
+
+
+def get_recap(mode, konteks):
+    """
+    Blok rekap footer untuk mode ('pilpres' / 'pileg_ri') dan konteks (lihat get_konteks).
+    None untuk mode tanpa rollup.
+    """
+    if mode not in _BUILDERS:
+        return None
+    return _recap_cache[mode].get(konteks, lambda: _hitung_recap(mode, konteks))
@@ -0,0 +1,150 @@
+"""
+Data per wilayah untuk peta: warna + angka ringkas untuk semua fitur, detail lengkap per klik.
+
+Payload get_geo_data cukup membawa warna, opacity dan beberapa angka ringkas per fitur
+(get_ringkasan). Rincian popup (semua paslon / partai + caleg teratas per partai) baru diambil
+untuk satu wilayah yang diklik lewat /region_detail/ (get_region_detail).
+
+Keduanya dibangun dari rollup kecamatan (geojson.recap) yang di-cache per versi data; hanya
+peringkat caleg wilayah yang butuh satu GROUP BY tambahan, dan hasilnya ikut di-cache.
+"""
+from django.db.models import Sum
+
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.refdata import get_partai_list, get_wilayah
+from core.versioning import VersionedCache
+from pilpres_2024.refdata import get_paslon_list
+from pilpres_2024.winners import get_winners, warna_pemenang, fill_opacity as fill_opacity_pilpres
+from pilegri_2024.models import DetailSuaraCaleg
+from .recap import KecamatanRollup, get_rollup, MODEL_SUMBER
+
+# Level peta -> level rollup
+LEVELS = {'kokab': 'kabupaten', 'kecamatan': 'kecamatan'}
+
+# Jumlah caleg teratas per partai di popup wilayah
+TOP_CALEG = 3
+
+_ringkasan_cache = {mode: VersionedCache(*models, Partai, KabupatenKota, Kecamatan) for mode, models in MODEL_SUMBER.items()}
+_detail_cache = {
+    mode: VersionedCache(*models, Partai, KabupatenKota, Kecamatan, maxsize=2000)
+    for mode, models in MODEL_SUMBER.items()
+}
+
+
+def _rollup_level(mode, level):
+    """Rollup kecamatan apa adanya, atau dijumlah per kabupaten untuk level 'kabupaten'."""
+    rollup = get_rollup(mode)
+    if level == 'kecamatan':
+        return rollup
+    w = get_wilayah()
+    per_kab = {}
+    for kec_id, row in rollup.items():
+        kec = w.kecamatan.get(kec_id)
+        if kec is None:
+            continue
+        tps, dpt, sts, suara = per_kab.get(kec.kabupaten_id, (0, 0, 0, {}))
+        for key, v in row.suara.items():
+            suara[key] = suara.get(key, 0) + v
+        per_kab[kec.kabupaten_id] = (tps + row.tps, dpt + row.dpt, sts + row.sts, suara)
+    return {kab_id: KecamatanRollup(*values) for kab_id, values in per_kab.items()}
+
+
+# ==============================================================================
+# RINGKASAN (PAYLOAD PETA)
+# ==============================================================================
+
+def _warna_pileg(row):
+    # Partai terbesar (seri -> no urut terkecil); opacity dari persentase partai terbesar
+    terbesar, pemenang, warna = -1, None, '#808080'
+    for p in get_partai_list():
+        v = row.suara.get(p.id, 0)
+        if v > terbesar:
+            terbesar, pemenang, warna = v, p.id, p.warna_hex
+    sah = sum(row.suara.values())
+    if not sah:
+        return warna, 0.75, None, None
+    pct = terbesar * 100 / sah
+    return warna, 0.90 if pct >= 25 else 0.65 if pct >= 15 else 0.35, pemenang, pct
+
+
+def _hitung_ringkasan(mode, level):
+    rows = _rollup_level(mode, level)
+    menang = get_winners(level) if mode == 'pilpres' else None
+    paslon_no = {p.id: p.no_urut for p in get_paslon_list()}
+    hasil = {}
+    for region_id, row in rows.items():
+        sah = sum(row.suara.values())
+        if menang is not None:
+            win = menang.regions.get(region_id)
+            warna, opacity = warna_pemenang(win), fill_opacity_pilpres(win)
+            pemenang = paslon_no.get(win.winner_id) if win else None
+            pct = win.win_pct if win else None
+        else:
+            warna, opacity, pemenang, pct = _warna_pileg(row)
+        hasil[region_id] = {
+            'warna': warna, 'fill_opacity': opacity,
+            'sah': sah, 'sts': row.sts, 'tps': row.tps, 'dpt': row.dpt,
+            # Pilpres: no urut paslon; Pileg: id partai
+            'pemenang': pemenang,
+            'pemenang_pct': round(pct, 1) if pct is not None else None,
+        }
+    return hasil
+
+
+def get_ringkasan(mode, level):
+    """{region_id: {warna, fill_opacity, sah, sts, tps, dpt, pemenang, pemenang_pct}} untuk level peta."""
+    level = LEVELS.get(level, level)
+    return _ringkasan_cache[mode].get(level, lambda: _hitung_ringkasan(mode, level))
+
+
+# ==============================================================================
+# DETAIL POPUP (SATU WILAYAH)
+# ==============================================================================
+
+def _caleg_teratas(level, region_id):
+    """{partai_id: [[caleg_id, no_urut, nama, suara], ...]} TOP_CALEG teratas per partai di wilayah."""
+    field = 'rekap_suara__kecamatan_id' if level == 'kecamatan' else 'rekap_suara__kecamatan__kabupaten_kota_id'
+    rows = DetailSuaraCaleg.objects.filter(**{field: region_id}).values_list(
+        'caleg_id', 'caleg__no_urut', 'caleg__nama', 'caleg__partai_id'
+    ).annotate(t=Sum('jumlah_suara')).order_by()
+    per_partai = {}
+    for caleg_id, no_urut, nama, partai_id, total in rows:
+        per_partai.setdefault(partai_id, []).append([caleg_id, no_urut, nama, total or 0])
+    for calegs in per_partai.values():
+        calegs.sort(key=lambda c: (-c[3], c[1]))
+        del calegs[TOP_CALEG:]
+    return per_partai
+
+
+def _hitung_detail(mode, level, region_id):
+    row = _rollup_level(mode, level).get(region_id)
+    if row is None:
+        return None
+    detail = {
+        'mode': mode, 'level': level, 'id': region_id,
+        'tps': row.tps, 'dpt': row.dpt, 'sah': sum(row.suara.values()), 'sts': row.sts,
+    }
+    if mode == 'pilpres':
+        detail['paslon'] = [
+            {'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama_capres, 'warna': p.warna_hex, 'suara': row.suara.get(p.id, 0)}
+            for p in get_paslon_list()
+        ]
+    else:
+        caleg = _caleg_teratas(level, region_id)
+        detail['partai'] = [
+            {
+                'id': p.id, 'no_urut': p.no_urut, 'nama': p.nama, 'warna': p.warna_hex, 'logo_url': p.logo_url or '',
+                'suara': row.suara.get(p.id, 0), 'caleg': caleg.get(p.id, []),
+            }
+            for p in get_partai_list()
+        ]
+    return detail
+
+
+def get_region_detail(mode, level, region_id):
+    """
+    Rincian popup satu wilayah ('kokab' / 'kecamatan') untuk 'pilpres' / 'pileg_ri'.
+    None bila wilayah belum punya rekap.
+    """
+    level = LEVELS.get(level, level)
+    return _detail_cache[mode].get((level, region_id), lambda: _hitung_detail(mode, level, region_id))
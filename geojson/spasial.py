@@ -0,0 +1,84 @@
+"""
+Autokorelasi spasial untuk mode peta "Hot Spot Spasial" (mesin: core.spasial).
+
+Variabel = salah satu metrik katalog (geojson.metrik, mis. share partai atau partisipasi),
+tetangga = graf TetanggaWilayah (geojson.tetangga). Hanya wilayah yang punya nilai DAN
+minimal satu tetangga ikut dihitung:
+  - Moran's I global: apakah nilai mirip mengelompok secara geografis,
+  - LISA (Local Moran): hot spot HH, cold spot LL, outlier HL / LH (p <= 0.05, permutasi).
+Hasil di-cache per (variabel, level) dan versi data.
+"""
+import numpy as np
+
+from core import spasial as engine
+from core.models import Partai, KabupatenKota, Kecamatan
+from core.versioning import VersionedCache
+from .metrik import get_katalog, nilai_metrik
+from .models import KabupatenGeoJSON, KecamatanGeoJSON, TetanggaWilayah
+from .recap import SEMUA_SUMBER
+from .region import LEVELS
+from .tetangga import get_graf
+
+VARIABEL_DEFAULT = 'partisipasi_pilpres'
+
+WARNA_KUADRAN = {'HH': '#d7191c', 'LL': '#2c7bb6', 'HL': '#fdae61', 'LH': '#74add1', 'ns': '#d9d9d9'}
+NAMA_KUADRAN = {
+    'HH': 'Hot Spot (Tinggi-Tinggi)', 'LL': 'Cold Spot (Rendah-Rendah)',
+    'HL': 'Outlier Tinggi di Sekitar Rendah', 'LH': 'Outlier Rendah di Sekitar Tinggi',
+    'ns': 'Tidak Signifikan',
+}
+
+_cache = VersionedCache(
+    *SEMUA_SUMBER,
+    TetanggaWilayah, KabupatenGeoJSON, KecamatanGeoJSON, Partai, KabupatenKota, Kecamatan, maxsize=200,
+)
+
+
+def _hitung(metrik, level):
+    ids, nilai = nilai_metrik(metrik, level)
+    nilai_per_id = dict(zip(ids, nilai.tolist()))
+    grafw = get_graf(level)
+    x = np.array([nilai_per_id.get(int(r), np.nan) for r in grafw.ids], dtype=np.float64)
+    pilih = np.isfinite(x)
+    graf = engine.subgraf(grafw.graf, pilih)
+    region_ids, x = grafw.ids[pilih], x[pilih]
+
+    moran = engine.moran_global(x, graf)
+    _, lag_z, p, kuadran = engine.lisa(x, graf)
+    lag_x = engine.lag(x, graf)
+    skala = 100 if metrik.persen else 1
+    r = lambda v: round(float(v) * skala, 2)
+
+    wilayah = {
+        int(region_id): {
+            'warna': WARNA_KUADRAN[kuadran[i]],
+            'fill_opacity': 0.85 if kuadran[i] != 'ns' else 0.45,
+            'kuadran': str(kuadran[i]),
+            'nilai': r(x[i]), 'lag': r(lag_x[i]), 'p': round(float(p[i]), 3),
+        }
+        for i, region_id in enumerate(region_ids)
+    }
+    jumlah = {k: int((kuadran == k).sum()) for k in NAMA_KUADRAN}
+    return {
+        'wilayah': wilayah,
+        'recap': {
+            'variabel': metrik.kode, 'nama': metrik.nama, 'satuan': '%' if metrik.persen else '',
+            'n': len(region_ids),
+            'moran': {
+                'i': round(moran[0], 4), 'e': round(moran[1], 4), 'z': round(moran[2], 2), 'p': round(moran[3], 4),
+            } if moran else None,
+            'kuadran': [[k, NAMA_KUADRAN[k], WARNA_KUADRAN[k], jumlah[k]] for k in NAMA_KUADRAN],
+        },
+    }
+
+
+def get_peta_lisa(kode, level):
+    """
+    {'wilayah': {region_id: {warna, fill_opacity, kuadran, nilai, lag, p}}, 'recap': {...}} untuk
+    variabel metrik `kode` di level peta ('kokab' / 'kecamatan'); None bila kode tidak dikenal.
+    """
+    metrik = get_katalog().get(kode)
+    if metrik is None:
+        return None
+    level = LEVELS.get(level, level)
+    return _cache.get((kode, level), lambda: _hitung(metrik, level))
@@ -0,0 +1,112 @@
+"""
+Graf ketetanggaan Batas Kokab / Batas Kecamatan (mesin: core.spasial).
+
+Dihitung sekali dari poligon lalu disimpan di tabel TetanggaWilayah (satu baris per pasangan),
+karena uji geometrinya jauh lebih mahal daripada membacanya:
+  - impor_geojson dan perintah `hitung_tetangga` menghitung ulang satu level penuh,
+  - menyimpan satu batas lewat admin hanya menghitung ulang pasangan wilayah itu,
+  - bila tabel masih kosong untuk suatu level, get_graf() menghitungnya sekali secara malas.
+Pembacaan (get_graf / get_tetangga) di-cache per versi data.
+"""
+import json
+from collections import namedtuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from core import spasial as engine
+from core.bulk import bulk_upsert
+from core.versioning import VersionedCache
+from .models import KabupatenGeoJSON, KecamatanGeoJSON, TetanggaWilayah
+
+# Level -> (model GeoJSON, field id wilayah)
+SUMBER = {'kabupaten': (KabupatenGeoJSON, 'kabupaten_id'), 'kecamatan': (KecamatanGeoJSON, 'kecamatan_id')}
+
+# ids (N,) id wilayah, posisi {id: indeks}, graf core.spasial.Graf atas indeks 0..N-1
+GrafWilayah = namedtuple('GrafWilayah', 'ids posisi graf')
+
+_cache = VersionedCache(TetanggaWilayah, KabupatenGeoJSON, KecamatanGeoJSON)
+
+
+def _poligon(level):
+    """(ids, [cincin per wilayah]) dari GeoJSON yang sudah terisi."""
+    model, fk = SUMBER[level]
+    ids, cincin = [], []
+    for region_id, data in model.objects.exclude(geojson_data__isnull=True).order_by(fk).values_list(fk, 'geojson_data'):
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                continue
+        c = engine.cincin_geojson(data)
+        if c:
+            ids.append(region_id)
+            cincin.append(c)
+    return ids, cincin
+
+
+def hitung(level, wilayah_id=None):
+    """{(id_a, id_b): panjang_km} dengan id_a < id_b; `wilayah_id` = hanya pasangan wilayah itu."""
+    ids, cincin = _poligon(level)
+    hanya = None
+    if wilayah_id is not None:
+        hanya = {i for i, region_id in enumerate(ids) if region_id == wilayah_id}
+        if not hanya:
+            return {}
+    hasil = {}
+    for i, j, panjang in engine.tetangga(cincin, hanya=hanya):
+        a, b = sorted((ids[i], ids[j]))
+        hasil[(a, b)] = round(panjang, 3)
+    return hasil
+
+
+def sinkronkan(level, wilayah_id=None):
+    """
+    Samakan tabel TetanggaWilayah dengan poligon terkini (satu level, atau hanya pasangan satu
+    wilayah). Hanya baris baru / berubah yang ditulis. Hasil: (ditulis, dihapus).
+    """
+    baru = hitung(level, wilayah_id)
+    qs = TetanggaWilayah.objects.filter(level=level)
+    if wilayah_id is not None:
+        qs = qs.filter(Q(wilayah_id=wilayah_id) | Q(tetangga_id=wilayah_id))
+    lama = {(a, b): (pk, panjang) for pk, a, b, panjang in qs.values_list('pk', 'wilayah_id', 'tetangga_id', 'panjang_km')}
+    berubah = [
+        TetanggaWilayah(level=level, wilayah_id=a, tetangga_id=b, panjang_km=panjang)
+        for (a, b), panjang in baru.items() if (a, b) not in lama or lama[(a, b)][1] != panjang
+    ]
+    usang = [pk for key, (pk, _) in lama.items() if key not in baru]
+    with transaction.atomic():
+        bulk_upsert(TetanggaWilayah, berubah, unique_fields=['level', 'wilayah_id', 'tetangga_id'], update_fields=['panjang_km'])
+        if usang:
+            TetanggaWilayah.objects.filter(pk__in=usang).delete()
+    return len(berubah), len(usang)
+
+
+def _bangun(level):
+    rows = list(TetanggaWilayah.objects.filter(level=level).values_list('wilayah_id', 'tetangga_id', 'panjang_km'))
+    if not rows and SUMBER[level][0].objects.exclude(geojson_data__isnull=True).exists():
+        # Belum pernah dihitung: hitung sekali, hasil tabel dibaca lagi pada request berikutnya
+        sinkronkan(level)
+        rows = list(TetanggaWilayah.objects.filter(level=level).values_list('wilayah_id', 'tetangga_id', 'panjang_km'))
+    ids = sorted({a for a, _, _ in rows} | {b for _, b, _ in rows})
+    posisi = {region_id: i for i, region_id in enumerate(ids)}
+    graf = engine.graf_csr(len(ids), [posisi[a] for a, _, _ in rows], [posisi[b] for _, b, _ in rows])
+
+    # Daftar tetangga per wilayah, batas bersama terpanjang lebih dulu
+    per_wilayah = {}
+    for a, b, panjang in rows:
+        per_wilayah.setdefault(a, []).append((panjang, b))
+        per_wilayah.setdefault(b, []).append((panjang, a))
+    daftar = {region_id: [t for _, t in sorted(isi, key=lambda v: (-v[0], v[1]))] for region_id, isi in per_wilayah.items()}
+    return GrafWilayah(np.array(ids, dtype=np.int64), posisi, graf), daftar
+
+
+def get_graf(level):
+    """GrafWilayah level 'kabupaten' / 'kecamatan' (hanya wilayah yang punya minimal satu tetangga)."""
+    return _cache.get(level, lambda: _bangun(level))[0]
+
+
+def get_tetangga(level):
+    """{region_id: [id tetangga, urut panjang batas bersama]} untuk level 'kabupaten' / 'kecamatan'."""
+    return _cache.get(level, lambda: _bangun(level))[1]
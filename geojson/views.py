@@ -1,7 +1,60 @@
 import json
+
+import numpy as np
 from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
 from geojson.models import KabupatenGeoJSON, KecamatanGeoJSON
-from pilpres_2024.models import PaslonPilpres, KabupatenPilpres, RekapSuaraPilpres
+from core.models import kode_range
+from core.refdata import get_wilayah
+from geojson.recap import get_recap, get_konteks
+from geojson.caleg import get_caleg_options, get_caleg_stats
+from geojson.region import get_ringkasan, get_region_detail
+from geojson.anomali import get_peta_anomali
+from geojson.proyeksi import get_proyeksi
+from geojson.koalisi import get_peta_koalisi, get_recap_koalisi
+from geojson.klaster import get_peta_klaster, get_recap_klaster
+from geojson.kemiripan import cari_mirip, METRIK, K_DEFAULT, K_MAX
+from geojson.metrik import get_peta_metrik, get_katalog_data, KELAS_DEFAULT
+from geojson.spasial import get_peta_lisa, VARIABEL_DEFAULT
+from geojson.tetangga import get_tetangga
+from geojson.lokasi import cari_wilayah, TITIK_MAKS
+
+
+def _filter_wilayah(qs, request, field='kecamatan'):
+    """
+    Filter drill-down level kecamatan: ?kode=<kode wilayah> (range scan indeks kode Kemendagri,
+    mis. kode=3201 untuk satu kabupaten) atau ?kab_id=<id kabupaten>.
+    """
+    kode = request.GET.get('kode', '').replace('.', '').strip()
+    if kode.isdigit():
+        return qs.filter(kode_range(kode, f'{field}__kode'))
+    kab_id = request.GET.get('kab_id')
+    if kab_id:
+        return qs.filter(**{f'{field}__kabupaten_kota_id': kab_id})
+    return qs
+
+# Nama properti fitur untuk data mode (default 'ringkas' = angka ringkas, detail lewat /region_detail/)
+_PROPERTI_MODE = {'anomali': 'anomali', 'koalisi': 'koalisi', 'all': 'klaster', 'spasial': 'lisa'}
+
+
+def _warnai(props, region_id, mode, election_stats, peta_metrik):
+    """
+    Warna & opacity satu fitur: abu-abu bila kosong, warna mode (+ data mode di properti),
+    lalu ditimpa warna kelas metrik choropleth bila ?metrik= dipakai.
+    """
+    props['warna'] = '#c0c0c0'
+    props['fill_opacity'] = 0.5
+    stat = election_stats.get(region_id)
+    if stat is not None:
+        props[_PROPERTI_MODE.get(mode, 'ringkas')] = stat
+        props['warna'] = stat['warna']
+        props['fill_opacity'] = stat['fill_opacity']
+    if peta_metrik is not None:
+        stat = peta_metrik['wilayah'].get(region_id)
+        props['metrik'] = stat
+        props['warna'] = stat['warna'] if stat else '#e0e0e0'
+        props['fill_opacity'] = stat['fill_opacity'] if stat else 0.4
+
 
 def get_geo_data(request):
     """
@@ -13,238 +66,47 @@ def get_geo_data(request):
     
     features = []
 
-    # 1. AMBIL CACHED AGGREGATE PILPRES JIKA MODE PILPRES
-    # 1. AMBIL CACHED AGGREGATE PILPRES JIKA MODE PILPRES
-    election_stats = {}
-    if mode == 'pilpres':
-        paslon_data = list(PaslonPilpres.objects.all().values('id', 'no_urut', 'nama_capres', 'warna_hex'))
-        
-        if level == 'kokab':
-            # Ambil data melalui model proxy yang sudah dioptimasikan with_totals()
-            qs_kab = KabupatenPilpres.objects.all().with_totals()
-            for obj in qs_kab:
-                # obj ini aslinya KabupatenKota dengan added attributes SQL
-                dpt = obj.dpt_total or 0
-                tps = obj.tps_total or 0
-                s1 = obj.s1_total or 0
-                s2 = obj.s2_total or 0
-                s3 = obj.s3_total or 0
-                sah = obj.sah_total or 0
-                sts = obj.tidak_sah_total or 0
-                
-                # Highlight warna paslon menang (untuk color map)
-                win_warna = "#808080" # Default abu-abu
-                terbesar = -1
-                for pd in paslon_data:
-                    no_u = pd['no_urut']
-                    score = obj.s1_total if no_u == 1 else (obj.s2_total if no_u == 2 else obj.s3_total)
-                    if score > terbesar:
-                        terbesar = score
-                        win_warna = pd['warna_hex']
-                # Hitung tingkat rasio kemenangan untuk opacity (Tua = Telak, Pudar = Tipis)
-                # Telak (> 60%), Sedang (50% - 60%), Tipis (< 50%)
-                fill_opacity = 0.75
-                if sah > 0:
-                    win_pct = (terbesar / sah) * 100
-                    if win_pct > 60:
-                        fill_opacity = 0.90  # Tua / Pekat (Telak)
-                    elif win_pct >= 50:
-                        fill_opacity = 0.65  # Sedang
-                    else:
-                        fill_opacity = 0.35  # Pudar (Tipis)
-                
-                election_stats[obj.id] = {
-                    's1': s1, 's2': s2, 's3': s3,
-                    'sah': sah, 'sts': sts,
-                    'tps': tps, 'dpt': dpt,
-                    'win_warna': win_warna,
-                    'fill_opacity': fill_opacity,
-                    'paslon_data': {p['no_urut']: {'nama': p['nama_capres'], 'warna': p['warna_hex']} for p in paslon_data}
-                }
-                
-        elif level == 'kecamatan':
-            # Mode Drill-down: Filter berdasarkan Kabupaten tertentu jika ada parameter
-            kab_id = request.GET.get('kab_id')
-            query = RekapSuaraPilpres.objects.all()
-            if kab_id:
-                query = query.filter(kecamatan__kabupaten_kota_id=kab_id)
-            
-            qs_kec = query.with_totals()
-            
-            for obj in qs_kec:
-                try: 
-                    tps = obj.kecamatan.tpsdpt_pemilu.jumlah_tps
-                    dpt = obj.kecamatan.tpsdpt_pemilu.jumlah_dpt
-                except AttributeError: tps = dpt = 0
-
-                s1 = obj.s1 or 0
-                s2 = obj.s2 or 0
-                s3 = obj.s3 or 0
-                sah = obj.total_sah_db or 0
-                sts = obj.suara_tidak_sah or 0
-                
-                win_warna = "#808080"
-                terbesar = -1
-                for pd in paslon_data:
-                    no_u = pd['no_urut']
-                    score = obj.s1 if no_u == 1 else (obj.s2 if no_u == 2 else obj.s3)
-                    if score > terbesar:
-                        terbesar = score
-                        win_warna = pd['warna_hex']
-                        
-                # Hitung tingkat rasio kemenangan untuk opacity (Tua = Telak, Pudar = Tipis)
-                # Telak (> 60%), Sedang (50% - 60%), Tipis (< 50%)
-                fill_opacity = 0.75
-                if sah > 0:
-                    win_pct = (terbesar / sah) * 100
-                    if win_pct > 60:
-                        fill_opacity = 0.90  # Tua / Pekat (Telak)
-                    elif win_pct >= 50:
-                        fill_opacity = 0.65  # Sedang
-                    else:
-                        fill_opacity = 0.35  # Pudar (Tipis)
-
-                election_stats[obj.kecamatan.id] = {
-                    's1': s1, 's2': s2, 's3': s3,
-                    'sah': sah, 'sts': sts,
-                    'tps': tps, 'dpt': dpt,
-                    'win_warna': win_warna,
-                    'fill_opacity': fill_opacity,
-                    'paslon_data': {p['no_urut']: {'nama': p['nama_capres'], 'warna': p['warna_hex']} for p in paslon_data}
-                }
-
-    elif mode == 'pileg_ri':
-        from core.models import Partai
-        import pilegri_2024.models as pilegri
-        from django.db.models import Sum, OuterRef, Subquery, IntegerField
-        from django.db.models.functions import Coalesce
-
-        partai_data_raw = Partai.objects.all().order_by('no_urut')
-        partai_data = []
-        for pd in partai_data_raw:
-            partai_data.append({
-                'id': pd.id,
-                'no_urut': pd.no_urut,
-                'nama': pd.nama,
-                'warna_hex': pd.warna_hex,
-                'logo_url': pd.logo.url if pd.logo else ''
-            })
-        
-        if level == 'kokab':
-            qs_kab = pilegri.KabupatenPilegRI.objects.all()
-            
-            anns = {}
-            for p in partai_data:
-                pid = p['id']
-                anns[f'p_{pid}_vt'] = Coalesce(Subquery(
-                    pilegri.SuaraPartai.objects.filter(rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), partai_id=pid).values('rekap_suara__kecamatan__kabupaten_kota').annotate(t=Sum('jumlah_suara')).values('t'),
-                    output_field=IntegerField()
-                ), 0) + Coalesce(Subquery(
-                    pilegri.DetailSuaraCaleg.objects.filter(rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), caleg__partai_id=pid).values('rekap_suara__kecamatan__kabupaten_kota').annotate(t=Sum('jumlah_suara')).values('t'),
-                    output_field=IntegerField()
-                ), 0)
-            qs_kab = qs_kab.annotate(**anns)
-            qs_kab = qs_kab.annotate(
-                tps_total=Coalesce(Sum('kecamatan_set__tpsdpt_pemilu__jumlah_tps'), 0),
-                dpt_total=Coalesce(Sum('kecamatan_set__tpsdpt_pemilu__jumlah_dpt'), 0),
-                ts_total=Coalesce(Subquery(
-                    pilegri.RekapSuara.objects.filter(kecamatan__kabupaten_kota=OuterRef('pk')).values('kecamatan__kabupaten_kota').annotate(t=Sum('suara_tidak_sah')).values('t'),
-                    output_field=IntegerField()
-                ), 0)
-            )
-            
-            for obj in qs_kab:
-                dpt = obj.dpt_total or 0
-                tps = obj.tps_total or 0
-                sts = obj.ts_total or 0
-                
-                win_warna = "#808080"
-                terbesar = -1
-                sah = 0
-                partai_stats_dict = {}
-                
-                for pd in partai_data:
-                    score = getattr(obj, f"p_{pd['id']}_vt", 0)
-                    sah += score
-                    partai_stats_dict[pd['no_urut']] = {'nama': pd['nama'], 'warna': pd['warna_hex'], 'suara': score, 'logo_url': pd['logo_url']}
-                    if score > terbesar:
-                        terbesar = score
-                        win_warna = pd['warna_hex']
-                        
-                fill_opacity = 0.75
-                if sah > 0:
-                    win_pct = (terbesar / sah) * 100
-                    if win_pct >= 25: fill_opacity = 0.90
-                    elif win_pct >= 15: fill_opacity = 0.65
-                    else: fill_opacity = 0.35
-                
-                election_stats[obj.id] = { 
-                    'sah': sah, 'sts': sts,
-                    'tps': tps, 'dpt': dpt,
-                    'win_warna': win_warna,
-                    'fill_opacity': fill_opacity,
-                    'partai_data': partai_stats_dict
-                }
-                
-        elif level == 'kecamatan':
-            kab_id = request.GET.get('kab_id')
-            query = pilegri.RekapSuara.objects.all().select_related('kecamatan__tpsdpt_pemilu')
-            if kab_id:
-                query = query.filter(kecamatan__kabupaten_kota_id=kab_id)
-            
-            anns = {}
-            for p in partai_data:
-                pid = p['id']
-                # Suara Partai di RekapSuara ini + Suara Caleg partai di RekapSuara ini
-                anns[f'p_{pid}_vt'] = Coalesce(Subquery(
-                    pilegri.SuaraPartai.objects.filter(rekap_suara=OuterRef('pk'), partai_id=pid).values('rekap_suara').annotate(t=Sum('jumlah_suara')).values('t'),
-                    output_field=IntegerField()
-                ), 0) + Coalesce(Subquery(
-                    pilegri.DetailSuaraCaleg.objects.filter(rekap_suara=OuterRef('pk'), caleg__partai_id=pid).values('rekap_suara').annotate(t=Sum('jumlah_suara')).values('t'),
-                    output_field=IntegerField()
-                ), 0)
-            qs_kec = query.annotate(**anns)
-            
-            for obj in qs_kec:
-                try: 
-                    tps = obj.kecamatan.tpsdpt_pemilu.jumlah_tps
-                    dpt = obj.kecamatan.tpsdpt_pemilu.jumlah_dpt
-                except AttributeError: tps = dpt = 0
+    # 0. METRIK CHOROPLETH OPSIONAL (?metrik=&klasifikasi=&kelas=, lihat geojson.metrik)
+    # Warna kelas menimpa warna mode; data mode (popup/rekap) tetap ikut
+    peta_metrik = None
+    if request.GET.get('metrik'):
+        kelas = request.GET.get('kelas', '')
+        peta_metrik = get_peta_metrik(
+            request.GET['metrik'], level, request.GET.get('klasifikasi', 'kuantil'),
+            int(kelas) if kelas.isdigit() else KELAS_DEFAULT,
+        )
+        if peta_metrik is None:
+            return JsonResponse({'error': 'Metrik / klasifikasi tidak dikenal'}, status=400)
 
-                sts = obj.suara_tidak_sah or 0
-                
-                win_warna = "#808080"
-                terbesar = -1
-                sah = 0
-                partai_stats_dict = {}
-                
-                for pd in partai_data:
-                    score = getattr(obj, f"p_{pd['id']}_vt", 0)
-                    sah += score
-                    partai_stats_dict[pd['no_urut']] = {'nama': pd['nama'], 'warna': pd['warna_hex'], 'suara': score, 'logo_url': pd['logo_url']}
-                    if score > terbesar:
-                        terbesar = score
-                        win_warna = pd['warna_hex']
-                
-                fill_opacity = 0.75
-                if sah > 0:
-                    win_pct = (terbesar / sah) * 100
-                    if win_pct >= 25: fill_opacity = 0.90
-                    elif win_pct >= 15: fill_opacity = 0.65
-                    else: fill_opacity = 0.35
-                
-                election_stats[obj.kecamatan.id] = {
-                    'sah': sah, 'sts': sts,
-                    'tps': tps, 'dpt': dpt,
-                    'win_warna': win_warna,
-                    'fill_opacity': fill_opacity,
-                    'partai_data': partai_stats_dict
-                }
+    # 1. WARNA & ANGKA RINGKAS PER WILAYAH (rollup ter-cache, lihat geojson.region)
+    # Rincian popup tidak ikut dikirim; diambil per klik lewat /region_detail/
+    election_stats = {}
+    if mode in ('pilpres', 'pileg_ri'):
+        election_stats = get_ringkasan(mode, level)
+    elif mode == 'anomali':
+        # Mode anomali: warna dari jumlah tanda anomali (geojson.anomali), daftar tanda ikut di fitur
+        election_stats = get_peta_anomali(level)
+    elif mode == 'koalisi':
+        # Mode koalisi: paslon vs partai koalisinya (geojson.koalisi), nilai per paslon ikut di fitur
+        election_stats = get_peta_koalisi(level)
+    elif mode == 'all':
+        # Mode analisis pemetaan: warna = klaster profil pemilih (geojson.klaster)
+        election_stats = get_peta_klaster(level)
+    elif mode == 'spasial':
+        # Mode hot spot: LISA variabel metrik (?variabel=) atas graf tetangga (geojson.spasial)
+        peta_lisa = get_peta_lisa(request.GET.get('variabel', VARIABEL_DEFAULT), level)
+        if peta_lisa is None:
+            return JsonResponse({'error': 'Variabel tidak dikenal'}, status=400)
+        election_stats = peta_lisa['wilayah']
 
 
     # 2. KONSTRUKSI FEATURES GABUNGAN
+    # Nama wilayah diambil dari cache referensi, bukan join ke tabel wilayah
+    wilayah = get_wilayah()
+    # Id tetangga (batas bersama terpanjang dulu) untuk prefetch drill-down di klien
+    tetangga = get_tetangga('kecamatan' if level == 'kecamatan' else 'kabupaten')
     if level == 'kokab':
-        geo_qs = KabupatenGeoJSON.objects.select_related('kabupaten').all()
+        geo_qs = KabupatenGeoJSON.objects.all()
         for g in geo_qs:
             f = g.geojson_data
             
@@ -257,28 +119,18 @@ def get_geo_data(request):
             if not isinstance(f, dict) or 'properties' not in f:
                 continue
             
-            kab_id = g.kabupaten.id
+            kab_id = g.kabupaten_id
             f['properties']['id'] = kab_id
-            f['properties']['nama'] = g.kabupaten.nama
+            f['properties']['nama'] = wilayah.kabupaten[kab_id].nama
+            f['properties']['kode'] = wilayah.kabupaten[kab_id].kode
             f['properties']['level'] = 'kokab'
-            # Default warna abu-abu untuk area yang kosong/mode analisis
-            f['properties']['warna'] = '#c0c0c0'
-            f['properties']['fill_opacity'] = 0.5
-            
-            if mode in ['pilpres', 'pileg_ri'] and kab_id in election_stats:
-                stat = election_stats[kab_id]
-                f['properties'][f'detail_{mode}'] = stat
-                f['properties']['warna'] = stat['win_warna']
-                f['properties']['fill_opacity'] = stat['fill_opacity']
+            f['properties']['tetangga'] = tetangga.get(kab_id, [])
+            _warnai(f['properties'], kab_id, mode, election_stats, peta_metrik)
 
             features.append(f)
             
     elif level == 'kecamatan':
-        kab_id = request.GET.get('kab_id')
-        geo_qs = KecamatanGeoJSON.objects.select_related('kecamatan', 'kecamatan__kabupaten_kota').all()
-        
-        if kab_id:
-            geo_qs = geo_qs.filter(kecamatan__kabupaten_kota_id=kab_id)
+        geo_qs = _filter_wilayah(KecamatanGeoJSON.objects.all(), request)
             
         for g in geo_qs:
             f = g.geojson_data
@@ -292,25 +144,171 @@ def get_geo_data(request):
             if not isinstance(f, dict) or 'properties' not in f:
                 continue
                 
-            kec_id = g.kecamatan.id
+            kec_id = g.kecamatan_id
+            kec = wilayah.kecamatan[kec_id]
             f['properties']['id'] = kec_id
-            f['properties']['nama'] = g.kecamatan.nama
-            f['properties']['kabupaten'] = g.kecamatan.kabupaten_kota.nama
+            f['properties']['nama'] = kec.nama
+            f['properties']['kode'] = kec.kode
+            f['properties']['kabupaten'] = wilayah.kabupaten[kec.kabupaten_id].nama
             f['properties']['level'] = 'kecamatan'
-            # Default pola yang sama; abu-abu kalau kosong
-            f['properties']['warna'] = '#c0c0c0' 
-            f['properties']['fill_opacity'] = 0.5
-
-            if mode in ['pilpres', 'pileg_ri'] and kec_id in election_stats:
-                stat = election_stats[kec_id]
-                f['properties'][f'detail_{mode}'] = stat
-                f['properties']['warna'] = stat['win_warna']
-                f['properties']['fill_opacity'] = stat['fill_opacity']
+            f['properties']['tetangga'] = tetangga.get(kec_id, [])
+            _warnai(f['properties'], kec_id, mode, election_stats, peta_metrik)
 
             features.append(f)
 
     # Return valid FeatureCollection
+    # `recap` = rekap footer untuk konteks filter ini (lihat geojson.recap), bukan jumlah dari features
+    if mode == 'koalisi':
+        recap = get_recap_koalisi()
+    elif mode == 'all':
+        recap = get_recap_klaster()
+    elif mode == 'spasial':
+        recap = peta_lisa['recap']
+    else:
+        recap = get_recap(mode, get_konteks(request))
     return JsonResponse({
         "type": "FeatureCollection",
-        "features": features
+        "features": features,
+        "recap": recap,
+        # Legenda kelas metrik choropleth (None tanpa ?metrik=)
+        "legenda": peta_metrik['legenda'] if peta_metrik else None,
     }, safe=False)
+
+
+def get_recap_data(request):
+    """
+    Rekap footer saja (tanpa geometri) untuk ?mode=pilpres|pileg_ri
+    dan konteks ?kode= / ?kab_id= / ?dapil_id= (tanpa parameter = provinsi).
+    """
+    mode = request.GET.get('mode', 'pilpres')
+    return JsonResponse({'mode': mode, 'recap': get_recap(mode, get_konteks(request))})
+
+
+def get_proyeksi_data(request):
+    """
+    Proyeksi ala quick count dari rekap yang sudah masuk (?mode=pilpres|pileg_ri):
+    share per paslon/partai dengan selang kepercayaan bootstrap, provinsi dan per kabupaten.
+    """
+    mode = request.GET.get('mode', 'pilpres')
+    if mode not in ('pilpres', 'pileg_ri'):
+        return JsonResponse({'error': 'Mode tidak dikenal'}, status=400)
+    return JsonResponse(get_proyeksi(mode), json_dumps_params={'separators': (',', ':')})
+
+
+def get_metrik_data(request):
+    """Katalog metrik choropleth & metode klasifikasi untuk pemilih metrik di header peta."""
+    return JsonResponse(get_katalog_data(), json_dumps_params={'separators': (',', ':')})
+
+
+def get_caleg_data(request):
+    """
+    Mode caleg peta Pileg RI.
+    Tanpa parameter: pilihan dapil -> partai -> caleg. ?caleg_id=<id>: suara & share caleg itu
+    per kecamatan / kabupaten di dapilnya + peringkat kecamatan terbaik.
+    """
+    caleg_id = request.GET.get('caleg_id', '')
+    if not caleg_id:
+        return JsonResponse(get_caleg_options(), json_dumps_params={'separators': (',', ':')})
+    stats = get_caleg_stats(int(caleg_id)) if caleg_id.isdigit() else None
+    if stats is None:
+        return JsonResponse({'error': 'Caleg tidak ditemukan'}, status=404)
+    return JsonResponse(stats, json_dumps_params={'separators': (',', ':')})
+
+
+
+def region_detail(request, level, region_id):
+    """
+    Rincian popup satu wilayah (dimuat saat fitur diklik): /region_detail/<kokab|kecamatan>/<id>/?mode=
+    Pilpres: semua paslon; Pileg RI: semua partai + caleg teratas per partai.
+    """
+    mode = request.GET.get('mode', 'pilpres')
+    if mode not in ('pilpres', 'pileg_ri') or level not in ('kokab', 'kecamatan'):
+        return JsonResponse({'error': 'Mode / level tidak dikenal'}, status=400)
+    detail = get_region_detail(mode, level, region_id)
+    if detail is None:
+        return JsonResponse({'error': 'Data wilayah belum tersedia'}, status=404)
+    return JsonResponse(detail, json_dumps_params={'separators': (',', ':')})
+
+
+def region_mirip(request, level, region_id):
+    """
+    Wilayah dengan profil suara paling mirip: /region_mirip/<kokab|kecamatan>/<id>/?k=10&metrik=cosine|euclid
+    (lihat geojson.kemiripan). Level kecamatan membandingkan seluruh kecamatan provinsi.
+    """
+    metrik = request.GET.get('metrik', 'cosine')
+    k = request.GET.get('k', '')
+    if metrik not in METRIK or level not in ('kokab', 'kecamatan') or (k and not k.isdigit()):
+        return JsonResponse({'error': 'Level / metrik / k tidak dikenal'}, status=400)
+    level = 'kecamatan' if level == 'kecamatan' else 'kabupaten'
+    mirip = cari_mirip(level, region_id, min(int(k or K_DEFAULT), K_MAX), metrik)
+    if mirip is None:
+        return JsonResponse({'error': 'Data wilayah belum tersedia'}, status=404)
+
+    wilayah = get_wilayah()
+    if level == 'kecamatan':
+        nama = lambda i: [wilayah.kecamatan[i].nama, wilayah.kabupaten[wilayah.kecamatan[i].kabupaten_id].nama]
+    else:
+        nama = lambda i: [wilayah.kabupaten[i].nama, None]
+    return JsonResponse({
+        'id': region_id, 'metrik': metrik,
+        # [id, nama, kabupaten, skor]
+        'mirip': [[i, *nama(i), skor] for i, skor in mirip],
+    }, json_dumps_params={'separators': (',', ':')})
+
+
+def _koordinat(teks):
+    """'lat,lon' -> (lat, lon) float, None bila tidak valid."""
+    try:
+        lat, lon = (float(v) for v in teks.split(','))
+    except (ValueError, AttributeError):
+        return None
+    return lat, lon
+
+
+@csrf_exempt
+def locate(request):
+    """
+    Reverse geocoding titik -> kabupaten/kota & kecamatan (lihat geojson.lokasi).
+      GET  /locate/?lat=-6.9&lon=107.6              satu titik
+      GET  /locate/?titik=-6.9,107.6;-6.8,107.5     beberapa titik
+      POST /locate/  {"titik": [[lat, lon], ...]}   batch (check-in lapangan / koordinat TPS)
+    Batch maksimal TITIK_MAKS titik per panggilan.
+    """
+    if request.method == 'POST':
+        try:
+            titik = json.loads(request.body or b'{}').get('titik')
+            titik = [(float(lat), float(lon)) for lat, lon in titik]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'error': 'Body harus {"titik": [[lat, lon], ...]}'}, status=400)
+        tunggal = False
+    elif 'titik' in request.GET:
+        titik = [_koordinat(t) for t in request.GET['titik'].split(';') if t.strip()]
+        tunggal = False
+    else:
+        titik = [_koordinat(f"{request.GET.get('lat', '')},{request.GET.get('lon', '')}")]
+        tunggal = True
+    if not titik or None in titik:
+        return JsonResponse({'error': 'Koordinat lat/lon tidak valid'}, status=400)
+    if len(titik) > TITIK_MAKS:
+        return JsonResponse({'error': f'Maksimal {TITIK_MAKS} titik per panggilan'}, status=400)
+
+    lat, lon = np.array(titik, dtype=np.float64).T
+    kabupaten, kecamatan = cari_wilayah(lat, lon)
+    wilayah = get_wilayah()
+    nama_kab = lambda i: wilayah.kabupaten[i].nama if i in wilayah.kabupaten else None
+    nama_kec = lambda i: wilayah.kecamatan[i].nama if i in wilayah.kecamatan else None
+
+    if tunggal:
+        kab, kec = int(kabupaten[0]), int(kecamatan[0])
+        return JsonResponse({
+            'lat': lat[0], 'lon': lon[0],
+            'kabupaten': {'id': kab, 'nama': nama_kab(kab)} if kab else None,
+            'kecamatan': {'id': kec, 'nama': nama_kec(kec)} if kec else None,
+        })
+    return JsonResponse({
+        'n': len(titik), 'ditemukan': int((kabupaten > 0).sum()),
+        # [kabupaten_id, kecamatan_id] per titik sesuai urutan input, null bila di luar wilayah
+        'hasil': [[kab or None, kec or None] for kab, kec in zip(kabupaten.tolist(), kecamatan.tolist())],
+        'kabupaten': {i: nama_kab(i) for i in set(kabupaten.tolist()) if i},
+        'kecamatan': {i: nama_kec(i) for i in set(kecamatan.tolist()) if i},
+    }, json_dumps_params={'separators': (',', ':')})
@@ -1,8 +1,14 @@
+import copy
+import json
+
 from django import forms
-from django.db import models
+from django.db import models, transaction
 from django.contrib import admin
-from django.urls import reverse
-from django.http import HttpResponseRedirect
+from django.urls import path, reverse
+from django.http import HttpResponseRedirect, JsonResponse, Http404
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
 from django.utils.http import urlencode
 from django.forms.models import modelform_factory
 from django.utils.html import format_html
@@ -12,8 +18,16 @@ from import_export import resources, fields, widgets
 from import_export.admin import ImportExportModelAdmin
 from import_export.formats.base_formats import XLS
 
-from core.models import Kecamatan, Partai, DapilRI
-from .models import Caleg, RekapSuara, DetailSuaraCaleg, KabupatenPilegRI, SuaraPartai, DapilPilegRI
+from core.bulk import bulk_upsert
+from core.paginator import BareCountAdminMixin
+from core.models import Kecamatan, KabupatenKota, Partai, DapilRI
+from .models import Caleg, RekapSuara, DetailSuaraCaleg, KabupatenPilegRI, SuaraPartai, DapilPilegRI, PeringkatCaleg
+from core.refdata import get_partai_list, get_dapil_ri, get_wilayah, get_nama_wilayah, get_dapil_ri_id
+from .changelist import changelist_request, get_party_columns, get_party_ids, rekap_change_url
+from .form_schema import get_dapil_schema
+from .kursi import get_perolehan_kursi, kursi_per_dapil, get_simulasi
+from geojson.admin import AnomaliPilegRIFilter
+from geojson.models import AnomaliKecamatan
 
 # --- RESOURCES ---
 class CalegResource(resources.ModelResource):
@@ -24,6 +38,127 @@ class CalegResource(resources.ModelResource):
         fields = ('id', 'no_urut', 'nama', 'jenis_kelamin', 'partai', 'dapil')
 
 # --- FORM ---
+def _build_rekap_layout(request, instance):
+    """
+    Menyusun field dinamis form Rekap (urut tampil) untuk satu kecamatan.
+    Nilai None berarti field model bawaan ModelForm (kecamatan / suara_tidak_sah).
+    """
+    # Prefetching sakti agar loading form cepat walau calegnya ratusan
+    db_inst = RekapSuara.objects.with_totals().get(pk=instance.pk)
+    fmt = lambda v: "{:,}".format(v).replace(',', '.')
+
+    # Cek Filter dari URL
+    filter_p = request.GET.get('p') if request else None
+    filter_f = request.GET.get('f') if request else None
+
+    # Nama wilayah & dapil dari cache referensi, tanpa join
+    _, nama_kab, nama_dapil = get_nama_wilayah(db_inst.kecamatan_id)
+    dapil_id = get_dapil_ri_id(db_inst.kecamatan_id)
+    dyn = {
+        'kecamatan': None,
+        'suara_tidak_sah': None,
+        'info_kb': forms.CharField(label="Kabupaten", initial=nama_kab, required=False, disabled=True),
+        'info_dp': forms.CharField(label="Dapil RI", initial=nama_dapil, required=False, disabled=True),
+        'res_s': forms.CharField(label=mark_safe("<b>Total Suara Sah</b>"), initial=fmt(db_inst.t_sah), required=False, disabled=True, widget=forms.TextInput(attrs={'style': 'font-weight:bold; color:#28a745; background:#f8f9fa; border:1px solid #28a745; width:300px;'})),
+        'res_t': forms.CharField(label=mark_safe("<b>Total Suara</b>"), initial=fmt(db_inst.t_total), required=False, disabled=True, widget=forms.TextInput(attrs={'style': 'font-weight:bold; color:#007bff; background:#eef6ff; border:1px solid #007bff; width:300px;'})),
+    }
+
+    order = OrderedDict()
+
+    # Link ke mode input per partai (ringan untuk dapil dengan ratusan caleg)
+    input_url = reverse('admin:pilegri_2024_rekapsuara_input_partai', args=[instance.pk])
+    order['input_partai'] = forms.CharField(
+        label=mark_safe(
+            f'<a href="{input_url}" class="btn btn-sm btn-info" style="font-weight:bold; margin-bottom:10px;">'
+            f'<i class="fas fa-layer-group"></i> Input Per Partai (Tab + Autosave)</a>'
+        ),
+        required=False,
+        disabled=True,
+        widget=forms.HiddenInput()
+    )
+
+    # Tambahkan link "Reset Filter" jika sedang difilter
+    if filter_p or filter_f:
+        reset_url = reverse('admin:pilegri_2024_rekapsuara_change', args=[instance.pk])
+        order['reset_filter'] = forms.CharField(
+            label=mark_safe(
+                f'<div style="background:#fff9e6; border:1px solid #ffeeba; padding:8px 12px; border-radius:6px; margin-bottom:15px; display:inline-flex; align-items:center;">'
+                f'<span style="color:#856404; font-weight:bold; margin-right:15px;">⚠️ MODE FILTER AKTIF</span>'
+                f'<a href="{reset_url}" class="btn btn-sm btn-warning" style="font-weight:bold;">Tampilkan Semua Field (Reset)</a>'
+                f'</div>'
+            ),
+            required=False,
+            disabled=True,
+            widget=forms.HiddenInput()
+        )
+
+    # --- LOGIKA HIDE FIELD ---
+    hide_globals = ['res_s', 'res_t', 'suara_tidak_sah']
+    if filter_p: # Jika filter partai, sembunyikan total global & suara tidak sah
+        for h in hide_globals:
+            dyn.pop(h, None)
+
+    for k in ['kecamatan', 'info_kb', 'info_dp', 'res_s', 'suara_tidak_sah', 'res_t']:
+        if k not in dyn: continue
+
+        # Sembunyikan global totals jika sedang filter partai/sah/ts
+        # TAPI tetap tampilkan info wilayah (info_kb/info_dp) untuk konteks rute
+        if filter_f == 'ts' and k not in ['info_kb', 'info_dp', 'suara_tidak_sah']:
+            continue
+        if filter_f == 'sah' and k == 'suara_tidak_sah':
+            continue
+
+        order[k] = dyn[k]
+
+    # Jika filter_f == 'ts', tidak perlu tampilkan partai sama sekali
+    if filter_f == 'ts':
+        return order
+
+    # --- DATA RINCIAN ---
+    p_ids = dict(SuaraPartai.objects.filter(rekap_suara_id=instance.pk).values_list('partai_id', 'jumlah_suara'))
+    c_ids = dict(DetailSuaraCaleg.objects.filter(rekap_suara_id=instance.pk).values_list('caleg_id', 'jumlah_suara'))
+
+    # Skema partai + caleg per dapil sudah di-cache lintas request
+    schema = get_dapil_schema(dapil_id)
+
+    for p in schema:
+        # FILTER: Jika ada filter_p, lewatkan partai yang tidak cocok
+        if filter_p and str(p['id']) != filter_p:
+            continue
+
+        # Jika filter Partai, tambahkan Total Suara Partai + Caleg
+        if filter_p:
+            c_suara_total = sum(c_ids.get(c_id, 0) for c_id, _ in p['calegs'])
+            order['res_p_total'] = forms.CharField(
+                label=mark_safe(f"<b>Total Suara {p['nama']} (Partai + Caleg)</b>"),
+                initial=fmt(p_ids.get(p['id'], 0) + c_suara_total),
+                required=False, disabled=True,
+                widget=forms.TextInput(attrs={'style': 'font-weight:bold; color:#e83e8c; background:#fff0f5; border:1px solid #e83e8c; width:300px;'})
+            )
+
+        order[f"su_p_{p['id']}"] = forms.IntegerField(label=p['label'], initial=p_ids.get(p['id'], 0), required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 180px; font-weight:bold; border-color: #333;'}))
+        for c_id, c_label in p['calegs']:
+            order[f'su_c_{c_id}'] = forms.IntegerField(label=c_label, initial=c_ids.get(c_id, 0), required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 180px;'}))
+    return order
+
+
+def get_rekap_layout(request, instance):
+    """
+    Layout form Rekap hanya dibangun sekali per request.
+    get_fields(), get_form() dan __init__ form memakai hasil yang sama
+    sehingga query berat (with_totals, rincian suara) tidak diulang-ulang.
+    """
+    memo = getattr(request, '_rekap_layout_cache', None)
+    if memo is not None and instance.pk in memo:
+        return memo[instance.pk]
+    layout = _build_rekap_layout(request, instance)
+    if request is not None:
+        if memo is None:
+            memo = request._rekap_layout_cache = {}
+        memo[instance.pk] = layout
+    return layout
+
+
 class RekapSuaraForm(forms.ModelForm):
     kecamatan = forms.ModelChoiceField(queryset=Kecamatan.objects.all(), label="Kecamatan", widget=admin.widgets.AutocompleteSelect(RekapSuara._meta.get_field('kecamatan'), admin.site))
     class Meta:
@@ -34,108 +169,12 @@ class RekapSuaraForm(forms.ModelForm):
         self.request = kwargs.pop('request', None)
         super().__init__(*args, **kwargs)
         if self.instance.pk:
-            # Simpan filters dari URL ke hidden field agar tidak hilang saat POST (Save)
-            if self.request and self.request.GET:
-                self.fields['_preserved_filters'] = forms.CharField(
-                    initial=self.request.GET.urlencode(),
-                    widget=forms.HiddenInput(),
-                    required=False
-                )
-            
-            # Prefetching sakti agar loading form cepat walau calegnya ratusan
-            db_inst = RekapSuara.objects.with_totals().select_related(
-                'kecamatan__kabupaten_kota__dapil_ri'
-            ).prefetch_related(
-                'rincian_suara_partai', 'rincian_suara'
-            ).get(pk=self.instance.pk)
-            fmt = lambda v: "{:,}".format(v).replace(',', '.')
-            
-            # Cek Filter dari URL
-            filter_p = self.request.GET.get('p') if self.request else None
-            filter_f = self.request.GET.get('f') if self.request else None
-
-            self.fields['info_kb'] = forms.CharField(label="Kabupaten", initial=db_inst.kecamatan.kabupaten_kota.nama, required=False, disabled=True)
-            self.fields['info_dp'] = forms.CharField(label="Dapil RI", initial=db_inst.kecamatan.kabupaten_kota.dapil_ri.nama if db_inst.kecamatan.kabupaten_kota.dapil_ri else "-", required=False, disabled=True)
-            self.fields['res_s'] = forms.CharField(label=mark_safe("<b>Total Suara Sah</b>"), initial=fmt(db_inst.t_sah), required=False, disabled=True, widget=forms.TextInput(attrs={'style': 'font-weight:bold; color:#28a745; background:#f8f9fa; border:1px solid #28a745; width:300px;'}))
-            self.fields['res_t'] = forms.CharField(label=mark_safe("<b>Total Suara</b>"), initial=fmt(db_inst.t_total), required=False, disabled=True, widget=forms.TextInput(attrs={'style': 'font-weight:bold; color:#007bff; background:#eef6ff; border:1px solid #007bff; width:300px;'}))
-
-            order = OrderedDict()
-            
-            # Tambahkan link "Reset Filter" jika sedang difilter
-            if filter_p or filter_f:
-                reset_url = reverse('admin:pilegri_2024_rekapsuara_change', args=[self.instance.pk])
-                self.fields['reset_filter'] = forms.CharField(
-                    label=mark_safe(
-                        f'<div style="background:#fff9e6; border:1px solid #ffeeba; padding:8px 12px; border-radius:6px; margin-bottom:15px; display:inline-flex; align-items:center;">'
-                        f'<span style="color:#856404; font-weight:bold; margin-right:15px;">⚠️ MODE FILTER AKTIF</span>'
-                        f'<a href="{reset_url}" class="btn btn-sm btn-warning" style="font-weight:bold;">Tampilkan Semua Field (Reset)</a>'
-                        f'</div>'
-                    ),
-                    required=False,
-                    disabled=True,
-                    widget=forms.HiddenInput()
-                )
-                order['reset_filter'] = self.fields.pop('reset_filter')
-
-            # --- LOGIKA HIDE FIELD ---
-            hide_globals = ['res_s', 'res_t', 'suara_tidak_sah']
-            if filter_p: # Jika filter partai, sembunyikan total global & suara tidak sah
-                for h in hide_globals:
-                    if h in self.fields: self.fields.pop(h)
-            
-            for k in ['kecamatan', 'info_kb', 'info_dp', 'res_s', 'suara_tidak_sah', 'res_t']:
-                if k not in self.fields: continue
-                
-                # Sembunyikan global totals jika sedang filter partai/sah/ts
-                # TAPI tetap tampilkan info wilayah (info_kb/info_dp) untuk konteks rute
-                if filter_f == 'ts' and k not in ['info_kb', 'info_dp', 'suara_tidak_sah']:
-                    self.fields.pop(k)
-                    continue
-                if filter_f == 'sah' and k == 'suara_tidak_sah':
-                    self.fields.pop(k)
-                    continue
-                
-                order[k] = self.fields.pop(k)
-
-            # --- DATA RINCIAN ---
-            p_data = db_inst.rincian_suara_partai.all().values_list('partai_id', 'jumlah_suara')
-            c_data = db_inst.rincian_suara.all().values_list('caleg_id', 'jumlah_suara')
-            p_ids = dict(p_data)
-            c_ids = dict(c_data)
-            
-            calegs = list(Caleg.objects.filter(daerah_pemilihan=db_inst.kecamatan.kabupaten_kota.dapil_ri).select_related('partai').order_by('partai__no_urut', 'no_urut'))
-
-            # Jika filter Partai, tambahkan Total Suara Partai + Caleg
-            if filter_p:
-                pid_int = int(filter_p)
-                p_obj = Partai.objects.get(id=pid_int)
-                p_suara = p_ids.get(pid_int, 0)
-                c_suara_total = sum(c_ids.get(c.id, 0) for c in calegs if c.partai_id == pid_int)
-                self.fields['res_p_total'] = forms.CharField(
-                    label=mark_safe(f"<b>Total Suara {p_obj.nama} (Partai + Caleg)</b>"),
-                    initial=fmt(p_suara + c_suara_total),
-                    required=False, disabled=True,
-                    widget=forms.TextInput(attrs={'style': 'font-weight:bold; color:#e83e8c; background:#fff0f5; border:1px solid #e83e8c; width:300px;'})
-                )
-                order['res_p_total'] = self.fields.pop('res_p_total')
-
-            for p in Partai.objects.all().order_by('no_urut'):
-                # FILTER: Jika ada filter_p, lewatkan partai yang tidak cocok
-                if filter_p and str(p.id) != filter_p:
-                    continue
-                # FILTER: Jika filter_f == 'ts', tidak perlu tampilkan partai sama sekali
-                if filter_f == 'ts':
-                    break
-
-                f_p = f'su_p_{p.id}'
-                logo = format_html('<div style="display:inline-flex; align-items:center; background:#fff; padding:3px; border-radius:4px; border:1px solid #ddd; margin-right:8px; vertical-align:middle;"><img src="{}" style="height:22px;"></div>', p.logo.url) if p.logo else ""
-                self.fields[f_p] = forms.IntegerField(label=mark_safe(f"{logo}{p.no_urut}. {p.nama}"), initial=p_ids.get(p.id, 0), required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 180px; font-weight:bold; border-color: #333;'}))
-                order[f_p] = self.fields.pop(f_p)
-                for c in [c for c in calegs if c.partai_id == p.id]:
-                    f_c = f'su_c_{c.id}'
-                    self.fields[f_c] = forms.IntegerField(label=f"└ {c.no_urut}. {c.nama}", initial=c_ids.get(c.id, 0), required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 180px;'}))
-                    order[f_c] = self.fields.pop(f_c)
-            self.fields = order
+            layout = get_rekap_layout(self.request, self.instance)
+            # Field dinamis di-copy agar instance form tidak berbagi objek field
+            self.fields = OrderedDict(
+                (name, self.fields[name] if f_obj is None else copy.deepcopy(f_obj))
+                for name, f_obj in layout.items()
+            )
 
     def save(self, commit=True):
         ins = super().save(commit=commit)
@@ -166,118 +205,96 @@ class CalegAdmin(ImportExportModelAdmin):
         if obj.partai.logo: return format_html('<div style="display:flex; align-items:center;"><div style="background:#fff; padding:2px; border-radius:4px; border:1px solid #eee; box-shadow:0 1px 2px rgba(0,0,0,0.1); margin-right:10px; display:flex; width:30px; height:30px; align-items:center; justify-content:center;"><img src="{}" style="max-width:100%; max-height:100%; object-fit:contain;"></div><b>{}</b></div>', obj.partai.logo.url, obj.partai.nama)
         return obj.partai.nama
 
+@admin.register(PeringkatCaleg)
+class PeringkatCalegAdmin(admin.ModelAdmin):
+    """
+    Papan peringkat caleg (read-only). Tabel diperbarui setiap data rekap berubah (pilegri_2024.peringkat);
+    daftar per dapil/partai dibaca langsung lewat indeks (dapil, partai, peringkat).
+    """
+    list_display = ('get_peringkat', 'get_caleg', 'get_partai', 'get_dapil', 'get_total', 'get_terpilih')
+    list_filter = ('daerah_pemilihan', 'partai', 'terpilih')
+    search_fields = ('caleg__nama',)
+    ordering = ('daerah_pemilihan', 'partai', 'peringkat')
+    list_select_related = ('caleg',)
+    list_per_page = 100
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def _fmt(self, v): return "{:,}".format(v or 0).replace(',', '.')
+
+    @admin.display(description='#', ordering='peringkat')
+    def get_peringkat(self, obj):
+        return format_html('<div style="min-width:24px; height:24px; background:#333; color:#fff; border-radius:50%; display:flex; align-items:center; justify-content:center; font-weight:700; font-size:11px;">{}</div>', obj.peringkat)
+
+    @admin.display(description='Caleg', ordering='caleg__nama')
+    def get_caleg(self, obj):
+        return format_html('<b>{}</b><br><small style="color:#666;">No. Urut {}</small>', obj.caleg.nama, obj.caleg.no_urut)
+
+    @admin.display(description='Partai', ordering='partai__no_urut')
+    def get_partai(self, obj):
+        # Metadata partai & dapil dari cache referensi, bukan join
+        p = next((p for p in get_partai_list() if p.id == obj.partai_id), None)
+        if p is None:
+            return '-'
+        if p.logo_url:
+            return format_html('<img src="{}" title="{}" style="height:20px; width:20px; object-fit:contain; margin-right:6px;"><b>{}</b>', p.logo_url, p.nama, p.nama)
+        return p.nama
+
+    @admin.display(description='Dapil', ordering='daerah_pemilihan__nama')
+    def get_dapil(self, obj):
+        dapil = get_dapil_ri().get(obj.daerah_pemilihan_id)
+        return dapil.nama if dapil else '-'
+
+    @admin.display(description='Total Suara', ordering='total_suara')
+    def get_total(self, obj):
+        return format_html('<b>{}</b>', self._fmt(obj.total_suara))
+
+    @admin.display(description='Status', ordering='terpilih')
+    def get_terpilih(self, obj):
+        if obj.terpilih:
+            return format_html('<span style="background:#28a745; color:#fff; padding:2px 8px; border-radius:10px; font-size:11px; font-weight:700;"><i class="fas fa-check"></i> Terpilih</span>')
+        return format_html('<span style="color:#999; font-size:11px;">-</span>')
+
 @admin.register(RekapSuara)
-class RekapSuaraAdmin(ImportExportModelAdmin):
+class RekapSuaraAdmin(BareCountAdminMixin, ImportExportModelAdmin):
     form = RekapSuaraForm
     list_display = ('get_wilayah_dyn',) # Dinamis
     list_display_links = ('get_wilayah_dyn',)
-    list_filter = ('kecamatan__kabupaten_kota__dapil_ri', 'kecamatan__kabupaten_kota')
+    list_filter = ('kecamatan__kabupaten_kota__dapil_ri', 'kecamatan__kabupaten_kota', AnomaliPilegRIFilter)
     search_fields = ('kecamatan__nama', 'kecamatan__kabupaten_kota__nama')
     autocomplete_fields = ('kecamatan',)
     ordering = ('kecamatan__kabupaten_kota__dapil_ri__nama', 'kecamatan__kabupaten_kota__nama', 'kecamatan__nama')
-    list_per_page = 10
+    list_per_page = 50
     list_max_show_all = 1000
-
-    def get_wilayah_dyn(self, obj): return ""
-    def get_sh_dyn(self, obj): return ""
-    def suara_total_tidak_sah_fmt_dyn(self, obj): return ""
-    def get_tt_dyn(self, obj): return ""
+    count_models = (Kecamatan, KabupatenKota, AnomaliKecamatan)
+    import_export_change_list_template = 'admin/pilegri_2024/rekapsuara/change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        # Kolom dibagi antar request; filter aktif dibaca dari request ini saat render
+        with changelist_request(request):
+            response = super().changelist_view(request, extra_context)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
 
     def get_list_display(self, request):
-        base_query = request.GET.urlencode()
-
-        # --- Dynamic Wilayah Link (ALWAYS RE-CREATE to overwrite stubs) ---
-        def _gen_wilayah(obj, bq=base_query):
-            content = self.get_wilayah_static(obj)
-            url = reverse('admin:pilegri_2024_rekapsuara_change', args=[obj.pk])
-            full_url = f"{url}?{bq}".rstrip('?')
-            return mark_safe(f'<a href="{full_url}">{content}</a>')
-        _gen_wilayah.short_description = 'Wilayah / Dapil'
-        _gen_wilayah.admin_order_field = 'kecamatan__nama'
-        setattr(self, 'get_wilayah_dyn', _gen_wilayah)
-
-        cols = ['get_wilayah_dyn', 'get_tps_dpt']
-        
-        # Capture params khusus untuk filter Partai/Sah/Tidak Sah
-        p_params = request.GET.copy()
-        for k in ['p', 'f']: 
-            if k in p_params: p_params.pop(k)
-        p_query = p_params.urlencode()
-        p_conn = '&' if p_query else ''
-
-        parties = list(Partai.objects.all().order_by('no_urut'))
-        for p in parties:
-            f_name = f'p_{p.id}_vt'
-            p_id, p_name = p.id, p.nama
-            p_logo = p.logo.url if p.logo else None
-            
-            def _gv(obj, pid=p_id, bq=p_query, qc=p_conn):
-                v = getattr(obj, f'p_{pid}_vt', 0)
-                t_sah = getattr(obj, 't_sah', 0)
-                fmt_v = "{:,}".format(v).replace(',', '.')
-                
-                # Link with PRESERVED FILTERS + PARTY FILTER
-                url = reverse('admin:pilegri_2024_rekapsuara_change', args=[obj.pk])
-                full_url = f"{url}?{bq}{qc}p={pid}".rstrip('&')
-                
-                if t_sah > 0:
-                    pct = (v / t_sah) * 100
-                    p_str = f"({pct:.1f}%)"
-                    return format_html(
-                        '<div style="text-align:center; min-width:50px;"><a href="{}"><b>{}</b></a><br><small style="color:#666; font-size:11.5px;">{}</small></div>', 
-                        full_url, fmt_v, p_str
-                    )
-                return format_html('<div style="text-align:center;"><a href="{}">{}</a></div>', full_url, fmt_v)
-            
-            if p_logo:
-                _gv.short_description = mark_safe(
-                    f'<div style="text-align:center; min-width:40px;">'
-                    f'<img src="{p_logo}" title="{p_name}" style="height:20px; width:20px; object-fit:contain;"><br>'
-                    f'<span style="font-size:11.5px; font-weight:normal; display:block; margin-top:2px;">{p_name}</span>'
-                    f'</div>'
-                )
-            else:
-                _gv.short_description = p_name
-            
-            _gv.admin_order_field = f_name
-            setattr(self, f_name, _gv)
-            cols.append(f_name)
-            
-        # Register dynamic helpers for summary columns to preserve filters
-        summary_cols = {
-            'get_sh': ('sah', 'Suara Sah', 't_sah'), 
-            'suara_total_tidak_sah_fmt': ('ts', 'Tidak Sah', 'suara_tidak_sah'), 
-            'get_tt': ('', 'Total Suara', 't_total')
-        }
-        for col_name, (f_val, label, order_field) in summary_cols.items():
-            dyn_name = col_name + '_dyn'
-            # Closure untuk mengunci variabel per request. Gunakan p_query & p_conn.
-            def _create_dyn(fv=f_val, bquery=p_query, qconn=p_conn, static_root=col_name, lbl=label, ord_f=order_field):
-                def dynamic_summary(obj):
-                    original_method = getattr(self, f'{static_root}_static')
-                    original_html = original_method(obj)
-                    
-                    url = reverse('admin:pilegri_2024_rekapsuara_change', args=[obj.pk])
-                    f_param = f"f={fv}" if fv else ""
-                    full_url = f"{url}?{bquery}{qconn}{f_param}".rstrip('?&')
-                    
-                    # Lebih robust: replace href="#" ATAU href="" jika ada
-                    html = original_html.replace('href="#"', f'href="{full_url}"')
-                    return mark_safe(html.replace('href=""', f'href="{full_url}"'))
-                
-                dynamic_summary.short_description = lbl
-                dynamic_summary.admin_order_field = ord_f
-                return dynamic_summary
+        return ('get_wilayah_dyn', 'get_tps_dpt', *get_party_columns('rekap'),
+                'get_sh_dyn', 'suara_total_tidak_sah_fmt_dyn', 'get_tt_dyn')
 
-            setattr(self, dyn_name, _create_dyn())
-        
-        return cols + ['get_sh_dyn', 'suara_total_tidak_sah_fmt_dyn', 'get_tt_dyn']
+    def get_sortable_by(self, request):
+        return self.get_list_display(request)
 
     def get_fields(self, request, obj=None):
         if obj:
-            # Pass request agar form tahu filter mana yang aktif saat menentukan list field
-            form_inst = self.form(instance=obj, request=request)
-            return list(form_inst.fields.keys())
+            # Pass request agar layout tahu filter mana yang aktif saat menentukan list field
+            return list(get_rekap_layout(request, obj).keys())
         return ['kecamatan', 'suara_tidak_sah']
 
     def get_form(self, request, obj=None, **kwargs):
@@ -287,11 +304,10 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
             model_fields = [f.name for f in self.model._meta.get_fields() if not f.is_relation or f.one_to_one or f.many_to_one]
             actual_fields = [f for f in self.get_fields(request, obj) if f in model_fields]
             FormClass = modelform_factory(self.model, form=self.form, fields=actual_fields)
-            
-            # TRICK: Discover dynamic fields dan tambahkan ke base_fields biar Admin tidak ngamuk FieldError
-            dummy = self.form(instance=obj, request=request)
-            for f_name, f_obj in dummy.fields.items():
-                if f_name not in FormClass.base_fields:
+
+            # TRICK: Daftarkan field dinamis ke base_fields biar Admin tidak ngamuk FieldError
+            for f_name, f_obj in get_rekap_layout(request, obj).items():
+                if f_obj is not None and f_name not in FormClass.base_fields:
                     FormClass.base_fields[f_name] = f_obj
         else:
             FormClass = super().get_form(request, obj, **kwargs)
@@ -351,40 +367,194 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
         response = super().response_change(request, obj)
         return self._preserve_query_params(request, response)
 
+    # --- INPUT PER PARTAI (LAZY LOAD + AUTOSAVE) ---
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        custom_urls = [
+            path('<int:pk>/input-partai/', self.admin_site.admin_view(self.input_partai_view), name='%s_%s_input_partai' % info),
+            path('<int:pk>/input-partai/<int:partai_id>/', self.admin_site.admin_view(self.partai_block_view), name='%s_%s_partai_block' % info),
+            path('data-grid/', self.admin_site.admin_view(self.data_grid_view), name='%s_%s_data_grid' % info),
+            path('data-grid/data/', self.admin_site.admin_view(self.data_grid_data_view), name='%s_%s_data_grid_data' % info),
+        ]
+        return custom_urls + super().get_urls()
+
+    # --- DATA GRID VIRTUAL (JSON MATRIX, RENDER DI BROWSER) ---
+    def _grid_matrix(self):
+        """
+        Seluruh rekap sebagai matriks ringkas: 3 query, tanpa format_html per sel.
+        rows: [rekap_id, kecamatan, kab_id, tps, dpt, tidak_sah, sah, [suara per partai], [share per partai, per mil]]
+        """
+        from django.db.models import Sum
+        parties = get_partai_list()
+        col = {p.id: i for i, p in enumerate(parties)}
+        votes = {}
+        for rid, pid, v in SuaraPartai.objects.values_list('rekap_suara_id', 'partai_id', 'jumlah_suara'):
+            if pid in col:
+                votes.setdefault(rid, [0] * len(parties))[col[pid]] += v or 0
+        for d in DetailSuaraCaleg.objects.values('rekap_suara_id', 'caleg__partai_id').annotate(t=Sum('jumlah_suara')).order_by():
+            if d['caleg__partai_id'] in col:
+                votes.setdefault(d['rekap_suara_id'], [0] * len(parties))[col[d['caleg__partai_id']]] += d['t'] or 0
+
+        # Nama kecamatan/kabupaten/dapil dari cache referensi, bukan join
+        wilayah, dapil_ri = get_wilayah(), get_dapil_ri()
+        kabs, dapils, rows = {}, {}, []
+        base = RekapSuara.objects.order_by(*self.ordering).values_list(
+            'id', 'kecamatan_id', 'kecamatan__tpsdpt_pemilu__jumlah_tps', 'kecamatan__tpsdpt_pemilu__jumlah_dpt', 'suara_tidak_sah'
+        )
+        for rid, kec_id, tps, dpt, ts in base:
+            kec = wilayah.kecamatan[kec_id]
+            kab = wilayah.kabupaten[kec.kabupaten_id]
+            kabs[kab.id] = [kab.nama, kab.dapil_ri_id]
+            if kab.dapil_ri_id in dapil_ri:
+                dapils[kab.dapil_ri_id] = dapil_ri[kab.dapil_ri_id].nama
+            v = votes.get(rid, [0] * len(parties))
+            sah = sum(v)
+            rows.append([rid, kec.nama, kab.id, tps or 0, dpt or 0, ts or 0, sah, v,
+                         [round(x * 1000 / sah) if sah else 0 for x in v]])
+        return {
+            'parties': [[p.id, p.nama, p.logo_url] for p in parties],
+            'kabupaten': kabs,
+            'dapil': dapils,
+            'rows': rows,
+        }
+
+    def data_grid_view(self, request):
+        """Alternatif changelist: satu matriks JSON, baris dirender virtual di browser."""
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Data Grid Rekap Suara RI",
+            'data_url': reverse('admin:pilegri_2024_rekapsuara_data_grid_data'),
+            # URL form dengan pk placeholder 0, diganti di JS per baris
+            'change_url_tpl': reverse('admin:pilegri_2024_rekapsuara_change', args=[0]),
+        }
+        return TemplateResponse(request, 'admin/pilegri_2024/rekapsuara/data_grid.html', context)
+
+    def data_grid_data_view(self, request):
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        return JsonResponse(self._grid_matrix(), json_dumps_params={'separators': (',', ':')})
+
+    def _get_rekap_ringan(self, pk):
+        """Ambil rekap tanpa anotasi berat changelist (get_queryset)."""
+        return get_object_or_404(RekapSuara.objects.select_related('kecamatan'), pk=pk)
+
+    def _block_totals(self, pk, partai_id):
+        """Total berjalan dihitung server dari data tersimpan (satu query)."""
+        row = RekapSuara.objects.filter(pk=pk).with_totals().with_partai_totals([partai_id]).values(
+            't_sah', 't_total', 'suara_tidak_sah', f'p_{partai_id}_vt'
+        ).get()
+        return {'sah': row['t_sah'], 'tidak_sah': row['suara_tidak_sah'], 'total': row['t_total'], 'partai': row[f'p_{partai_id}_vt']}
+
+    def input_partai_view(self, request, pk):
+        """Halaman input suara per tab partai. Field caleg dimuat per partai via JSON."""
+        obj = self._get_rekap_ringan(pk)
+        if not self.has_view_or_change_permission(request, obj):
+            raise PermissionDenied
+        nama_kec, nama_kab, nama_dapil = get_nama_wilayah(obj.kecamatan_id)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'original': obj,
+            'title': f"Input Per Partai - {nama_kec}",
+            'kabupaten': nama_kab,
+            'dapil': nama_dapil,
+            'tabs': [{'id': p['id'], 'label': p['label'], 'n_caleg': len(p['calegs'])} for p in get_dapil_schema(get_dapil_ri_id(obj.kecamatan_id))],
+            'block_base_url': reverse('admin:pilegri_2024_rekapsuara_input_partai', args=[pk]),
+            'change_url': reverse('admin:pilegri_2024_rekapsuara_change', args=[pk]),
+            'can_change': self.has_change_permission(request, obj),
+        }
+        return TemplateResponse(request, 'admin/pilegri_2024/rekapsuara/input_partai.html', context)
+
+    def partai_block_view(self, request, pk, partai_id):
+        """
+        GET  -> field satu partai (suara partai + caleg) beserta nilai tersimpan.
+        POST -> autosave blok partai (JSON) dengan satu bulk upsert per tabel.
+        """
+        obj = self._get_rekap_ringan(pk)
+        partai = next((p for p in get_dapil_schema(get_dapil_ri_id(obj.kecamatan_id)) if p['id'] == partai_id), None)
+        if partai is None:
+            raise Http404("Partai tidak ditemukan.")
+        caleg_ids = {c_id for c_id, _ in partai['calegs']}
+
+        if request.method == 'POST':
+            if not self.has_change_permission(request, obj):
+                raise PermissionDenied
+            try:
+                payload = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({'error': 'Payload JSON tidak valid.'}, status=400)
+            if not isinstance(payload, dict) or not isinstance(payload.get('caleg') or {}, dict):
+                return JsonResponse({'error': 'Payload harus objek {"suara_partai": n, "caleg": {id: n}}.'}, status=400)
+
+            errors = {}
+            def _clean(key, val):
+                # Hanya bilangan bulat (atau string digit); pecahan & boolean ditolak, kosong = 0
+                if val is None or val == '':
+                    val = 0
+                elif isinstance(val, str) and val.strip().lstrip('-').isdigit():
+                    val = int(val.strip())
+                elif isinstance(val, bool) or not isinstance(val, int):
+                    errors[key] = 'Harus berupa bilangan bulat.'
+                    return None
+                if val < 0:
+                    errors[key] = 'Tidak boleh negatif.'
+                    return None
+                return val
+
+            suara_partai = _clean('suara_partai', payload['suara_partai']) if 'suara_partai' in payload else None
+            caleg_vals = {}
+            for c_id, val in (payload.get('caleg') or {}).items():
+                key = f'caleg_{c_id}'
+                if not str(c_id).isdigit() or int(c_id) not in caleg_ids:
+                    errors[key] = 'Caleg bukan milik partai ini.'
+                    continue
+                val = _clean(key, val)
+                if val is not None:
+                    caleg_vals[int(c_id)] = val
+            if errors:
+                return JsonResponse({'errors': errors}, status=400)
+
+            # Partial upsert: hanya nilai yang dikirim (berubah) saja yang ditulis
+            with transaction.atomic():
+                if suara_partai is not None:
+                    bulk_upsert(SuaraPartai, [SuaraPartai(rekap_suara_id=pk, partai_id=partai_id, jumlah_suara=suara_partai)],
+                                unique_fields=['rekap_suara', 'partai'], update_fields=['jumlah_suara'])
+                bulk_upsert(DetailSuaraCaleg, [DetailSuaraCaleg(rekap_suara_id=pk, caleg_id=c_id, jumlah_suara=v) for c_id, v in caleg_vals.items()],
+                            unique_fields=['rekap_suara', 'caleg'], update_fields=['jumlah_suara'])
+            return JsonResponse({'ok': True, 'totals': self._block_totals(pk, partai_id)})
+
+        if not self.has_view_or_change_permission(request, obj):
+            raise PermissionDenied
+        p_val = SuaraPartai.objects.filter(rekap_suara_id=pk, partai_id=partai_id).values_list('jumlah_suara', flat=True).first()
+        c_vals = dict(DetailSuaraCaleg.objects.filter(rekap_suara_id=pk, caleg_id__in=caleg_ids).values_list('caleg_id', 'jumlah_suara'))
+        return JsonResponse({
+            'partai': {'id': partai['id'], 'nama': partai['nama'], 'no_urut': partai['no_urut'], 'logo_url': partai['logo_url'], 'suara': p_val or 0},
+            'caleg': [{'id': c_id, 'label': c_label, 'suara': c_vals.get(c_id, 0)} for c_id, c_label in partai['calegs']],
+            'totals': self._block_totals(pk, partai_id),
+        })
+
     def get_queryset(self, request):
         from django.db.models import Sum, Q, OuterRef, Subquery, IntegerField, F
         from django.db.models.functions import Coalesce
-        # select_related & prefetch_related buat ngerem jumlah hit ke DB
-        qs = super().get_queryset(request).with_totals().select_related(
-            'kecamatan__kabupaten_kota__dapil_ri',
-            'kecamatan__tpsdpt_pemilu'
-        )
-        
-        # Cache partai untuk header & annotation
-        self._parties = list(Partai.objects.all().order_by('no_urut'))
-        
+        # Nama kab/dapil diambil dari cache referensi, jadi cukup join kecamatan
+        qs = super().get_queryset(request).with_totals().select_related('kecamatan')
+
         qs = qs.annotate(
             tps_k=Coalesce(F('kecamatan__tpsdpt_pemilu__jumlah_tps'), 0),
             dpt_k=Coalesce(F('kecamatan__tpsdpt_pemilu__jumlah_dpt'), 0)
         )
 
-        anns = {}
-        for p in self._parties:
-            anns[f'p_{p.id}_vt'] = Coalesce(Subquery(
-                SuaraPartai.objects.filter(rekap_suara=OuterRef('pk'), partai=p).values('jumlah_suara')
-            ), 0) + Coalesce(Subquery(
-                DetailSuaraCaleg.objects.filter(rekap_suara=OuterRef('pk'), caleg__partai=p).values('rekap_suara').annotate(t=Sum('jumlah_suara')).values('t'),
-                output_field=IntegerField()
-            ), 0)
-        return qs.annotate(**anns)
+        return qs.with_partai_totals(get_party_ids())
 
     @admin.display(description='Wilayah / Dapil', ordering='kecamatan__nama')
-    def get_wilayah_static(self, obj):
-        kab = obj.kecamatan.kabupaten_kota.nama
-        dp = obj.kecamatan.kabupaten_kota.dapil_ri.nama if obj.kecamatan.kabupaten_kota.dapil_ri else "-"
+    def get_wilayah_dyn(self, obj):
+        kec, kab, dp = get_nama_wilayah(obj.kecamatan_id)
         return format_html(
-            '<div style="line-height:1.2;"><b>{}</b><br><span style="font-size:10.5px; color:#666;">{} | {}</span></div>',
-            obj.kecamatan.nama, kab, dp
+            '<a href="{}"><div style="line-height:1.2;"><b>{}</b><br><span style="font-size:10.5px; color:#666;">{} | {}</span></div></a>',
+            rekap_change_url(obj.pk), kec, kab, dp
         )
 
     @admin.display(description='TPS / DPT', ordering='tps_k')
@@ -397,61 +567,111 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
         )
 
     def _fmt(self, v): return "{:,}".format(v or 0).replace(',', '.')
-    @admin.display(description='Suara Sah')
-    def get_sh_static(self, obj):
+    @admin.display(description='Suara Sah', ordering='t_sah')
+    def get_sh_dyn(self, obj):
         v, t = obj.t_sah, obj.t_total
         p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><a href="#"><b>{}</b></a><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
+        return format_html('<div style="text-align:center;"><a href="{}"><b>{}</b></a><br><small style="color:#666; font-size:11.5px;">{}</small></div>', rekap_change_url(obj.pk, 'f=sah'), self._fmt(v), p)
 
-    @admin.display(description='Tidak Sah')
-    def suara_total_tidak_sah_fmt_static(self, obj):
+    @admin.display(description='Tidak Sah', ordering='suara_tidak_sah')
+    def suara_total_tidak_sah_fmt_dyn(self, obj):
         v, t = obj.suara_tidak_sah, obj.t_total
         p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><a href="#"><b>{}</b></a><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
+        return format_html('<div style="text-align:center;"><a href="{}"><b>{}</b></a><br><small style="color:#666; font-size:11.5px;">{}</small></div>', rekap_change_url(obj.pk, 'f=ts'), self._fmt(v), p)
 
-    @admin.display(description='Total Suara')
-    def get_tt_static(self, obj):
+    @admin.display(description='Total Suara', ordering='t_total')
+    def get_tt_dyn(self, obj):
         v, d = obj.t_total, obj.dpt_k
         p = f"({(v/d*100):.1f}%)" if d > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><a href="#"><b>{}</b></a><br><small style="color:#007bff; font-weight:bold; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
+        return format_html('<div style="text-align:center;"><a href="{}"><b>{}</b></a><br><small style="color:#007bff; font-weight:bold; font-size:11.5px;">{}</small></div>', rekap_change_url(obj.pk), self._fmt(v), p)
 
 @admin.register(DapilPilegRI)
-class DapilPilegRIAdmin(admin.ModelAdmin):
+class DapilPilegRIAdmin(BareCountAdminMixin, admin.ModelAdmin):
     list_display = ('nama',) # Dinamis
     actions = None
     ordering = ('nama',)
-    list_per_page = 10
+    list_per_page = 50
     list_max_show_all = 1000
+    change_list_template = 'admin/pilegri_2024/dapilpilegri/change_list.html'
     
     def get_list_display(self, request):
-        cols = ['nama', 'get_tps_dpt']
-        self._parties = list(Partai.objects.all().order_by('no_urut'))
-        for p in self._parties:
-            f_name = f'p_{p.id}_vt'
-            if not hasattr(self, f_name):
-                p_id, p_name = p.id, p.nama
-                p_logo = p.logo.url if p.logo else None
-                def _gv(obj, pid=p_id):
-                    v = getattr(obj, f'p_{pid}_vt', 0)
-                    t_sah = obj.sah_total
-                    fmt_v = self._fmt(v)
-                    if t_sah > 0:
-                        p_str = f"({(v/t_sah*100):.1f}%)"
-                        return format_html('<div style="text-align:center; min-width:40px;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', fmt_v, p_str)
-                    return format_html('<div style="text-align:center;">{}</div>', fmt_v)
-                if p_logo:
-                    _gv.short_description = mark_safe(f'<div style="text-align:center;"><img src="{p_logo}" style="height:20px;"><br><span style="font-size:11.5px;">{p_name}</span></div>')
-                else:
-                    _gv.short_description = p_name
-                setattr(self, f_name, _gv)
-            cols.append(f_name)
-        return cols + ['get_sah_fmt', 'get_ts_fmt', 'get_tt_fmt']
+        return ('nama', 'get_tps_dpt', 'get_kursi', *get_party_columns('agregat'), 'get_sah_fmt', 'get_ts_fmt', 'get_tt_fmt')
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        custom_urls = [
+            path('simulasi-kursi/', self.admin_site.admin_view(self.simulasi_kursi_view), name='%s_%s_simulasi_kursi' % info),
+        ]
+        return custom_urls + super().get_urls()
+
+    @admin.display(description='Kursi (Sainte-Laguë)')
+    def get_kursi(self, obj):
+        # Perolehan kursi semua dapil dihitung sekali per versi data (pilegri_2024.kursi)
+        per_partai = kursi_per_dapil().get(obj.pk, {})
+        if not per_partai:
+            return format_html('<span style="color:#999;">-</span>')
+        badges = mark_safe(''.join(
+            format_html(
+                '<span title="{}" style="display:inline-block; margin:1px; padding:1px 5px; border-radius:3px; font-size:11px; '
+                'background:{}; color:#fff; text-shadow:0 0 2px #000;">{} <b>{}</b></span>',
+                p.nama, p.warna_hex, p.nama, per_partai[p.id]
+            ) for p in get_partai_list() if p.id in per_partai
+        ))
+        return format_html('<div style="min-width:140px;">{}<br><small style="color:#666;">{} dari {} kursi</small></div>',
+                           badges, sum(per_partai.values()), obj.kursi)
+
+    def simulasi_kursi_view(self, request):
+        """Perolehan kursi semua dapil + simulasi perpindahan suara antar partai."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            maks = min(max(float(request.GET.get('maks', 10)), 0.5), 50)
+            langkah = min(max(float(request.GET.get('langkah', 0.5)), 0.1), maks)
+        except ValueError:
+            maks, langkah = 10.0, 0.5
+
+        pk = get_perolehan_kursi()
+        partai = {p.id: p for p in get_partai_list()}
+        dapil_ri = get_dapil_ri()
+        total_suara = pk.suara.sum()
+        ringkasan = [
+            {
+                'partai': partai[pid],
+                'suara': int(pk.suara[:, j].sum()),
+                'suara_fmt': self._fmt(int(pk.suara[:, j].sum())),
+                'persen': pk.suara[:, j].sum() / total_suara * 100 if total_suara else 0,
+                'lolos': bool(pk.lolos[j]),
+                'kursi': int(pk.hasil[:, j].sum()),
+            } for j, pid in enumerate(pk.partai_ids)
+        ]
+        ringkasan.sort(key=lambda r: (-r['kursi'], -r['suara']))
+        simulasi = [
+            {
+                **t,
+                'suara_pindah_fmt': self._fmt(t['suara_pindah']),
+                'dari': partai[t['dari']], 'ke': partai[t['ke']],
+                'perubahan': [(partai[pid], d) for pid, d in t['perubahan'].items()],
+                'dapil': [dapil_ri[d].nama for d in t['dapil']],
+            } for t in get_simulasi(maks, langkah)[:200]
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Simulasi Kursi DPR RI (Sainte-Laguë)",
+            'ringkasan': ringkasan,
+            'total_kursi': int(pk.kursi.sum()),
+            'simulasi': simulasi,
+            'maks': maks, 'langkah': langkah,
+        }
+        return TemplateResponse(request, 'admin/pilegri_2024/dapilpilegri/simulasi_kursi.html', context)
+
+    def get_sortable_by(self, request):
+        return self.get_list_display(request)
 
     def get_queryset(self, request):
         from django.db.models import Sum, OuterRef, Subquery, IntegerField, F
         from django.db.models.functions import Coalesce
         qs = super().get_queryset(request)
-        self._parties = list(Partai.objects.all().order_by('no_urut'))
         
         # Annotate dasar level Dapil
         qs = qs.annotate(
@@ -465,12 +685,12 @@ class DapilPilegRIAdmin(admin.ModelAdmin):
         
         # Annotate party total level Dapil
         anns = {}
-        for p in self._parties:
-            anns[f'p_{p.id}_vt'] = Coalesce(Subquery(
-                SuaraPartai.objects.filter(rekap_suara__kecamatan__kabupaten_kota__dapil_ri=OuterRef('pk'), partai=p).values('rekap_suara__kecamatan__kabupaten_kota__dapil_ri').annotate(t=Sum('jumlah_suara')).values('t'),
+        for pid in get_party_ids():
+            anns[f'p_{pid}_vt'] = Coalesce(Subquery(
+                SuaraPartai.objects.filter(rekap_suara__kecamatan__kabupaten_kota__dapil_ri=OuterRef('pk'), partai_id=pid).values('rekap_suara__kecamatan__kabupaten_kota__dapil_ri').annotate(t=Sum('jumlah_suara')).values('t'),
                 output_field=IntegerField()
             ), 0) + Coalesce(Subquery(
-                DetailSuaraCaleg.objects.filter(rekap_suara__kecamatan__kabupaten_kota__dapil_ri=OuterRef('pk'), caleg__partai=p).values('rekap_suara__kecamatan__kabupaten_kota__dapil_ri').annotate(t=Sum('jumlah_suara')).values('t'),
+                DetailSuaraCaleg.objects.filter(rekap_suara__kecamatan__kabupaten_kota__dapil_ri=OuterRef('pk'), caleg__partai_id=pid).values('rekap_suara__kecamatan__kabupaten_kota__dapil_ri').annotate(t=Sum('jumlah_suara')).values('t'),
                 output_field=IntegerField()
             ), 0)
         
@@ -507,42 +727,23 @@ class DapilPilegRIAdmin(admin.ModelAdmin):
         p = f"({(obj.tt_total/obj.dpt_total*100):.1f}%)" if obj.dpt_total > 0 else "(0.0%)"
         return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#007bff; font-weight:bold; font-size:11.5px;">{}</small></div>', self._fmt(obj.tt_total), p)
 @admin.register(KabupatenPilegRI)
-class KabupatenPilegRIAdmin(admin.ModelAdmin):
+class KabupatenPilegRIAdmin(BareCountAdminMixin, admin.ModelAdmin):
     list_display = ('nama',) # Dinamis
     actions = None
     ordering = ('nama',)
-    list_per_page = 10
+    list_per_page = 50
     list_max_show_all = 1000
     
     def get_list_display(self, request):
-        cols = ['get_kab_dapil', 'get_tps_dpt']
-        self._parties = list(Partai.objects.all().order_by('no_urut'))
-        for p in self._parties:
-            f_name = f'p_{p.id}_vt'
-            if not hasattr(self, f_name):
-                p_id, p_name = p.id, p.nama
-                p_logo = p.logo.url if p.logo else None
-                def _gv(obj, pid=p_id):
-                    v = getattr(obj, f'p_{pid}_vt', 0)
-                    t_sah = obj.sah_total
-                    fmt_v = self._fmt(v)
-                    if t_sah > 0:
-                        p_str = f"({(v/t_sah*100):.1f}%)"
-                        return format_html('<div style="text-align:center; min-width:40px;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', fmt_v, p_str)
-                    return format_html('<div style="text-align:center;">{}</div>', fmt_v)
-                if p_logo:
-                    _gv.short_description = mark_safe(f'<div style="text-align:center;"><img src="{p_logo}" style="height:20px;"><br><span style="font-size:11.5px;">{p_name}</span></div>')
-                else:
-                    _gv.short_description = p_name
-                setattr(self, f_name, _gv)
-            cols.append(f_name)
-        return cols + ['get_sah_fmt', 'get_ts_fmt', 'get_tt_fmt']
+        return ('get_kab_dapil', 'get_tps_dpt', *get_party_columns('agregat'), 'get_sah_fmt', 'get_ts_fmt', 'get_tt_fmt')
+
+    def get_sortable_by(self, request):
+        return self.get_list_display(request)
 
     def get_queryset(self, request):
         from django.db.models import Sum, OuterRef, Subquery, IntegerField, F
         from django.db.models.functions import Coalesce
-        qs = super().get_queryset(request).select_related('dapil_ri')
-        self._parties = list(Partai.objects.all().order_by('no_urut'))
+        qs = super().get_queryset(request)
         
         # Annotate dasar (TPS, DPT, Tidak Sah)
         qs = qs.annotate(
@@ -556,12 +757,12 @@ class KabupatenPilegRIAdmin(admin.ModelAdmin):
         
         # Annotate party total (Partai + Caleg se-kabupaten)
         anns = {}
-        for p in self._parties:
-            anns[f'p_{p.id}_vt'] = Coalesce(Subquery(
-                SuaraPartai.objects.filter(rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), partai=p).values('rekap_suara__kecamatan__kabupaten_kota').annotate(t=Sum('jumlah_suara')).values('t'),
+        for pid in get_party_ids():
+            anns[f'p_{pid}_vt'] = Coalesce(Subquery(
+                SuaraPartai.objects.filter(rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), partai_id=pid).values('rekap_suara__kecamatan__kabupaten_kota').annotate(t=Sum('jumlah_suara')).values('t'),
                 output_field=IntegerField()
             ), 0) + Coalesce(Subquery(
-                DetailSuaraCaleg.objects.filter(rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), caleg__partai=p).values('rekap_suara__kecamatan__kabupaten_kota').annotate(t=Sum('jumlah_suara')).values('t'),
+                DetailSuaraCaleg.objects.filter(rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), caleg__partai_id=pid).values('rekap_suara__kecamatan__kabupaten_kota').annotate(t=Sum('jumlah_suara')).values('t'),
                 output_field=IntegerField()
             ), 0)
         
@@ -582,7 +783,8 @@ class KabupatenPilegRIAdmin(admin.ModelAdmin):
 
     @admin.display(description='Kabupaten / Dapil', ordering='nama')
     def get_kab_dapil(self, obj):
-        dp = obj.dapil_ri.nama if obj.dapil_ri else "-"
+        dapil = get_dapil_ri().get(obj.dapil_ri_id)
+        dp = dapil.nama if dapil else "-"
         return format_html(
             '<div style="line-height:1.2;"><b>{}</b><br><span style="font-size:10.5px; color:#666;">{}</span></div>',
             obj.nama, dp
@@ -5,3 +5,7 @@ class Pilegri2024Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pilegri_2024'
     verbose_name = 'Pileg RI 2024'
+
+    def ready(self):
+        # Daftarkan signal invalidasi cache skema form & sinkronisasi papan peringkat
+        from . import form_schema, peringkat  # noqa: F401
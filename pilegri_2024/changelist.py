@@ -0,0 +1,145 @@
+"""
+Kolom changelist dinamis (satu kolom per partai) untuk admin Pileg RI.
+
+Kolom dibangun sekali per versi cache Partai (core.refdata) lalu dipakai bersama oleh semua
+request & thread; tidak ada lagi setattr ke ModelAdmin. State per request
+(query string filter yang aktif) tidak disimpan di kolom maupun di `self`,
+tapi dibaca dari request yang sedang dirender lewat ContextVar.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from django.urls import reverse
+from django.utils.html import format_html
+
+from core.refdata import partai_cache, get_partai_list
+
+_lock = threading.Lock()
+_columns_cache = {}
+_current_request = contextvars.ContextVar('pilegri_changelist_request', default=None)
+
+
+def _fmt(v):
+    return "{:,}".format(v or 0).replace(',', '.')
+
+
+def get_party_ids():
+    return [p.id for p in get_partai_list()]
+
+
+# ==============================================================================
+# STATE URL PER REQUEST
+# ==============================================================================
+
+@contextmanager
+def changelist_request(request):
+    """Tandai request yang sedang dirender agar kolom bisa membaca filter aktifnya."""
+    token = _current_request.set(request)
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+def get_list_query(exclude=()):
+    """Query string changelist aktif tanpa parameter `exclude`, dihitung sekali per request."""
+    request = _current_request.get()
+    if request is None:
+        return ''
+    cache = request.__dict__.setdefault('_pilegri_list_query', {})
+    if exclude not in cache:
+        params = request.GET.copy()
+        for k in exclude:
+            params.pop(k, None)
+        cache[exclude] = params.urlencode()
+    return cache[exclude]
+
+
+def rekap_change_url(pk, extra=''):
+    """URL form rekap dengan filter changelist dipertahankan + parameter tambahan (p=/f=)."""
+    url = reverse('admin:pilegri_2024_rekapsuara_change', args=[pk])
+    query = get_list_query(exclude=('p', 'f') if extra else ())
+    conn = '&' if query and extra else ''
+    return f"{url}?{query}{conn}{extra}".rstrip('?&')
+
+
+# ==============================================================================
+# KOLOM PER PARTAI
+# ==============================================================================
+
+def _rekap_party_column(party):
+    pid = party.id
+    attr = f'p_{pid}_vt'
+
+    def column(obj):
+        v = getattr(obj, attr, 0)
+        t_sah = getattr(obj, 't_sah', 0)
+        # Link dengan filter changelist + filter partai
+        full_url = rekap_change_url(obj.pk, f"p={pid}")
+        if t_sah > 0:
+            return format_html(
+                '<div style="text-align:center; min-width:50px;"><a href="{}"><b>{}</b></a><br><small style="color:#666; font-size:11.5px;">{}</small></div>',
+                full_url, _fmt(v), f"({(v / t_sah) * 100:.1f}%)"
+            )
+        return format_html('<div style="text-align:center;"><a href="{}">{}</a></div>', full_url, _fmt(v))
+
+    if party.logo_url:
+        column.short_description = format_html(
+            '<div style="text-align:center; min-width:40px;">'
+            '<img src="{}" title="{}" style="height:20px; width:20px; object-fit:contain;"><br>'
+            '<span style="font-size:11.5px; font-weight:normal; display:block; margin-top:2px;">{}</span>'
+            '</div>', party.logo_url, party.nama, party.nama
+        )
+    else:
+        column.short_description = party.nama
+    column.admin_order_field = attr
+    column.__name__ = attr
+    return column
+
+
+def _agregat_party_column(party):
+    attr = f"p_{party.id}_vt"
+
+    def column(obj):
+        v = getattr(obj, attr, 0)
+        t_sah = obj.sah_total
+        if t_sah > 0:
+            return format_html(
+                '<div style="text-align:center; min-width:40px;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>',
+                _fmt(v), f"({(v/t_sah*100):.1f}%)"
+            )
+        return format_html('<div style="text-align:center;">{}</div>', _fmt(v))
+
+    if party.logo_url:
+        column.short_description = format_html(
+            '<div style="text-align:center;"><img src="{}" style="height:20px;"><br><span style="font-size:11.5px;">{}</span></div>',
+            party.logo_url, party.nama
+        )
+    else:
+        column.short_description = party.nama
+    column.admin_order_field = attr
+    column.__name__ = attr
+    return column
+
+
+_BUILDERS = {'rekap': _rekap_party_column, 'agregat': _agregat_party_column}
+
+
+def get_party_columns(kind):
+    """
+    Tuple kolom partai untuk `kind` ('rekap' = per kecamatan dengan link, 'agregat' = kabupaten/dapil).
+    Objek kolom identik antar request selama metadata partai tidak berubah.
+    """
+    version = partai_cache.version
+    key = (kind, version)
+    cols = _columns_cache.get(key)
+    if cols is None:
+        cols = tuple(_BUILDERS[kind](p) for p in get_partai_list())
+        with _lock:
+            if partai_cache.version == version:
+                # Versi lama tidak akan dipakai lagi
+                for old in [k for k in _columns_cache if k[1] != version]:
+                    del _columns_cache[old]
+                _columns_cache[key] = cols
+    return cols
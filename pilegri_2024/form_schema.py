@@ -0,0 +1,61 @@
+"""
+Skema field dinamis untuk form Rekap Suara Pileg RI.
+
+Daftar field partai + caleg hanya bergantung pada dapil, data Caleg, dan metadata Partai.
+Skema ini dibangun sekali per dapil lalu di-cache lintas request, dan di-reset otomatis
+setiap kali data Caleg / Partai berubah.
+"""
+import threading
+
+from django.utils.html import format_html
+
+from core.models import Partai
+from core.refdata import get_partai_list
+from core.versioning import subscribe
+from .models import Caleg
+
+_schema_cache = {}
+_schema_lock = threading.Lock()
+
+
+def _build_schema(dapil_id):
+    calegs_by_partai = {}
+    for c in Caleg.objects.filter(daerah_pemilihan_id=dapil_id).order_by('partai__no_urut', 'no_urut').values('id', 'no_urut', 'nama', 'partai_id'):
+        calegs_by_partai.setdefault(c['partai_id'], []).append(
+            (c['id'], f"└ {c['no_urut']}. {c['nama']}")
+        )
+
+    partai_list = []
+    for p in get_partai_list():
+        logo = format_html('<div style="display:inline-flex; align-items:center; background:#fff; padding:3px; border-radius:4px; border:1px solid #ddd; margin-right:8px; vertical-align:middle;"><img src="{}" style="height:22px;"></div>', p.logo_url) if p.logo_url else ""
+        partai_list.append({
+            'id': p.id,
+            'nama': p.nama,
+            'no_urut': p.no_urut,
+            'logo_url': p.logo_url,
+            'label': format_html('{}{}. {}', logo, p.no_urut, p.nama),
+            'calegs': tuple(calegs_by_partai.get(p.id, ())),
+        })
+    return tuple(partai_list)
+
+
+def get_dapil_schema(dapil_id):
+    """
+    Mengembalikan tuple partai (urut no_urut) beserta caleg-nya untuk satu dapil.
+    Setiap item: {'id', 'nama', 'no_urut', 'logo_url', 'label' (HTML), 'calegs': ((caleg_id, label), ...)}.
+    """
+    schema = _schema_cache.get(dapil_id)
+    if schema is None:
+        schema = _build_schema(dapil_id)
+        with _schema_lock:
+            _schema_cache[dapil_id] = schema
+    return schema
+
+
+def clear_schema_cache():
+    with _schema_lock:
+        _schema_cache.clear()
+
+
+subscribe(Caleg, clear_schema_cache)
+subscribe(Partai, clear_schema_cache)
@@ -0,0 +1,116 @@
+"""
+Perolehan kursi DPR RI per dapil dari data rekap Pileg RI (mesin: core.kursi).
+
+Matriks suara dapil x partai (suara partai + suara caleg) dibangun dengan dua GROUP BY,
+lalu alokasi Sainte-Laguë semua dapil dihitung dalam satu langkah vektor. Hasil dan simulasi
+perpindahan suara di-cache per versi data (core.versioning).
+
+Catatan: ambang batas 4% dihitung dari total suara semua dapil yang ada di database
+(data aplikasi ini per provinsi), bukan suara nasional.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import Sum
+
+from core import kursi as engine
+from core.models import Partai, DapilRI, KabupatenKota, Kecamatan
+from core.refdata import get_dapil_ri, get_partai_list
+from core.versioning import VersionedCache
+from .models import Caleg, RekapSuara, SuaraPartai, DetailSuaraCaleg
+
+# suara/hasil: array (dapil, partai) urut dapil_ids x partai_ids; lolos: mask per partai
+PerolehanKursi = namedtuple('PerolehanKursi', 'dapil_ids partai_ids suara kursi hasil lolos')
+
+_cache = VersionedCache(RekapSuara, SuaraPartai, DetailSuaraCaleg, Caleg, Partai, DapilRI, KabupatenKota, Kecamatan, maxsize=64)
+
+
+def _matriks():
+    dapil_ri = get_dapil_ri()
+    dapil_ids = tuple(dapil_ri)
+    partai_ids = tuple(p.id for p in get_partai_list())
+    baris = {d: i for i, d in enumerate(dapil_ids)}
+    kolom = {p: i for i, p in enumerate(partai_ids)}
+    suara = np.zeros((len(dapil_ids), len(partai_ids)), dtype=np.int64)
+
+    dapil_field = 'rekap_suara__kecamatan__kabupaten_kota__dapil_ri_id'
+    per_partai = SuaraPartai.objects.values_list(dapil_field, 'partai_id').annotate(t=Sum('jumlah_suara')).order_by()
+    per_caleg = DetailSuaraCaleg.objects.values_list(dapil_field, 'caleg__partai_id').annotate(t=Sum('jumlah_suara')).order_by()
+    for dapil_id, partai_id, total in [*per_partai, *per_caleg]:
+        if dapil_id in baris and partai_id in kolom:
+            suara[baris[dapil_id], kolom[partai_id]] += total or 0
+
+    kursi = np.array([dapil_ri[d].kursi or 0 for d in dapil_ids], dtype=np.int64)
+    return dapil_ids, partai_ids, suara, kursi
+
+
+def _hitung():
+    dapil_ids, partai_ids, suara, kursi = _matriks()
+    lolos = engine.lolos_ambang(suara)
+    hasil = engine.alokasi(suara, kursi, lolos=lolos)
+    for arr in (suara, kursi, hasil, lolos):
+        arr.setflags(write=False)
+    return PerolehanKursi(dapil_ids, partai_ids, suara, kursi, hasil, lolos)
+
+
+def get_perolehan_kursi():
+    """PerolehanKursi seluruh dapil RI pada versi data saat ini."""
+    return _cache.get('perolehan', _hitung)
+
+
+def kursi_per_dapil():
+    """{dapil_id: {partai_id: kursi}} hanya untuk partai yang mendapat kursi."""
+    pk = get_perolehan_kursi()
+    return {
+        dapil_id: {pk.partai_ids[j]: int(n) for j, n in enumerate(pk.hasil[i]) if n}
+        for i, dapil_id in enumerate(pk.dapil_ids)
+    }
+
+
+# ==============================================================================
+# SIMULASI PERPINDAHAN SUARA
+# ==============================================================================
+
+def _hitung_simulasi(maks_persen, langkah):
+    pk = get_perolehan_kursi()
+    total_suara = pk.suara.sum(axis=0)
+    # Hanya partai yang punya suara yang bisa kehilangan suara
+    asal = [i for i, t in enumerate(total_suara) if t > 0]
+    fraksi = np.arange(langkah, maks_persen + langkah / 2, langkah) / 100
+    skenario = np.array([
+        (a, b, f) for a in asal for b in range(len(pk.partai_ids)) if a != b for f in fraksi
+    ], dtype=np.float64).reshape(-1, 3)
+    if not len(skenario):
+        return []
+
+    hasil = engine.simulasi(pk.suara, pk.kursi, skenario)       # (S, dapil, partai)
+    selisih = hasil - pk.hasil[None]
+    berubah = selisih.any(axis=(1, 2))
+
+    # Per pasangan (asal -> tujuan) cukup skenario pertama (fraksi terkecil) yang mengubah kursi
+    temuan, sudah = [], set()
+    for s in np.nonzero(berubah)[0]:
+        a, b, f = int(skenario[s, 0]), int(skenario[s, 1]), skenario[s, 2]
+        if (a, b) in sudah:
+            continue
+        sudah.add((a, b))
+        delta = selisih[s].sum(axis=0)
+        temuan.append({
+            'dari': pk.partai_ids[a],
+            'ke': pk.partai_ids[b],
+            'persen': round(float(f) * 100, 2),
+            'suara_pindah': int(round(total_suara[a] * f)),
+            'perubahan': {pk.partai_ids[j]: int(d) for j, d in enumerate(delta) if d},
+            'dapil': [pk.dapil_ids[i] for i in np.nonzero(selisih[s].any(axis=1))[0]],
+        })
+    temuan.sort(key=lambda t: (t['persen'], t['suara_pindah']))
+    return temuan
+
+
+def get_simulasi(maks_persen=10, langkah=0.5):
+    """
+    Simulasi semua pasangan partai asal -> tujuan dengan fraksi suara pindah
+    langkah, 2*langkah, ... maks_persen (% suara partai asal, di semua dapil).
+    Hasil: daftar perpindahan terkecil per pasangan yang mengubah perolehan kursi, urut persen.
+    """
+    return _cache.get(('simulasi', maks_persen, langkah), lambda: _hitung_simulasi(maks_persen, langkah))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pilegri_2024.peringkat import sinkronkan
+
+
+class Command(BaseCommand):
+    help = (
+        "Hitung ulang papan peringkat caleg DPR RI (tabel Peringkat Caleg) dari data rekap. "
+        "Biasanya otomatis setiap data rekap berubah; dipakai untuk isi awal setelah migrate "
+        "atau setelah data diubah langsung di database. Hanya baris yang berubah yang ditulis."
+    )
+
+    def handle(self, *args, **opts):
+        mulai = time.monotonic()
+        ditulis = sinkronkan()
+        self.stdout.write(self.style.SUCCESS(f"{ditulis} baris peringkat ditulis ({time.monotonic() - mulai:.1f} dtk)"))
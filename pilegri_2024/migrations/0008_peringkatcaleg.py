@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-19 01:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_kode_wilayah'),
+        ('pilegri_2024', '0007_rename_calegri_caleg_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeringkatCaleg',
+            fields=[
+                ('caleg', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='peringkat', serialize=False, to='pilegri_2024.caleg')),
+                ('total_suara', models.IntegerField(default=0, verbose_name='Total Suara')),
+                ('peringkat', models.PositiveIntegerField(default=0, verbose_name='Peringkat di Partai')),
+                ('terpilih', models.BooleanField(default=False, verbose_name='Terpilih')),
+                ('daerah_pemilihan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='peringkat_caleg_set', to='core.dapilri')),
+                ('partai', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='peringkat_caleg_set', to='core.partai')),
+            ],
+            options={
+                'verbose_name': 'Peringkat Caleg RI',
+                'verbose_name_plural': 'Peringkat Caleg RI',
+                'indexes': [
+                    models.Index(fields=['daerah_pemilihan', 'partai', 'peringkat'], name='pilegri_peringkat_dp_idx'),
+                    models.Index(fields=['daerah_pemilihan', '-total_suara'], name='pilegri_peringkat_suara_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pilegri_2024', '0008_peringkatcaleg'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detailsuaracaleg',
+            index=models.Index(fields=['caleg', 'rekap_suara', 'jumlah_suara'], name='pilegri_detail_caleg_idx'),
+        ),
+    ]
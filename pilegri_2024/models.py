@@ -6,7 +6,6 @@ from core.models import KabupatenKota, DapilRI
 class RekapSuaraQuerySet(models.QuerySet):
     def with_totals(self):
         """Menggunakan Subquery agar hitungan Sah dan Total tidak meledak/ganda (Fan-out fix)."""
-        from .models import DetailSuaraCaleg, SuaraPartai
         return self.annotate(
             t_caleg=Coalesce(Subquery(
                 DetailSuaraCaleg.objects.filter(rekap_suara=OuterRef('pk')).values('rekap_suara').annotate(t=Sum('jumlah_suara')).values('t'),
@@ -21,6 +20,18 @@ class RekapSuaraQuerySet(models.QuerySet):
             t_total=F('t_caleg') + F('t_partai') + F('suara_tidak_sah')
         )
 
+    def with_partai_totals(self, partai_ids):
+        """Anotasi p_<id>_vt = suara partai + total suara caleg partai tersebut di kecamatan ini."""
+        anns = {}
+        for pid in partai_ids:
+            anns[f'p_{pid}_vt'] = Coalesce(Subquery(
+                SuaraPartai.objects.filter(rekap_suara=OuterRef('pk'), partai_id=pid).values('jumlah_suara')
+            ), 0) + Coalesce(Subquery(
+                DetailSuaraCaleg.objects.filter(rekap_suara=OuterRef('pk'), caleg__partai_id=pid).values('rekap_suara').annotate(t=Sum('jumlah_suara')).values('t'),
+                output_field=IntegerField()
+            ), 0)
+        return self.annotate(**anns)
+
 class Caleg(models.Model):
     no_urut = models.IntegerField(db_index=True, verbose_name="No. Urut")
     nama = models.CharField(max_length=255, db_index=True, verbose_name="Nama Lengkap")
@@ -57,6 +68,10 @@ class DetailSuaraCaleg(models.Model):
 
     class Meta:
         unique_together = ('rekap_suara', 'caleg')
+        indexes = [
+            # Akses caleg-first (semua kecamatan satu caleg) tanpa baca tabel: indeks covering
+            models.Index(fields=['caleg', 'rekap_suara', 'jumlah_suara'], name='pilegri_detail_caleg_idx'),
+        ]
 
 class SuaraPartai(models.Model):
     rekap_suara = models.ForeignKey(RekapSuara, on_delete=models.CASCADE, related_name='rincian_suara_partai')
@@ -66,6 +81,31 @@ class SuaraPartai(models.Model):
     class Meta:
         unique_together = ('rekap_suara', 'partai')
 
+class PeringkatCaleg(models.Model):
+    """
+    Papan peringkat caleg (tabel turunan, tidak diinput manual): total suara caleg dari seluruh
+    DetailSuaraCaleg, peringkat dalam (dapil, partai) dan status terpilih menurut alokasi kursi.
+    Disinkronkan oleh pilegri_2024.peringkat setiap kali data sumbernya berubah.
+    """
+    caleg = models.OneToOneField(Caleg, on_delete=models.CASCADE, primary_key=True, related_name='peringkat')
+    daerah_pemilihan = models.ForeignKey('core.DapilRI', on_delete=models.CASCADE, related_name='peringkat_caleg_set')
+    partai = models.ForeignKey('core.Partai', on_delete=models.CASCADE, related_name='peringkat_caleg_set')
+    total_suara = models.IntegerField(default=0, verbose_name="Total Suara")
+    peringkat = models.PositiveIntegerField(default=0, verbose_name="Peringkat di Partai")
+    terpilih = models.BooleanField(default=False, verbose_name="Terpilih")
+
+    class Meta:
+        verbose_name = "Peringkat Caleg RI"
+        verbose_name_plural = "Peringkat Caleg RI"
+        indexes = [
+            # Daftar per dapil/partai urut peringkat, dan per dapil urut suara
+            models.Index(fields=['daerah_pemilihan', 'partai', 'peringkat'], name='pilegri_peringkat_dp_idx'),
+            models.Index(fields=['daerah_pemilihan', '-total_suara'], name='pilegri_peringkat_suara_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.peringkat} {self.caleg}"
+
 class KabupatenPilegRI(KabupatenKota):
     class Meta:
         proxy = True
@@ -0,0 +1,112 @@
+"""
+Sinkronisasi tabel PeringkatCaleg (papan peringkat caleg DPR RI).
+
+Total suara per caleg dihitung dengan satu GROUP BY di DetailSuaraCaleg, diurutkan per
+(dapil, partai) (suara terbanyak, seri -> no urut terkecil), lalu N teratas ditandai terpilih
+dengan N = kursi partai di dapil itu (pilegri_2024.kursi). Hanya baris yang berubah yang ditulis.
+
+Sinkronisasi berjalan setelah transaksi yang mengubah data sumber commit
+(core.versioning.on_data_change), di thread latar proses penulis, bukan di request-nya; papan
+peringkat tertinggal kira-kira JEDA_SINKRON detik + lama hitungnya. Hanya dapil yang tersentuh
+yang dihitung ulang: dapil caleg dari DetailSuaraCaleg yang berubah, ditambah dapil yang jumlah
+terpilihnya tidak lagi cocok dengan alokasi kursi (ambang batas nasional membuat satu suara
+bisa menggeser kursi dapil lain). Perubahan wilayah / partai / caleg = hitung ulang semua.
+
+Dua sinkronisasi tidak pernah berjalan bersamaan (core.versioning.kunci_sinkron): yang kedua
+menunggu, lalu membaca data setelah commit yang pertama, sehingga hasil lama tidak bisa
+menimpa hasil yang lebih baru. Pembacaan (admin / endpoint JSON / mode caleg peta) cukup query
+biasa ke PeringkatCaleg. Isi awal / perbaikan manual lewat perintah `sinkronkan_peringkat`.
+"""
+from django.db.models import Count, Q, Sum
+
+from core.bulk import bulk_upsert
+from core.models import Partai, DapilRI, KabupatenKota, Kecamatan
+from core.versioning import kunci_sinkron, on_data_change
+from .kursi import kursi_per_dapil
+from .models import Caleg, RekapSuara, SuaraPartai, DetailSuaraCaleg, PeringkatCaleg
+
+_FIELDS = ('daerah_pemilihan_id', 'partai_id', 'total_suara', 'peringkat', 'terpilih')
+
+# Sumber yang sama dengan perolehan kursi: suara caleg menentukan total, semua suara menentukan kursi
+SUMBER = (DetailSuaraCaleg, SuaraPartai, Caleg, RekapSuara, Partai, DapilRI, KabupatenKota, Kecamatan)
+
+
+def hitung_peringkat(dapil_ids=None):
+    """
+    {caleg_id: (dapil_id, partai_id, total_suara, peringkat, terpilih)} dari data rekap saat ini,
+    hanya caleg di `dapil_ids` bila diberikan.
+    """
+    detail = DetailSuaraCaleg.objects.all()
+    calegs = Caleg.objects.all()
+    if dapil_ids is not None:
+        detail = detail.filter(caleg__daerah_pemilihan_id__in=dapil_ids)
+        calegs = calegs.filter(daerah_pemilihan_id__in=dapil_ids)
+    total = dict(detail.values_list('caleg_id').annotate(t=Sum('jumlah_suara')).order_by())
+    kelompok = {}
+    for caleg_id, dapil_id, partai_id, no_urut in calegs.values_list('id', 'daerah_pemilihan_id', 'partai_id', 'no_urut'):
+        kelompok.setdefault((dapil_id, partai_id), []).append((-(total.get(caleg_id) or 0), no_urut, caleg_id))
+
+    kursi = kursi_per_dapil()
+    hasil = {}
+    for (dapil_id, partai_id), calegs in kelompok.items():
+        calegs.sort()
+        n_kursi = kursi.get(dapil_id, {}).get(partai_id, 0)
+        for rank, (neg_suara, _, caleg_id) in enumerate(calegs, 1):
+            hasil[caleg_id] = (dapil_id, partai_id, -neg_suara, rank, rank <= n_kursi and neg_suara < 0)
+    return hasil
+
+
+def _dapil_terdampak(perubahan):
+    """dapil_id yang total suara calegnya berubah, None bila harus dihitung ulang semua."""
+    dapil_ids, caleg_ids = set(), set()
+    for model, objs in perubahan.items():
+        if model in (SuaraPartai, RekapSuara) and objs is not None:
+            continue        # hanya mengubah kursi, dicek di _dapil_kursi_berubah()
+        if model is not DetailSuaraCaleg or objs is None:
+            return None
+        caleg_ids.update(o.caleg_id for o in objs)
+    if caleg_ids:
+        dapil_ids.update(Caleg.objects.filter(id__in=caleg_ids).values_list('daerah_pemilihan_id', flat=True))
+    return dapil_ids
+
+
+def _dapil_kursi_berubah():
+    """dapil_id yang jumlah terpilih tersimpannya tidak cocok dengan alokasi kursi saat ini."""
+    kursi = kursi_per_dapil()
+    kelompok = (
+        PeringkatCaleg.objects.values_list('daerah_pemilihan_id', 'partai_id')
+        .annotate(terpilih=Count('pk', filter=Q(terpilih=True)), bersuara=Count('pk', filter=Q(total_suara__gt=0)))
+        .order_by()
+    )
+    return {
+        dapil_id for dapil_id, partai_id, terpilih, bersuara in kelompok
+        if terpilih != min(kursi.get(dapil_id, {}).get(partai_id, 0), bersuara)
+    }
+
+
+def sinkronkan(perubahan=None):
+    """
+    Tulis baris PeringkatCaleg yang baru / berubah. `perubahan` dari on_data_change() membatasi
+    hitungan ke dapil yang terdampak; tanpa argumen semua dapil. Mengembalikan jumlah baris yang ditulis.
+    """
+    with kunci_sinkron('peringkat'):
+        dapil_ids = _dapil_terdampak(perubahan) if perubahan is not None else None
+        if dapil_ids is not None:
+            dapil_ids |= _dapil_kursi_berubah()
+            if not dapil_ids:
+                return 0
+        baru = hitung_peringkat(dapil_ids)
+        lama = PeringkatCaleg.objects.all()
+        if dapil_ids is not None:
+            lama = lama.filter(daerah_pemilihan_id__in=dapil_ids)
+        lama = {row[0]: row[1:] for row in lama.values_list('caleg_id', *_FIELDS)}
+        berubah = [
+            PeringkatCaleg(caleg_id=caleg_id, **dict(zip(_FIELDS, values)))
+            for caleg_id, values in baru.items() if lama.get(caleg_id) != values
+        ]
+        bulk_upsert(PeringkatCaleg, berubah, unique_fields=['caleg'], update_fields=list(_FIELDS))
+    return len(berubah)
+
+
+for _model in SUMBER:
+    on_data_change(_model, sinkronkan)
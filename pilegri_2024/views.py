@@ -1,3 +1,29 @@
-from django.shortcuts import render
+from django.http import JsonResponse
 
-# Create your views here.
+from .models import PeringkatCaleg
+
+
+def get_peringkat_caleg(request):
+    """
+    Papan peringkat caleg DPR RI dari tabel PeringkatCaleg (satu query berindeks, tanpa penulisan;
+    tabel diperbarui saat data rekap berubah, lihat pilegri_2024.peringkat).
+    Parameter: ?dapil_id= (wajib untuk daftar per dapil), ?partai_id=, ?terpilih=1.
+    Tanpa dapil_id hanya caleg terpilih yang dikembalikan.
+    """
+    qs = PeringkatCaleg.objects.all()
+    dapil_id = request.GET.get('dapil_id', '')
+    partai_id = request.GET.get('partai_id', '')
+    if dapil_id.isdigit():
+        qs = qs.filter(daerah_pemilihan_id=dapil_id)
+    if partai_id.isdigit():
+        qs = qs.filter(partai_id=partai_id)
+    if request.GET.get('terpilih') == '1' or not dapil_id.isdigit():
+        qs = qs.filter(terpilih=True)
+
+    rows = qs.order_by('daerah_pemilihan_id', 'partai_id', 'peringkat').values_list(
+        'caleg_id', 'caleg__nama', 'caleg__no_urut', 'partai_id', 'daerah_pemilihan_id', 'total_suara', 'peringkat', 'terpilih'
+    )
+    return JsonResponse({
+        'kolom': ['caleg_id', 'nama', 'no_urut', 'partai_id', 'dapil_id', 'total_suara', 'peringkat', 'terpilih'],
+        'caleg': [list(r) for r in rows],
+    }, json_dumps_params={'separators': (',', ':')})
@@ -1,13 +1,32 @@
+import json
+import threading
+
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.contrib.admin.widgets import FilteredSelectMultiple
 from django.utils.html import format_html
 from import_export import resources, fields, widgets
 from import_export.admin import ImportExportModelAdmin
 from import_export.formats.base_formats import XLS
 
-from core.models import Partai, Kecamatan
-from .models import PaslonPilpres, KoalisiPilpres, RekapSuaraPilpres, DetailSuaraPaslon, KabupatenPilpres
+from core.models import Partai, KabupatenKota, Kecamatan, TPSDPTPemilu, TPSDPTPilkada
+from core.bulk import bulk_upsert
+from core.paginator import BareCountAdminMixin
+from core.versioning import bump_data_version
+from core.matcher import cocokkan_kecamatan
+from core.refdata import get_wilayah
+from .models import PaslonPilpres, KoalisiPilpres, RekapSuaraPilpres, DetailSuaraPaslon, KabupatenPilpres, paslon_pivot_keys
+from .refdata import paslon_cache, get_paslon_list
+from .winners import get_winners
+from geojson.admin import AnomaliPilpresFilter
+from geojson.koalisi import get_analisis_koalisi
+from geojson.models import AnomaliKecamatan
 
 # ==============================================================================
 # RESOURCES (DATA IMPORT/EXPORT)
@@ -16,22 +35,26 @@ from .models import PaslonPilpres, KoalisiPilpres, RekapSuaraPilpres, DetailSuar
 class SmartKecamatanWidget(widgets.ForeignKeyWidget):
     """
     Widget kustom untuk mencocokkan nama Kecamatan dari Excel ke Database.
-    Mendukung fuzzy matching dan validasi berdasarkan Kabupaten.
+    Bila kolom kode_kecamatan terisi, kode Kemendagri dipakai langsung. Selain itu nama dicocokkan
+    lewat indeks fuzzy in-memory (core.matcher), dibatasi ke Kabupaten bila kolomnya terisi.
+    Tidak ada query per baris; nama ambigu / tidak dikenal menjadi error baris yang jelas.
     """
-    def get_queryset(self, value, row, *args, **kwargs):
-        kab_name = row.get('kabupaten', '').strip()
-        kec_name = str(value).strip()
-        
-        qs = self.model.objects.filter(nama__iexact=kec_name)
-        if kab_name:
-            qs = qs.filter(kabupaten_kota__nama__icontains=kab_name)
-        
-        if not qs.exists():
-            qs = self.model.objects.filter(nama__icontains=kec_name)
-            if kab_name:
-                qs = qs.filter(kabupaten_kota__nama__icontains=kab_name)
-        
-        return qs
+    def clean(self, value, row=None, **kwargs):
+        row = row or {}
+        kode = str(row.get('kode_kecamatan') or '').replace('.', '').strip()
+        if kode:
+            ref = get_wilayah().kode.get(kode)
+            if ref is None or len(kode) != 6:
+                raise ValueError(f"Kode kecamatan '{kode}' tidak ditemukan")
+        elif not value:
+            return None
+        else:
+            match, error = cocokkan_kecamatan(str(value), str(row.get('kabupaten') or '').strip())
+            if error:
+                raise ValueError(error)
+            ref = get_wilayah().kecamatan[match.id]
+        # Instance dari cache referensi: cukup untuk FK & lookup import_id_fields
+        return self.model(pk=ref.id, nama=ref.nama, kabupaten_kota_id=ref.kabupaten_id, kode=ref.kode)
 
 
 class RekapSuaraResource(resources.ModelResource):
@@ -49,17 +72,39 @@ class RekapSuaraResource(resources.ModelResource):
         attribute='kecamatan__kabupaten_kota__nama', 
         readonly=True
     )
-    suara_paslon_1 = fields.Field(column_name='suara_paslon_1')
-    suara_paslon_2 = fields.Field(column_name='suara_paslon_2')
-    suara_paslon_3 = fields.Field(column_name='suara_paslon_3')
+    kode_kecamatan = fields.Field(
+        column_name='kode_kecamatan',
+        attribute='kecamatan__kode',
+        readonly=True
+    )
 
     class Meta:
         model = RekapSuaraPilpres
-        fields = ('kabupaten', 'kecamatan', 'suara_paslon_1', 'suara_paslon_2', 'suara_paslon_3', 'suara_tidak_sah')
+        fields = ('kode_kecamatan', 'kabupaten', 'kecamatan', 'suara_tidak_sah')
         import_id_fields = ('kecamatan',)
         skip_unchanged = False
         report_skipped = True
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Kolom suara_paslon_<no> dibangkitkan dari data PaslonPilpres (N paslon dinamis)
+        self.paslons = paslon_pivot_keys()
+        for pid, no in self.paslons:
+            self.fields[f'suara_paslon_{no}'] = fields.Field(
+                column_name=f'suara_paslon_{no}',
+                dehydrate_method=lambda obj, no=no: getattr(obj, f's{no}', None) or 0
+            )
+        self._pending_details = []
+
+    def _ordered_fields(self):
+        return ('kode_kecamatan', 'kabupaten', 'kecamatan', *[f'suara_paslon_{no}' for _, no in self.paslons], 'suara_tidak_sah')
+
+    def get_import_order(self):
+        return self._ordered_fields()
+
+    def get_export_order(self):
+        return self._ordered_fields()
+
     def before_import_row(self, row, **kwargs):
         """Normalisasi header dan data Excel sebelum diproses."""
         for k in list(row.keys()):
@@ -68,22 +113,25 @@ class RekapSuaraResource(resources.ModelResource):
             row[new_k] = str(val).strip() if val is not None else ""
 
     def after_save_instance(self, instance, row, **kwargs):
-        """Menyimpan detail perolehan suara paslon setelah data master tersimpan."""
+        """Kumpulkan detail suara paslon; ditulis sekaligus di after_import()."""
         if not kwargs.get('dry_run', False):
-            for no in range(1, 4):
+            for pid, no in self.paslons:
                 val = row.get(f'suara_paslon_{no}')
                 if val:
                     try:
-                        paslon = PaslonPilpres.objects.get(no_urut=no)
                         clean_val = str(val).split('.')[0].replace(',', '').replace('.', '')
-                        DetailSuaraPaslon.objects.update_or_create(
-                            rekap_suara=instance, 
-                            paslon=paslon,
-                            defaults={'jumlah_suara': int(clean_val)}
+                        self._pending_details.append(
+                            DetailSuaraPaslon(rekap_suara_id=instance.pk, paslon_id=pid, jumlah_suara=int(clean_val))
                         )
                     except Exception:
                         pass
 
+    def after_import(self, dataset, result, **kwargs):
+        """Satu bulk upsert untuk seluruh detail suara, berapapun jumlah baris & paslon."""
+        super().after_import(dataset, result, **kwargs)
+        bulk_upsert(DetailSuaraPaslon, self._pending_details, unique_fields=['rekap_suara', 'paslon'], update_fields=['jumlah_suara'])
+        self._pending_details = []
+
 
 # ==============================================================================
 # FORMS (CUSTOM ADMIN INTERFACE)
@@ -128,15 +176,13 @@ class PaslonPilpresForm(forms.ModelForm):
 class UnifiedRekapSuaraForm(forms.ModelForm):
     """
     Form Terpadu untuk input Rekap Suara sekaligus Detail Suara Paslon.
-    Menampilkan field dinamis untuk perolehan suara setiap pasangan calon.
+    Field suara per paslon dibangkitkan oleh get_unified_rekap_form() sesuai data PaslonPilpres.
     """
     # Definisikan field secara eksplisit agar Django Admin mengenalinya di fieldsets
     tps_target = forms.IntegerField(label="Target TPS", required=False, disabled=True)
     dpt_target = forms.IntegerField(label="Target DPT", required=False, disabled=True)
-    
-    suara_paslon_1 = forms.IntegerField(label="Suara 01", required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 200px; font-weight: bold; font-size: 16px; border: 1px solid #000;'}))
-    suara_paslon_2 = forms.IntegerField(label="Suara 02", required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 200px; font-weight: bold; font-size: 16px; border: 1px solid #000;'}))
-    suara_paslon_3 = forms.IntegerField(label="Suara 03", required=False, min_value=0, widget=forms.NumberInput(attrs={'style': 'width: 200px; font-weight: bold; font-size: 16px; border: 1px solid #000;'}))
+
+    paslons = ()
 
     class Meta:
         model = RekapSuaraPilpres
@@ -150,31 +196,102 @@ class UnifiedRekapSuaraForm(forms.ModelForm):
             self.fields['tps_target'].initial = tps_data.jumlah_tps
             self.fields['dpt_target'].initial = tps_data.jumlah_dpt
 
-        # Update label dinamis jika perlu dan set nilai awal
-        paslons = PaslonPilpres.objects.all().order_by('no_urut')
+        # Set nilai awal suara setiap paslon (satu query)
         details_map = {}
         if self.instance.pk:
-            details = DetailSuaraPaslon.objects.filter(rekap_suara=self.instance)
-            details_map = {d.paslon_id: d.jumlah_suara for d in details}
-
-        for paslon in paslons:
+            details_map = dict(DetailSuaraPaslon.objects.filter(rekap_suara=self.instance).values_list('paslon_id', 'jumlah_suara'))
+        for paslon in self.paslons:
             field_name = f'suara_paslon_{paslon.no_urut}'
             if field_name in self.fields:
-                self.fields[field_name].label = f"Suara 0{paslon.no_urut}. {paslon.nama_capres}"
                 self.fields[field_name].initial = details_map.get(paslon.id, 0)
 
+    def _save_detail_suara(self):
+        """Semua detail suara paslon ditulis dalam satu bulk upsert."""
+        bulk_upsert(DetailSuaraPaslon, [
+            DetailSuaraPaslon(
+                rekap_suara=self.instance, paslon_id=paslon.id,
+                jumlah_suara=self.cleaned_data.get(f'suara_paslon_{paslon.no_urut}') or 0
+            ) for paslon in self.paslons
+        ], unique_fields=['rekap_suara', 'paslon'], update_fields=['jumlah_suara'])
+
     def save(self, commit=True):
         instance = super().save(commit=commit)
-        paslons = PaslonPilpres.objects.all()
-        for paslon in paslons:
-            field_name = f'suara_paslon_{paslon.no_urut}'
-            val = self.cleaned_data.get(field_name, 0)
-            DetailSuaraPaslon.objects.update_or_create(
-                rekap_suara=instance, paslon=paslon, defaults={'jumlah_suara': val}
-            )
+        if commit:
+            self._save_detail_suara()
+        else:
+            # Admin menyimpan instance dulu, baru memanggil save_m2m()
+            base_save_m2m = self.save_m2m
+
+            def save_m2m():
+                base_save_m2m()
+                self._save_detail_suara()
+            self.save_m2m = save_m2m
         return instance
 
 
+def get_unified_rekap_form(paslons):
+    """Bangkitkan subclass UnifiedRekapSuaraForm dengan satu field suara per paslon (N paslon)."""
+    attrs = {'paslons': tuple(paslons)}
+    for paslon in paslons:
+        attrs[f'suara_paslon_{paslon.no_urut}'] = forms.IntegerField(
+            label=f"Suara {paslon.no_urut:02d}. {paslon.nama_capres}", required=False, min_value=0,
+            widget=forms.NumberInput(attrs={'style': 'width: 200px; font-weight: bold; font-size: 16px; border: 1px solid #000;'})
+        )
+    return type('UnifiedRekapSuaraForm', (UnifiedRekapSuaraForm,), attrs)
+
+
+def _fmt_angka(val):
+    """Format angka Indonesia (titik sebagai ribuan)."""
+    return "{:,}".format(val or 0).replace(',', '.')
+
+
+def paslon_vote_column(paslon, attr, total_attr):
+    """
+    Kolom changelist suara satu paslon, dibuat sebagai callable list_display.
+    Header (foto paslon) melekat pada callable ini sendiri, bukan pada method class,
+    sehingga aman untuk request paralel dan berapapun jumlah paslon.
+    """
+    def column(obj):
+        v = getattr(obj, attr, 0) or 0
+        t = getattr(obj, total_attr, 0) or 0
+        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
+        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', _fmt_angka(v), p)
+
+    if paslon.foto_url:
+        column.short_description = format_html(
+            '{:02d} <br> <img src="{}" style="width:45px;height:45px;object-fit:contain;border-radius:4px;border:1px solid #ddd;padding:2px;background:#fff;margin-top:4px;">',
+            paslon.no_urut, paslon.foto_url
+        )
+    else:
+        column.short_description = f"({paslon.no_urut:02d})"
+    column.admin_order_field = attr
+    column.__name__ = f'suara_paslon_{paslon.no_urut}_fmt'
+    return column
+
+
+_lock = threading.Lock()
+_columns_cache = {}
+
+
+def get_paslon_columns(attr_tpl, total_attr):
+    """
+    Kolom suara semua paslon, dibuat sekali per versi cache paslon (pilpres_2024.refdata).
+    Objek callable harus sama antara list_display dan sortable_by agar kolom bisa diurutkan.
+    """
+    version = paslon_cache.version
+    key = (attr_tpl, total_attr, version)
+    cols = _columns_cache.get(key)
+    if cols is None:
+        cols = tuple(paslon_vote_column(p, attr_tpl.format(no=p.no_urut), total_attr) for p in get_paslon_list())
+        with _lock:
+            if paslon_cache.version == version:
+                # Kolom versi lama tidak akan dipakai lagi
+                for old in [k for k in _columns_cache if k[2] != version]:
+                    del _columns_cache[old]
+                _columns_cache[key] = cols
+    return cols
+
+
 # ==============================================================================
 # ADMIN CONFIGURATIONS (LIST VIEWS & OPTIMIZATIONS)
 # ==============================================================================
@@ -185,10 +302,56 @@ class PaslonPilpresAdmin(admin.ModelAdmin):
     form = PaslonPilpresForm
     list_display = ('paslon_info', 'color_preview', 'get_koalisi_logos', 'total_suara_diperoleh')
     ordering = ('no_urut',)
+    change_list_template = 'admin/pilpres_2024/paslonpilpres/change_list.html'
+
+    # Jumlah kecamatan paling menyimpang (per paslon) di laporan koalisi
+    KOALISI_TOP = 10
 
     def get_queryset(self, request):
         return super().get_queryset(request).with_totals()
 
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        custom_urls = [
+            path('analisis-koalisi/', self.admin_site.admin_view(self.analisis_koalisi_view), name='%s_%s_analisis_koalisi' % info),
+        ]
+        return custom_urls + super().get_urls()
+
+    def analisis_koalisi_view(self, request):
+        """Laporan korelasi suara paslon (Pilpres) vs partai koalisinya (Pileg RI) per kecamatan."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        analisis = get_analisis_koalisi('kecamatan')
+        wilayah = get_wilayah()
+
+        def baris(kec_id, c):
+            x, y, rasio, z = analisis['wilayah'][kec_id]['paslon'][c]
+            kec = wilayah.kecamatan[kec_id]
+            return {'kecamatan': kec.nama, 'kabupaten': wilayah.kabupaten[kec.kabupaten_id].nama,
+                    'x': x * 100, 'y': y * 100, 'rasio': rasio, 'z': z}
+
+        per_paslon = []
+        for c, r in enumerate(analisis['ringkasan']):
+            urut = sorted(analisis['wilayah'], key=lambda k: -abs(analisis['wilayah'][k]['paslon'][c][3] or 0))
+            per_paslon.append({
+                'r': r, 'share_paslon': r.share_paslon * 100, 'share_koalisi': r.share_koalisi * 100,
+                'menyimpang': [baris(k, c) for k in urut[:self.KOALISI_TOP]],
+            })
+        split = sorted(analisis['wilayah'].items(), key=lambda kv: -(kv[1]['split'] or 0))[:self.KOALISI_TOP]
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Analisis Koalisi vs Paslon (Pileg RI x Pilpres)",
+            'n': analisis['n'],
+            'per_paslon': per_paslon,
+            'split': [
+                {'kecamatan': wilayah.kecamatan[k].nama, 'kabupaten': wilayah.kabupaten[wilayah.kecamatan[k].kabupaten_id].nama,
+                 'split': row['split'] * 100}
+                for k, row in split
+            ],
+        }
+        return TemplateResponse(request, 'admin/pilpres_2024/paslonpilpres/analisis_koalisi.html', context)
+
     @admin.display(description='Pasangan Calon')
     def paslon_info(self, obj):
         foto_html = ""
@@ -225,72 +388,20 @@ class PaslonPilpresAdmin(admin.ModelAdmin):
             obj.warna_hex, obj.warna_hex
         )
 
-    # Caching untuk request saat ini agar tidak hit DB looping
-    _total_sah_cache = None
-    _win_stats_cache = None
-
-    def _get_global_stats(self):
-        """Menghitung total sah & sebaran kemenangan sekali saja per request list."""
-        if self._total_sah_cache is None:
-            from django.db.models import Sum, Max, F
-            from .models import DetailSuaraPaslon, RekapSuaraPilpres
-            
-            # 1. Total Suara Nasional
-            res = DetailSuaraPaslon.objects.aggregate(t=Sum('jumlah_suara'))
-            self._total_sah_cache = res['t'] or 0
-            
-            # 2. Hitung Kemenangan per Kecamatan
-            # Ambil semua data rincian
-            details_kec = DetailSuaraPaslon.objects.values('rekap_suara_id', 'paslon_id', 'jumlah_suara')
-            
-            rekap_map_kec = {} # rekap_id -> {paslon_id: suara}
-            for d in details_kec:
-                rid = d['rekap_suara_id']
-                pid = d['paslon_id']
-                suara = d['jumlah_suara']
-                if rid not in rekap_map_kec: rekap_map_kec[rid] = {}
-                rekap_map_kec[rid][pid] = suara
-                
-            win_kec_counts = {} # paslon_id -> count win
-            for rid, pid_votes in rekap_map_kec.items():
-                if pid_votes:
-                    win_pid = max(pid_votes, key=pid_votes.get)
-                    win_kec_counts[win_pid] = win_kec_counts.get(win_pid, 0) + 1
-                    
-            # 3. Hitung Kemenangan per Kabupaten
-            # Group by kabupaten
-            details_kab = DetailSuaraPaslon.objects.values(
-                'rekap_suara__kecamatan__kabupaten_kota_id', 'paslon_id'
-            ).annotate(total=Sum('jumlah_suara'))
-            
-            rekap_map_kab = {}
-            for d in details_kab:
-                kab_id = d['rekap_suara__kecamatan__kabupaten_kota_id']
-                pid = d['paslon_id']
-                suara = d['total']
-                if kab_id not in rekap_map_kab: rekap_map_kab[kab_id] = {}
-                rekap_map_kab[kab_id][pid] = suara
-                
-            win_kab_counts = {}
-            for kab_id, pid_votes in rekap_map_kab.items():
-                if pid_votes:
-                    win_pid = max(pid_votes, key=pid_votes.get)
-                    win_kab_counts[win_pid] = win_kab_counts.get(win_pid, 0) + 1
-            
-            self._win_stats_cache = {'kec': win_kec_counts, 'kab': win_kab_counts}
-
     @admin.display(description='Statistik', ordering='total_suara')
     def total_suara_diperoleh(self, obj):
-        self._get_global_stats()
-        
+        # Total sah & sebaran kemenangan dari mesin pemenang (cache per versi data)
+        per_kab = get_winners('kabupaten')
+        per_kec = get_winners('kecamatan')
+
         total = obj.total_suara or 0
-        total_sah = self._total_sah_cache
+        total_sah = per_kab.total_sah
         
         pct = f"{(total/total_sah*100):.1f}%" if total_sah > 0 else "0.0%"
         fmt_total = "{:,}".format(total).replace(',', '.')
         
-        win_kec = self._win_stats_cache['kec'].get(obj.id, 0)
-        win_kab = self._win_stats_cache['kab'].get(obj.id, 0)
+        win_kec = per_kec.wins.get(obj.id, 0)
+        win_kab = per_kab.wins.get(obj.id, 0)
 
         return format_html(
             '<div style="min-width: 250px;">'
@@ -309,7 +420,7 @@ class PaslonPilpresAdmin(admin.ModelAdmin):
 
 
 @admin.register(RekapSuaraPilpres)
-class RekapSuaraAdmin(ImportExportModelAdmin):
+class RekapSuaraAdmin(BareCountAdminMixin, ImportExportModelAdmin):
     """
     Admin perolehan suara Pilpres.
     Dilengkapi dengan optimasi SQL kustom untuk performa tinggi pada list view.
@@ -319,16 +430,13 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
     formats = (XLS,)
     list_display = (
         'get_wilayah_dyn', 'get_tps_dpt',
-        'suara_paslon_1_fmt', 'suara_paslon_2_fmt', 'suara_paslon_3_fmt',
         'total_suara_sah_fmt', 'suara_tidak_sah_fmt', 'total_suara_masuk_fmt'
     )
     list_display_links = ('get_wilayah_dyn',)
-    list_filter = ('kecamatan__kabupaten_kota',)
+    list_filter = ('kecamatan__kabupaten_kota', AnomaliPilpresFilter)
     autocomplete_fields = ('kecamatan',)
     ordering = ('kecamatan__kabupaten_kota__nama', 'kecamatan__nama')
-    
-    # SATU HALAMAN: Semua field tampil sekaligus tanpa pembatas
-    fields = ('kecamatan', 'tps_target', 'dpt_target', 'suara_paslon_1', 'suara_paslon_2', 'suara_paslon_3', 'suara_tidak_sah')
+    count_models = (Kecamatan, AnomaliKecamatan)
 
     @admin.display(description='Wilayah', ordering='kecamatan__nama')
     def get_wilayah_dyn(self, obj):
@@ -337,32 +445,32 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
             '<div style="line-height:1.2;"><b>{}</b><br><span style="font-size:10.5px; color:#666;">{}</span></div>',
             obj.kecamatan.nama, kab
         )
-        
-    def changelist_view(self, request, extra_context=None):
-        """Update header kolom secara dinamis berdasarkan data Paslon terbaru."""
-        from .models import PaslonPilpres
-        paslons = {p.no_urut: p.foto_paslon.url for p in PaslonPilpres.objects.all() if p.foto_paslon}
-        
-        for no in range(1, 4):
-            method_name = f'suara_paslon_{no}_fmt'
-            # Kita ambil langsung function-nya dari class (unbound method)
-            # karena admin.display merubah property di function tersebut
-            method = getattr(self.__class__, method_name, None)
-            if method and no in paslons:
-                # Bypass properti method dengan men-set short_description
-                method.short_description = format_html(
-                    '0{} <br> <img src="{}" style="width:45px;height:45px;object-fit:contain;border-radius:4px;border:1px solid #ddd;padding:2px;background:#fff;margin-top:4px;">', 
-                    no, paslons[no]
-                )
-        return super().changelist_view(request, extra_context)
+
+    def get_list_display(self, request):
+        """Kolom suara disisipkan per paslon sesuai data PaslonPilpres terbaru."""
+        paslon_cols = get_paslon_columns('s{no}', 'total_sah_db')
+        return ('get_wilayah_dyn', 'get_tps_dpt', *paslon_cols,
+                'total_suara_sah_fmt', 'suara_tidak_sah_fmt', 'total_suara_masuk_fmt')
+
+    def get_sortable_by(self, request):
+        return self.get_list_display(request)
+
+    # SATU HALAMAN: Semua field tampil sekaligus tanpa pembatas
+    def get_fields(self, request, obj=None):
+        return ('kecamatan', 'tps_target', 'dpt_target',
+                *[f'suara_paslon_{p.no_urut}' for p in get_paslon_list()], 'suara_tidak_sah')
+
+    def get_form(self, request, obj=None, **kwargs):
+        kwargs['form'] = get_unified_rekap_form(get_paslon_list())
+        return super().get_form(request, obj, **kwargs)
 
     def get_queryset(self, request):
         """Optimasi penarikan data relasi dan perhitungan agregat di level SQL sudah ditarik ke model layer."""
-        return super().get_queryset(request).with_totals()
+        return super().get_queryset(request).with_totals(get_paslon_list())
 
     def _fmt(self, val):
         """Helper untuk format angka Indonesia (titik sebagai ribuan)."""
-        return "{:,}".format(val or 0).replace(',', '.')
+        return _fmt_angka(val)
 
     @admin.display(description='TPS / DPT', ordering='kecamatan__tpsdpt_pemilu__jumlah_tps')
     def get_tps_dpt(self, obj):
@@ -375,27 +483,6 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
             self._fmt(tps), self._fmt(dpt)
         )
 
-    @admin.display(description='(01)', ordering='s1')
-    def suara_paslon_1_fmt(self, obj):
-        v = obj.s1 or 0
-        t = obj.total_sah_db or 0
-        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
-
-    @admin.display(description='(02)', ordering='s2')
-    def suara_paslon_2_fmt(self, obj):
-        v = obj.s2 or 0
-        t = obj.total_sah_db or 0
-        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
-
-    @admin.display(description='(03)', ordering='s3')
-    def suara_paslon_3_fmt(self, obj):
-        v = obj.s3 or 0
-        t = obj.total_sah_db or 0
-        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
-
     @admin.display(description='Total Sah', ordering='total_sah_db')
     def total_suara_sah_fmt(self, obj):
         v = obj.total_sah_db or 0
@@ -423,37 +510,224 @@ class RekapSuaraAdmin(ImportExportModelAdmin):
 
 
 @admin.register(KabupatenPilpres)
-class KabupatenPilpresAdmin(admin.ModelAdmin):
+class KabupatenPilpresAdmin(BareCountAdminMixin, admin.ModelAdmin):
     """
     Admin proxy untuk menampilkan data Pilpres pada tingkat Kabupaten/Kota.
     Optimasi: Menggunakan agregat SQL untuk menghitung total suara dari semua kecamatan.
     """
     list_display = (
-        'nama', 'get_tps_dpt', 
-        'suara_1_fmt', 'suara_2_fmt', 'suara_3_fmt',
-        'total_suara_sah_fmt', 'suara_tidak_sah_fmt', 'total_suara_masuk_fmt'
+        'nama', 'get_tps_dpt',
+        'total_suara_sah_fmt', 'suara_tidak_sah_fmt', 'total_suara_masuk_fmt',
+        'get_grid_link'
+    )
+
+    # Kolom grid: (key, label, model TPS/DPT, field) untuk data TPS & DPT per kecamatan
+    GRID_TPS_COLUMNS = (
+        ('tps_pemilu', 'TPS Pemilu', TPSDPTPemilu, 'jumlah_tps'),
+        ('dpt_pemilu', 'DPT Pemilu', TPSDPTPemilu, 'jumlah_dpt'),
+        ('tps_pilkada', 'TPS Pilkada', TPSDPTPilkada, 'jumlah_tps'),
+        ('dpt_pilkada', 'DPT Pilkada', TPSDPTPilkada, 'jumlah_dpt'),
     )
 
     def get_queryset(self, request):
-        return super().get_queryset(request).with_totals()
+        return super().get_queryset(request).with_totals(get_paslon_list())
 
-    def changelist_view(self, request, extra_context=None):
-        """Update header kolom secara dinamis berdasarkan data Paslon terbaru."""
-        from .models import PaslonPilpres
-        paslons = {p.no_urut: p.foto_paslon.url for p in PaslonPilpres.objects.all() if p.foto_paslon}
-        
-        for no in range(1, 4):
-            method_name = f'suara_{no}_fmt'
-            method = getattr(self.__class__, method_name, None)
-            if method and no in paslons:
-                method.short_description = format_html(
-                    '0{} <br> <img src="{}" style="width:45px;height:45px;object-fit:contain;border-radius:4px;border:1px solid #ddd;padding:2px;background:#fff;margin-top:4px;">', 
-                    no, paslons[no]
-                )
-        return super().changelist_view(request, extra_context)
+    def get_list_display(self, request):
+        """Kolom suara disisipkan per paslon sesuai data PaslonPilpres terbaru."""
+        paslon_cols = get_paslon_columns('s{no}_total', 'sah_total')
+        return ('nama', 'get_tps_dpt', *paslon_cols,
+                'total_suara_sah_fmt', 'suara_tidak_sah_fmt', 'total_suara_masuk_fmt', 'get_grid_link')
+
+    def get_sortable_by(self, request):
+        return self.get_list_display(request)
+
+    @admin.display(description='Input Grid')
+    def get_grid_link(self, obj):
+        return format_html(
+            '<a href="{}" class="btn btn-sm btn-outline-primary" title="Input semua kecamatan sekaligus">'
+            '<i class="fas fa-table"></i> Grid</a>',
+            reverse('admin:pilpres_2024_kabupatenpilpres_grid', args=[obj.pk])
+        )
+
+    # --- GRID EDITOR (SEMUA KECAMATAN DALAM SATU KABUPATEN) ---
+    def get_urls(self):
+        custom_urls = [
+            path('<int:pk>/grid/', self.admin_site.admin_view(self.grid_view), name='pilpres_2024_kabupatenpilpres_grid'),
+        ]
+        return custom_urls + super().get_urls()
+
+    # _save_grid menambah / mengubah baris di keempat tabel ini
+    GRID_PERMS = [
+        f'{app}.{aksi}_{model}'
+        for app, model in (('pilpres_2024', 'rekapsuarapilpres'), ('pilpres_2024', 'detailsuarapaslon'),
+                           ('core', 'tpsdptpemilu'), ('core', 'tpsdptpilkada'))
+        for aksi in ('add', 'change')
+    ]
+
+    def _grid_can_change(self, request):
+        return request.user.has_perms(self.GRID_PERMS)
+
+    def _load_grid(self, kab, paslons):
+        """Ambil seluruh data grid satu kabupaten: 2 query berapapun jumlah kecamatannya."""
+        kecs = list(Kecamatan.objects.filter(kabupaten_kota=kab).select_related(
+            'hasil_pilpres', 'tpsdpt_pemilu', 'tpsdpt_pilkada'
+        ).order_by('nama'))
+        details = {
+            (d.rekap_suara_id, d.paslon_id): d
+            for d in DetailSuaraPaslon.objects.filter(rekap_suara__kecamatan__kabupaten_kota=kab)
+        }
+        rows = []
+        for kec in kecs:
+            rekap = getattr(kec, 'hasil_pilpres', None)
+            tps_objs = {TPSDPTPemilu: getattr(kec, 'tpsdpt_pemilu', None), TPSDPTPilkada: getattr(kec, 'tpsdpt_pilkada', None)}
+            values = {}
+            for p in paslons:
+                d = details.get((rekap.pk, p.id)) if rekap else None
+                values[f's_{p.id}'] = d.jumlah_suara if d else 0
+            values['ts'] = rekap.suara_tidak_sah if rekap else 0
+            for key, _, model, field in self.GRID_TPS_COLUMNS:
+                values[key] = getattr(tps_objs[model], field) if tps_objs[model] else 0
+            rows.append({'kec': kec, 'values': values})
+        return rows
+
+    def _save_grid(self, changed, paslons):
+        """
+        Tulis hanya sel yang diubah user (`changed` = {kec_id: {key: nilai}}, yaitu nilai kirim yang
+        berbeda dari nilai asli saat grid dibuka) dalam satu transaksi. Baris dikunci & dibaca ulang
+        di dalam transaksi lalu sel diterapkan ke baris terkini, sehingga sel yang tidak disentuh
+        tidak menimpa perubahan user lain. Baris yang belum ada dibuat dulu dengan ignore_conflicts
+        (aman bila user lain baru saja membuatnya). Hasil: jumlah sel yang ditulis.
+        """
+        paslon_ids = {f's_{p.id}': p.id for p in paslons}
+        tps_cols = {key: (model, field) for key, _, model, field in self.GRID_TPS_COLUMNS}
+
+        def kunci(model, kec_ids):
+            # Baris per kecamatan (terkunci); yang belum ada dibuat dulu lalu dibaca lagi
+            rows = {o.kecamatan_id: o for o in model.objects.select_for_update().filter(kecamatan_id__in=kec_ids)}
+            baru = [k for k in kec_ids if k not in rows]
+            if baru:
+                model.objects.bulk_create([model(kecamatan_id=k) for k in baru], ignore_conflicts=True)
+                rows.update({o.kecamatan_id: o for o in model.objects.select_for_update().filter(kecamatan_id__in=baru)})
+            return rows
+
+        ditulis = 0
+        with transaction.atomic():
+            # 1. Master rekap (suara tidak sah) & detail suara paslon
+            kec_pilpres = [k for k, cells in changed.items() if any(key == 'ts' or key in paslon_ids for key in cells)]
+            rekaps = kunci(RekapSuaraPilpres, kec_pilpres)
+            rekap_update = []
+            for kec_id in kec_pilpres:
+                if 'ts' in changed[kec_id]:
+                    rekaps[kec_id].suara_tidak_sah = changed[kec_id]['ts']
+                    rekap_update.append(rekaps[kec_id])
+            RekapSuaraPilpres.objects.bulk_update(rekap_update, ['suara_tidak_sah'])
+            ditulis += len(rekap_update)
+
+            sel_paslon = {
+                (rekaps[kec_id].pk, paslon_ids[key]): val
+                for kec_id in kec_pilpres for key, val in changed[kec_id].items() if key in paslon_ids
+            }
+            rekap_ids = {r for r, _ in sel_paslon}
+            details = {
+                (d.rekap_suara_id, d.paslon_id): d
+                for d in DetailSuaraPaslon.objects.select_for_update().filter(rekap_suara_id__in=rekap_ids)
+            }
+            baru = [DetailSuaraPaslon(rekap_suara_id=r, paslon_id=p) for r, p in sel_paslon if (r, p) not in details]
+            if baru:
+                DetailSuaraPaslon.objects.bulk_create(baru, ignore_conflicts=True)
+                details = {
+                    (d.rekap_suara_id, d.paslon_id): d
+                    for d in DetailSuaraPaslon.objects.select_for_update().filter(rekap_suara_id__in=rekap_ids)
+                }
+            for key, val in sel_paslon.items():
+                details[key].jumlah_suara = val
+            DetailSuaraPaslon.objects.bulk_update([details[key] for key in sel_paslon], ['jumlah_suara'])
+            ditulis += len(sel_paslon)
+
+            # 2. TPS & DPT (Pemilu & Pilkada)
+            for model in (TPSDPTPemilu, TPSDPTPilkada):
+                kec_ids = [k for k, cells in changed.items() if any(key in tps_cols and tps_cols[key][0] is model for key in cells)]
+                objs = kunci(model, kec_ids)
+                for kec_id in kec_ids:
+                    for key, val in changed[kec_id].items():
+                        if key in tps_cols and tps_cols[key][0] is model:
+                            setattr(objs[kec_id], tps_cols[key][1], val)
+                            ditulis += 1
+                model.objects.bulk_update([objs[k] for k in kec_ids], ['jumlah_tps', 'jumlah_dpt'])
+            # Penulisan massal tidak memicu signal
+            bump_data_version(RekapSuaraPilpres, DetailSuaraPaslon, TPSDPTPemilu, TPSDPTPilkada)
+        return ditulis
+
+    def grid_view(self, request, pk):
+        """Editor ala spreadsheet: baris = kecamatan, kolom = suara paslon, tidak sah, TPS & DPT."""
+        kab = get_object_or_404(KabupatenKota, pk=pk)
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        can_change = self._grid_can_change(request)
+        paslons = get_paslon_list()
+        rows = self._load_grid(kab, paslons)
+        columns = [(f's_{p.id}', f"{p.no_urut:02d}. {p.nama_capres}") for p in paslons]
+        columns += [('ts', 'Tidak Sah')] + [(key, label) for key, label, _, _ in self.GRID_TPS_COLUMNS]
+
+        errors, asli = {}, None
+        if request.method == 'POST':
+            if not can_change:
+                raise PermissionDenied
+            # Nilai asli tiap sel saat grid dibuka: hanya sel yang diubah user yang ditulis
+            try:
+                asli = json.loads(request.POST.get('asli') or '{}')
+            except ValueError:
+                asli = {}
+            if not isinstance(asli, dict):
+                asli = {}
+            # Validasi seluruh sel sekaligus sebelum menulis apapun
+            cleaned, changed = {}, {}
+            for row in rows:
+                kec_id = row['kec'].pk
+                cleaned[kec_id] = {}
+                for key, _ in columns:
+                    name = f'c_{kec_id}_{key}'
+                    raw = request.POST.get(name, '').strip().replace('.', '').replace(',', '')
+                    if raw == '':
+                        val = 0
+                    elif raw.isdigit():
+                        val = int(raw)
+                    else:
+                        errors[name] = 'Harus angka bulat >= 0'
+                        val = request.POST.get(name)
+                    cleaned[kec_id][key] = val
+                    # Sel tanpa nilai asli (form lama) dianggap diubah bila beda dari data sekarang
+                    if val != asli.get(name, row['values'][key]):
+                        changed.setdefault(kec_id, {})[key] = val
+            if not errors:
+                n = self._save_grid(changed, paslons)
+                messages.success(request, f"Grid {kab.nama} tersimpan ({n} sel diperbarui).")
+                return HttpResponseRedirect(request.path)
+            messages.error(request, f"Ada {len(errors)} sel tidak valid. Tidak ada data yang disimpan.")
+            # Tampilkan kembali isian user apa adanya, nilai asli tetap dari saat grid dibuka
+            for row in rows:
+                row['values'] = cleaned[row['kec'].pk]
+
+        for row in rows:
+            row['cells'] = [(f"c_{row['kec'].pk}_{key}", key, row['values'][key], errors.get(f"c_{row['kec'].pk}_{key}")) for key, _ in columns]
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f"Input Grid Pilpres & TPS/DPT - {kab.nama}",
+            'kabupaten': kab,
+            'columns': columns,
+            'paslon_keys': [f's_{p.id}' for p in paslons],
+            'rows': rows,
+            'asli': json.dumps(asli if asli is not None else {
+                f"c_{row['kec'].pk}_{key}": row['values'][key] for row in rows for key, _ in columns
+            }),
+            'can_change': can_change,
+        }
+        return TemplateResponse(request, 'admin/pilpres_2024/kabupatenpilpres/grid.html', context)
 
     def _fmt(self, val):
-        return "{:,}".format(val or 0).replace(',', '.')
+        return _fmt_angka(val)
 
     @admin.display(description='TPS / DPT', ordering='tps_total')
     def get_tps_dpt(self, obj):
@@ -464,27 +738,6 @@ class KabupatenPilpresAdmin(admin.ModelAdmin):
             self._fmt(obj.tps_total), self._fmt(obj.dpt_total)
         )
 
-    @admin.display(description='(01)', ordering='s1_total')
-    def suara_1_fmt(self, obj):
-        v = obj.s1_total or 0
-        t = obj.sah_total or 0
-        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
-
-    @admin.display(description='(02)', ordering='s2_total')
-    def suara_2_fmt(self, obj):
-        v = obj.s2_total or 0
-        t = obj.sah_total or 0
-        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
-
-    @admin.display(description='(03)', ordering='s3_total')
-    def suara_3_fmt(self, obj):
-        v = obj.s3_total or 0
-        t = obj.sah_total or 0
-        p = f"({(v/t*100):.1f}%)" if t > 0 else "(0.0%)"
-        return format_html('<div style="text-align:center;"><b>{}</b><br><small style="color:#666; font-size:11.5px;">{}</small></div>', self._fmt(v), p)
-
     @admin.display(description='Total Sah', ordering='sah_total')
     def total_suara_sah_fmt(self, obj):
         v = obj.sah_total or 0
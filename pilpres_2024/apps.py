@@ -5,3 +5,7 @@ class Pilpres2024Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pilpres_2024'
     verbose_name = 'Pilpres 2024'
+
+    def ready(self):
+        # Daftarkan signal invalidasi cache data referensi paslon
+        from . import refdata  # noqa: F401
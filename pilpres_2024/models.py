@@ -7,19 +7,9 @@ from core.models import Partai, KabupatenKota
 
 class PaslonPilpresQuerySet(models.QuerySet):
     def with_totals(self):
-        from django.db.models import Sum, Subquery, IntegerField
-        from django.db.models.functions import Coalesce
-        from .models import DetailSuaraPaslon
-        
-        qs = self.prefetch_related('koalisi').annotate(total_suara=Sum('data_suara_kecamatan__jumlah_suara'))
-        qs = qs.annotate(
-            total_sah_all=Coalesce(Subquery(
-                DetailSuaraPaslon.objects.values('paslon__id').annotate(
-                    all_t=Sum('jumlah_suara')
-                ).filter(paslon__id__isnull=False).values('all_t')[:1]
-            ), 0)
-        )
-        return qs
+        """Total suara tiap paslon. Total sah & sebaran kemenangan ada di pilpres_2024.winners."""
+        from django.db.models import Sum
+        return self.prefetch_related('koalisi').annotate(total_suara=Sum('data_suara_kecamatan__jumlah_suara'))
 
 class PaslonPilpres(models.Model):
     objects = PaslonPilpresQuerySet.as_manager()
@@ -61,17 +51,31 @@ class KoalisiPilpres(models.Model):
 # MODEL REKAP SUARA (MASTER-DETAIL)
 # ==============================================================================
 
+def paslon_pivot_keys(paslons=None):
+    """
+    Daftar (id, no_urut) paslon untuk membangkitkan kolom pivot s<no_urut>.
+    Diturunkan dari PaslonPilpres agar berlaku untuk N paslon (termasuk putaran kedua).
+    """
+    if paslons is None:
+        from .refdata import get_paslon_list
+        paslons = get_paslon_list()
+    return [(p.id, p.no_urut) if hasattr(p, 'no_urut') else tuple(p) for p in paslons]
+
+
 class RekapSuaraPilpresQuerySet(models.QuerySet):
-    def with_totals(self):
+    def with_totals(self, paslons=None):
+        """Pivot suara per paslon (s1, s2, ... sN) dengan conditional aggregation dalam satu GROUP BY."""
         from django.db.models import Sum, F, Q
+        pivots = {
+            f's{no}': Sum('rincian_suara__jumlah_suara', filter=Q(rincian_suara__paslon_id=pid))
+            for pid, no in paslon_pivot_keys(paslons)
+        }
         return self.select_related(
             'kecamatan', 'kecamatan__kabupaten_kota', 'kecamatan__tpsdpt_pemilu'
         ).annotate(
             total_sah_db=Sum('rincian_suara__jumlah_suara'),
             total_masuk_db=Sum('rincian_suara__jumlah_suara') + F('suara_tidak_sah'),
-            s1=Sum('rincian_suara__jumlah_suara', filter=Q(rincian_suara__paslon__no_urut=1)),
-            s2=Sum('rincian_suara__jumlah_suara', filter=Q(rincian_suara__paslon__no_urut=2)),
-            s3=Sum('rincian_suara__jumlah_suara', filter=Q(rincian_suara__paslon__no_urut=3)),
+            **pivots,
         )
 
 class RekapSuaraPilpres(models.Model):
@@ -136,44 +140,32 @@ class DetailSuaraPaslon(models.Model):
 
 
 class KabupatenPilpresQuerySet(models.QuerySet):
-    def with_totals(self):
-        from django.db.models import Sum, OuterRef, Subquery, IntegerField, F
+    def with_totals(self, paslons=None):
+        from django.db.models import Sum, OuterRef, Subquery, IntegerField, F, Q
         from django.db.models.functions import Coalesce
-        from .models import DetailSuaraPaslon, RekapSuaraPilpres
-        
-        rekap_qs = RekapSuaraPilpres.objects.filter(kecamatan__kabupaten_kota=OuterRef('pk'))
-        
-        qs = self.annotate(
-            tps_total=Coalesce(Sum('kecamatan_set__tpsdpt_pemilu__jumlah_tps'), 0),
-            dpt_total=Coalesce(Sum('kecamatan_set__tpsdpt_pemilu__jumlah_dpt'), 0),
-            s1_total=Coalesce(Subquery(
-                DetailSuaraPaslon.objects.filter(
-                    rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), paslon__no_urut=1
-                ).values('rekap_suara__kecamatan__kabupaten_kota').annotate(total=Sum('jumlah_suara')).values('total'),
-                output_field=IntegerField()
-            ), 0),
-            s2_total=Coalesce(Subquery(
-                DetailSuaraPaslon.objects.filter(
-                    rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), paslon__no_urut=2
-                ).values('rekap_suara__kecamatan__kabupaten_kota').annotate(total=Sum('jumlah_suara')).values('total'),
-                output_field=IntegerField()
-            ), 0),
-            s3_total=Coalesce(Subquery(
-                DetailSuaraPaslon.objects.filter(
-                    rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk'), paslon__no_urut=3
-                ).values('rekap_suara__kecamatan__kabupaten_kota').annotate(total=Sum('jumlah_suara')).values('total'),
-                output_field=IntegerField()
-            ), 0),
-            sah_total=Coalesce(Subquery(
-                DetailSuaraPaslon.objects.filter(
-                    rekap_suara__kecamatan__kabupaten_kota=OuterRef('pk')
-                ).values('rekap_suara__kecamatan__kabupaten_kota').annotate(total=Sum('jumlah_suara')).values('total'),
-                output_field=IntegerField()
-            ), 0),
-            tidak_sah_total=Coalesce(Subquery(
-                rekap_qs.values('kecamatan__kabupaten_kota').annotate(total=Sum('suara_tidak_sah')).values('total'),
+        from core.models import TPSDPTPemilu
+        from .models import RekapSuaraPilpres
+
+        def _per_kab(qs, field):
+            # Subquery per kabupaten agar tidak ikut terlipatgandakan oleh join rincian suara
+            return Coalesce(Subquery(
+                qs.filter(kecamatan__kabupaten_kota=OuterRef('pk')).values('kecamatan__kabupaten_kota').annotate(total=Sum(field)).values('total'),
                 output_field=IntegerField()
             ), 0)
+
+        # Pivot suara paslon: satu join ke rincian suara + SUM(... FILTER paslon) untuk setiap paslon
+        rincian = 'kecamatan_set__hasil_pilpres__rincian_suara'
+        pivots = {
+            f's{no}_total': Coalesce(Sum(f'{rincian}__jumlah_suara', filter=Q(**{f'{rincian}__paslon_id': pid})), 0)
+            for pid, no in paslon_pivot_keys(paslons)
+        }
+
+        qs = self.annotate(
+            tps_total=_per_kab(TPSDPTPemilu.objects.all(), 'jumlah_tps'),
+            dpt_total=_per_kab(TPSDPTPemilu.objects.all(), 'jumlah_dpt'),
+            tidak_sah_total=_per_kab(RekapSuaraPilpres.objects.all(), 'suara_tidak_sah'),
+            sah_total=Coalesce(Sum(f'{rincian}__jumlah_suara'), 0),
+            **pivots,
         )
         return qs.annotate(total_masuk_db=F('sah_total') + F('tidak_sah_total'))
 
@@ -0,0 +1,29 @@
+"""
+Cache data referensi Paslon Pilpres (lihat core.refdata.ReferenceCache).
+Di-reset setiap kali PaslonPilpres atau KoalisiPilpres disimpan/dihapus.
+"""
+from collections import namedtuple
+
+from core.refdata import ReferenceCache
+from .models import PaslonPilpres, KoalisiPilpres
+
+PaslonRef = namedtuple('PaslonRef', 'id no_urut nama_capres nama_cawapres warna_hex foto_url koalisi_ids')
+
+
+def _load_paslon():
+    koalisi = {}
+    for paslon_id, partai_id in KoalisiPilpres.objects.values_list('paslon_id', 'partai_id'):
+        koalisi.setdefault(paslon_id, []).append(partai_id)
+    return tuple(
+        PaslonRef(p.id, p.no_urut, p.nama_capres, p.nama_cawapres, p.warna_hex,
+                  p.foto_paslon.url if p.foto_paslon else None, tuple(koalisi.get(p.id, ())))
+        for p in PaslonPilpres.objects.order_by('no_urut')
+    )
+
+
+paslon_cache = ReferenceCache('paslon', _load_paslon, [PaslonPilpres, KoalisiPilpres])
+
+
+def get_paslon_list():
+    """Tuple PaslonRef urut no_urut."""
+    return paslon_cache.get()
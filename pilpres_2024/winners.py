@@ -0,0 +1,106 @@
+"""
+Mesin pemenang Pilpres per wilayah: pemenang, runner-up, margin dan jumlah kemenangan paslon.
+
+Peringkat dihitung di database (GROUP BY wilayah+paslon lalu ROW_NUMBER() OVER PARTITION BY wilayah),
+jadi hanya dua baris teratas per wilayah yang sampai ke Python. Hasil di-cache per versi data
+(core.versioning) dan dipakai bersama oleh admin Paslon dan peta (warna + opacity).
+"""
+from collections import Counter, namedtuple
+from types import MappingProxyType
+
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
+
+from core.models import Kecamatan
+from core.versioning import VersionedCache
+from .models import PaslonPilpres, RekapSuaraPilpres, DetailSuaraPaslon
+from .refdata import get_paslon_list
+
+# Kolom wilayah (dilihat dari DetailSuaraPaslon) per level
+LEVELS = {
+    'kecamatan': 'rekap_suara__kecamatan_id',
+    'kabupaten': 'rekap_suara__kecamatan__kabupaten_kota_id',
+}
+
+WARNA_KOSONG = '#808080'
+
+
+class RegionWinner(namedtuple('RegionWinner', 'region_id winner_id winner_suara runner_id runner_suara sah')):
+    """Hasil satu wilayah. runner_id None bila hanya ada satu paslon bersuara."""
+    __slots__ = ()
+
+    @property
+    def margin(self):
+        return self.winner_suara - self.runner_suara
+
+    @property
+    def win_pct(self):
+        return self.winner_suara / self.sah * 100 if self.sah else 0.0
+
+    @property
+    def margin_pct(self):
+        return self.margin / self.sah * 100 if self.sah else 0.0
+
+
+# regions: {wilayah_id: RegionWinner}, wins: {paslon_id: jumlah wilayah dimenangkan}
+Winners = namedtuple('Winners', 'level regions wins total_sah')
+
+_cache = VersionedCache(DetailSuaraPaslon, RekapSuaraPilpres, PaslonPilpres, Kecamatan)
+
+
+def _hitung(level):
+    region = LEVELS[level]
+    ranked = DetailSuaraPaslon.objects.values(
+        wilayah=F(region), pid=F('paslon_id'), no=F('paslon__no_urut')
+    ).annotate(
+        suara=Sum('jumlah_suara')
+    ).annotate(
+        # Seri dipecah dengan no urut agar hasil deterministik
+        rk=Window(RowNumber(), partition_by=F(region), order_by=[F('suara').desc(), F('no').asc()])
+    ).filter(rk__lte=2).order_by()
+
+    sah = dict(
+        DetailSuaraPaslon.objects.values_list(region).annotate(t=Sum('jumlah_suara')).order_by()
+    )
+
+    top = {}
+    for row in ranked:
+        top.setdefault(row['wilayah'], [None, None])[row['rk'] - 1] = (row['pid'], row['suara'] or 0)
+
+    regions = {}
+    for wilayah_id, (first, second) in top.items():
+        total = sah.get(wilayah_id) or 0
+        # Wilayah tanpa suara sah belum punya pemenang
+        if not total or first is None:
+            continue
+        runner_id, runner_suara = second or (None, 0)
+        regions[wilayah_id] = RegionWinner(wilayah_id, first[0], first[1], runner_id, runner_suara, total)
+
+    wins = Counter(w.winner_id for w in regions.values())
+    return Winners(level, MappingProxyType(regions), MappingProxyType(dict(wins)), sum(sah.values()))
+
+
+def get_winners(level):
+    """Winners untuk 'kecamatan' atau 'kabupaten' (id wilayah = id Kecamatan / KabupatenKota)."""
+    return _cache.get(level, lambda: _hitung(level))
+
+
+def fill_opacity(winner):
+    """Opacity peta menurut persentase pemenang: Telak (> 60%) pekat, Sedang (50-60%), Tipis (< 50%) pudar."""
+    if winner is None or not winner.sah:
+        return 0.75
+    if winner.win_pct > 60:
+        return 0.90
+    if winner.win_pct >= 50:
+        return 0.65
+    return 0.35
+
+
+def warna_pemenang(winner):
+    """Warna paslon pemenang (abu-abu bila belum ada pemenang)."""
+    if winner is None:
+        return WARNA_KOSONG
+    for p in get_paslon_list():
+        if p.id == winner.winner_id:
+            return p.warna_hex
+    return WARNA_KOSONG
@@ -62,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Invalidasi cache lokal bila data diubah worker lain
+    'core.versioning.DataVersionMiddleware',
 ]
 
 ROOT_URLCONF = 'siapa.urls'
@@ -56,7 +56,8 @@ def dummy_map(request):
         return redirect('custom_login')
     return render(request, 'dashboard_map.html')
 
-from geojson.views import get_geo_data
+from geojson.views import get_geo_data, get_recap_data, get_caleg_data, get_proyeksi_data, get_metrik_data, region_detail, region_mirip, locate
+from pilegri_2024.views import get_peringkat_caleg
 
 urlpatterns = [
     path('', dummy_landing, name='landing'),
@@ -66,6 +67,14 @@ urlpatterns = [
     path('dashboard/', dummy_dashboard, name='dashboard_overview'),
     path('map/', dummy_map, name='dashboard_map'),
     path('get_geo_data/', get_geo_data, name='get_geo_data'),
+    path('get_recap_data/', get_recap_data, name='get_recap_data'),
+    path('get_caleg_data/', get_caleg_data, name='get_caleg_data'),
+    path('get_proyeksi_data/', get_proyeksi_data, name='get_proyeksi_data'),
+    path('get_metrik_data/', get_metrik_data, name='get_metrik_data'),
+    path('region_detail/<str:level>/<int:region_id>/', region_detail, name='region_detail'),
+    path('region_mirip/<str:level>/<int:region_id>/', region_mirip, name='region_mirip'),
+    path('locate/', locate, name='locate'),
+    path('get_peringkat_caleg/', get_peringkat_caleg, name='get_peringkat_caleg'),
 ]
 
 from django.urls import re_path